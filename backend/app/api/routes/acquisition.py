@@ -1,61 +1,176 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
 from datetime import datetime
-import uuid
+
+from app.api.routes.auth import get_current_user
+from app.api.routes.eeg import hub
+from app.config import settings
+from app.core.live_slot import read_live_slot
+from app.core.session_artifacts import SessionArtifacts
+from app.data.db import get_db
+from app.data.repositories.result_repository import SessionRepository
+from app.data.repositories.session_registry import create_session_registry
+from app.domain.entities.acquisition_session import AcquisitionSession
 
 router = APIRouter(prefix="/acquisition", tags=["Acquisition"])
 
-# Store en mémoire pour les sessions (en prod => base de données)
-active_sessions: dict[str, dict] = {}
+# Registre des sessions : partagé entre workers (sqlite) ou en mémoire (tests),
+# sessions arrêtées évincées après acquisition_session_ttl_seconds
+session_registry = create_session_registry(
+    settings.acquisition_registry_backend,
+    settings.acquisition_registry_path,
+    settings.acquisition_session_ttl_seconds,
+)
+session_artifacts = SessionArtifacts(settings.session_store_dir)
+
+# Intervalle de relecture du slot live pendant /stop
+STOP_WAIT_POLL_SECONDS = 0.05
+
+
+class StartAcqRequest(BaseModel):
+    mode: str = Field(default="repos", min_length=1, max_length=20)
+    patient_id: int | None = Field(default=None, gt=0)
+    device_id: int | None = Field(default=None, gt=0)
 
 
 class StartAcqResponse(BaseModel):
-    session_id: str
+    session_id: int  # id t_session_mesure, à passer à /eeg/stream?session_id=...
 
 
 class StopAcqRequest(BaseModel):
-    session_id: str
+    session_id: int
 
 
 class LiveMetrics(BaseModel):
     fatigue_score: float
     quality: float
     timestamp: str
+    streaming: bool = False  # flux /eeg/stream?session_id=... en cours
+    fatigue_ready: bool = False  # fenêtre de scoring complète
+    samples: int = 0
+    frames: int = 0
+    signal_time: float = 0.0  # s
+    active_alerts: int = 0
+    updated_at: str | None = None
+
+
+def require_session(db: Session, session_id: int, current_user: dict) -> None:
+    """Même contrôle que le flux EEG : session existante, de l'organisation de l'utilisateur"""
+    if SessionRepository(db).get_for_organisation(session_id, current_user["organisation_id"]) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+
+async def wait_stream_stopped(session_id: str, timeout: float) -> bool:
+    """
+    Attendre que le slot live ne soit plus « streaming » : le producteur,
+    sur n'importe quel worker, a fini de finaliser la session. Un slot
+    absent ou non mis à jour depuis timeout n'a plus de producteur.
+    """
+    path = session_artifacts.live_slot_path(session_id)
+    deadline = time.monotonic() + timeout
+    while True:
+        live = await run_in_threadpool(read_live_slot, path)
+        if live is None or not live.streaming or time.time() - live.updated_at > timeout:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(STOP_WAIT_POLL_SECONDS)
 
 
 @router.post("/start", response_model=StartAcqResponse)
-async def start_acquisition():
-    """Démarrer une nouvelle session d'acquisition EEG"""
-    session_id = str(uuid.uuid4())
-    active_sessions[session_id] = {
-        "started_at": datetime.now(),
-        "status": "running",
-        "fatigue_score": 0.0,
-        "quality": 85.0,
-    }
-    return StartAcqResponse(session_id=session_id)
+def start_acquisition(
+    body: StartAcqRequest | None = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Démarrer une nouvelle session d'acquisition EEG
+
+    Crée la ligne t_session_mesure de la session : le flux EEG, /live et
+    /stop utilisent tous son id.
+    """
+    body = body or StartAcqRequest()
+    row = SessionRepository(db).create(
+        mode=body.mode,
+        created_by_user_id=current_user["user_id"],
+        organisation_id=current_user["organisation_id"],
+        patient_id=body.patient_id,
+        device_id=body.device_id,
+        started_at=datetime.now(),
+        app_version=settings.app_version,
+    )
+    session_registry.create(AcquisitionSession(
+        session_id=str(row.session_id),
+        status="running",
+        started_at=row.started_at,
+    ))
+    return StartAcqResponse(session_id=row.session_id)
 
 
 @router.post("/stop")
-async def stop_acquisition(body: StopAcqRequest):
-    """Arrêter une session d'acquisition"""
-    session_id = body.session_id
-    if session_id in active_sessions:
-        active_sessions[session_id]["status"] = "stopped"
-        active_sessions[session_id]["stopped_at"] = datetime.now()
-    return {"status": "success", "session_id": session_id}
+async def stop_acquisition(
+    body: StopAcqRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Arrêter une session d'acquisition
+
+    La demande d'arrêt est déposée dans le dossier de la session pour le
+    worker qui porte le flux ; la réponse attend que ce flux soit finalisé
+    (enregistrement vidé sur disque, résumés écrits).
+    """
+    await run_in_threadpool(require_session, db, body.session_id, current_user)
+    session_id = str(body.session_id)
+    await run_in_threadpool(session_artifacts.request_stop, session_id)
+    recorders = await hub.stop_session(session_id)
+    if not await wait_stream_stopped(session_id, settings.acquisition_stop_timeout_seconds):
+        raise HTTPException(status_code=504, detail="Session stream did not stop in time")
+    await run_in_threadpool(session_registry.stop, session_id)
+    return {"status": "success", "session_id": body.session_id, "recorders": recorders}
 
 
 @router.get("/{session_id}/live", response_model=LiveMetrics)
-async def get_live_metrics(session_id: str):
-    """Récupérer les métriques en temps réel d'une session"""
-    if session_id not in active_sessions:
-        from fastapi import HTTPException
+def get_live_metrics(
+    session_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Récupérer les métriques en temps réel d'une session
+
+    Dernière valeur publiée par le producteur du flux EEG (lecture d'un
+    enregistrement fixe, sans verrou ni base), quel que soit le worker
+    qui porte le flux.
+    """
+    require_session(db, session_id, current_user)
+    try:
+        live = read_live_slot(session_artifacts.live_slot_path(session_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if live is not None:
+        return LiveMetrics(
+            fatigue_score=live.fatigue,
+            quality=live.quality_score,
+            timestamp=datetime.now().isoformat(),
+            streaming=live.streaming,
+            fatigue_ready=live.fatigue_ready,
+            samples=live.samples,
+            frames=live.frames,
+            signal_time=live.signal_time,
+            active_alerts=live.active_alerts,
+            updated_at=datetime.fromtimestamp(live.updated_at).isoformat(),
+        )
+
+    # Pas encore de flux pour cette session : valeurs du registre
+    session = session_registry.get(str(session_id))
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = active_sessions[session_id]
     return LiveMetrics(
-        fatigue_score=session.get("fatigue_score", 0.0),
-        quality=session.get("quality", 85.0),
+        fatigue_score=session.fatigue_score,
+        quality=session.quality,
         timestamp=datetime.now().isoformat(),
     )
@@ -1,45 +1,83 @@
 """Routes d'analytics et de données pour le dashboard."""
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime, time, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
-from app.data.db import get_db
+from app.api.routes.eeg import dsp_executor
+from app.config import settings
+from app.core.epoch_features import FLAGS, EpochTable
+from app.core.fatigue_series import FatigueSeriesReader, summarize_histogram
+from app.core.hypnogram import STAGES, HypnogramIndex, aggregate_by_stage
+from app.core.periodic_job import PeriodicJob
+from app.core.sample_store import SampleStoreReader
+from app.core.session_artifacts import SessionArtifacts
+from app.data.db import SessionLocal, get_db
 from app.api.routes.auth import get_current_user
-from app.data.models.user_model import UserModel
+from app.data.models.patient_model import PatientModel
 from app.data.models.result_model import SessionModel
+from app.data.repositories.alert_repository import SessionAlertRepository
+from app.data.repositories.rollup_repository import ROLLUP_GROUPS, DailyRollupRepository
+from app.data.repositories.session_summary_repository import SessionSummaryRepository
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
+session_artifacts = SessionArtifacts(settings.session_store_dir)
+
+# Points par canal et par requête (/sessions/{id}/eeg)
+DEFAULT_EEG_POINTS = 2000
+MAX_EEG_POINTS = 20000
+
+
+def refresh_rollups() -> int:
+    """Vider la file d'invalidation des rollups, par lots de ROLLUP_BATCH_DAYS jours"""
+    db = SessionLocal()
+    try:
+        total = 0
+        while True:
+            done = DailyRollupRepository(db).refresh(settings.rollup_batch_days)
+            total += done
+            if done < settings.rollup_batch_days:
+                return total
+    finally:
+        db.close()
+
+
+# Démarré / arrêté par app.main (ROLLUP_JOB_ENABLED)
+rollup_job = PeriodicJob(refresh_rollups, settings.rollup_refresh_seconds, name="rollups")
 
 
 @router.get("/sessions/{session_id}/quality")
 async def get_session_quality(
     session_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user),
 ):
-    """Récupère la qualité du signal pour une session."""
+    """Récupère la qualité du signal mesurée pendant la session.
+
+    Lit le résumé écrit par le flux EEG (/eeg/stream?session_id=...),
+    sans relire l'enregistrement.
+    """
     session = db.query(SessionModel).filter(
         SessionModel.session_id == session_id,
-        SessionModel.organisation_id == current_user.organisation_id,
+        SessionModel.organisation_id == current_user["organisation_id"],
         SessionModel.deleted_at.is_(None),
     ).first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Calcul simplifié de la qualité basée sur la durée et présence de données
-    # En prod, ce serait un calcul complexe basé sur les données EEG
-    base_quality = 75
-    
-    # Bonus si la session est complète (has ended_at)
-    if session.ended_at:
-        base_quality += 10
-    
-    # Bonus si a des notes (indice que le data est bon)
-    if session.notes:
-        base_quality += 5
-    
-    # Cap à 100
-    quality_score = min(100, base_quality)
+    summary = session_artifacts.read_json(session_id, "quality")
+    if not summary or summary.get("quality_score") is None:
+        # Aucun signal reçu pour cette session : pas de valeur inventée
+        return {
+            "session_id": session_id,
+            "quality_score": None,
+            "quality_text": "Non mesurée",
+            "measured": False,
+        }
+
+    quality_score = summary["quality_score"]
     
     # Détermine la qualité textuelle
     if quality_score >= 85:
@@ -53,87 +91,489 @@ async def get_session_quality(
         "session_id": session_id,
         "quality_score": quality_score,
         "quality_text": quality_text,
+        "measured": True,
+        "min_quality_score": summary.get("min_quality_score"),
+        "duration_seconds": summary.get("duration_seconds"),
+        "label_seconds": summary.get("label_seconds", {}),
+        "channels": summary.get("channels", []),
     }
 
 
 @router.get("/sessions/{session_id}/eeg")
 async def get_session_eeg_data(
     session_id: int,
+    start: float = Query(0.0, ge=0),
+    end: float | None = Query(None, gt=0),
+    max_points: int = Query(DEFAULT_EEG_POINTS, ge=10, le=MAX_EEG_POINTS),
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user),
 ):
-    """Récupère les données EEG simulées pour une session.
+    """Récupère le signal EEG enregistré pour une session, sur [start, end) secondes.
+
+    Au plus max_points points par canal : au-delà, le signal est servi depuis
+    la pyramide min / max / moyenne du stockage de samples (niveau le plus
+    grossier qui résout encore la largeur demandée). Sans end : toute la session.
+    Lecture et conversion dans le pool de threads DSP (/eeg/dsp/stats).
+    """
+    session = db.query(SessionModel).filter(
+        SessionModel.session_id == session_id,
+        SessionModel.organisation_id == current_user["organisation_id"],
+        SessionModel.deleted_at.is_(None),
+    ).first()
     
-    En prod, ce serait les vraies données EEG stockées.
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    try:
+        store = await dsp_executor.run(SampleStoreReader, session_artifacts.samples_dir(session_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No EEG samples recorded for this session")
+    
+    if end is None:
+        end = store.duration
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+    
+    return await dsp_executor.run(_envelope_payload, store, session_id, start, end, max_points)
+
+
+def _envelope_payload(store: SampleStoreReader, session_id: int, start: float, end: float, max_points: int) -> dict:
+    """Enveloppe du signal sur [start, end) en types JSON (thread DSP)"""
+    envelope = store.read_envelope(
+        int(round(start * store.sfreq)),
+        int(round(end * store.sfreq)),
+        max_points,
+    )
+    n_points = envelope.mean.shape[1]
+    
+    payload = {
+        "session_id": session_id,
+        "channels": store.channels,
+        "data": {
+            channel: values.tolist()
+            for channel, values in zip(store.channels, envelope.mean)
+        },
+        "sampling_rate": store.sfreq,  # Hz
+        "start": envelope.start / store.sfreq,  # s
+        "end": envelope.stop / store.sfreq,  # s, fin réellement couverte (alignée, bornée par l'enregistrement)
+        "step_seconds": envelope.step / store.sfreq,  # durée couverte par un point
+        "duration": n_points,  # points
+        "recorded_seconds": store.duration,
+        "unit": "V",
+        "decimated": envelope.step > 1,
+    }
+    if payload["decimated"]:
+        # Enveloppe : tracé min / max sans perdre les pics
+        payload["min"] = {ch: v.tolist() for ch, v in zip(store.channels, envelope.min)}
+        payload["max"] = {ch: v.tolist() for ch, v in zip(store.channels, envelope.max)}
+    return payload
+
+
+@router.get("/sessions/{session_id}/fatigue-score")
+async def get_session_fatigue_score(
+    session_id: int,
+    threshold: float = Query(settings.fatigue_threshold, ge=0, le=100),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Récupère le score de fatigue mesuré pendant la session.
+
+    Agrégats (moyenne, maximum, p95, temps au-dessus du seuil) précalculés
+    par le flux EEG : coût constant quelle que soit la durée de la session.
     """
     session = db.query(SessionModel).filter(
         SessionModel.session_id == session_id,
-        SessionModel.organisation_id == current_user.organisation_id,
+        SessionModel.organisation_id == current_user["organisation_id"],
         SessionModel.deleted_at.is_(None),
     ).first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Génère des données EEG simulées (en prod ce serait des vraies données)
-    import random
+    summary = session_artifacts.read_json(session_id, "fatigue")
+    if not summary or not summary.get("windows"):
+        # Aucune fenêtre scorée pour cette session : pas de valeur inventée
+        return {
+            "session_id": session_id,
+            "fatigue_score": None,
+            "mode": session.mode,
+            "measured": False,
+        }
     
-    # 8 électrodes EEG
-    channels = ["Fp1", "Fp2", "F3", "F4", "T3", "T4", "O1", "O2"]
+    stats = summarize_histogram(summary["histogram_seconds"], threshold)
     
-    # Génère 100 points de données pour chaque canal
-    eeg_data = {
-        channel: [random.gauss(50, 10) for _ in range(100)]
-        for channel in channels
+    return {
+        "session_id": session_id,
+        "fatigue_score": int(round(stats["mean"])),
+        "mode": session.mode,
+        "measured": True,
+        "threshold": threshold,
+        "duration_seconds": summary["duration_seconds"],
+        "windows": summary["windows"],
+        **stats,
+        "channels": summary.get("channels", []),
     }
+
+
+@router.get("/sessions/{session_id}/fatigue-series")
+async def get_session_fatigue_series(
+    session_id: int,
+    start: float = Query(0.0, ge=0),
+    end: float | None = Query(None, gt=0),
+    max_points: int | None = Query(None, ge=10, le=MAX_EEG_POINTS),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Score de fatigue / temps sur [start, end) secondes (temps signal).
+
+    Avec max_points, les fenêtres consécutives sont regroupées (moyenne dans
+    score, maximum dans max), dans le pool de threads DSP.
+    """
+    session = db.query(SessionModel).filter(
+        SessionModel.session_id == session_id,
+        SessionModel.organisation_id == current_user["organisation_id"],
+        SessionModel.deleted_at.is_(None),
+    ).first()
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    try:
+        series = await dsp_executor.run(FatigueSeriesReader, session_artifacts.fatigue_dir(session_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No fatigue series recorded for this session")
+    
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
     
     return {
         "session_id": session_id,
-        "channels": channels,
-        "data": eeg_data,
-        "sampling_rate": 256,  # Hz
-        "duration": 100,  # points
+        "start": start,
+        "end": end,
+        "windows": len(series),
+        **await dsp_executor.run(series.read, start, end, max_points),
     }
 
 
-@router.get("/sessions/{session_id}/fatigue-score")
-async def get_session_fatigue_score(
+@router.get("/sessions/{session_id}/hypnogram")
+def get_session_hypnogram(
+    session_id: int,
+    start: float = Query(0.0, ge=0),
+    end: float | None = Query(None, gt=0),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Stades de sommeil sur [start, end) secondes : segments et temps par stade.
+
+    Lu depuis l'index de l'hypnogramme copié dans la session (recherche
+    dichotomique, pas de relecture de l'EDF). Sans end : tout l'hypnogramme.
+    """
+    session = db.query(SessionModel).filter(
+        SessionModel.session_id == session_id,
+        SessionModel.organisation_id == current_user["organisation_id"],
+        SessionModel.deleted_at.is_(None),
+    ).first()
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    try:
+        index = HypnogramIndex.load(session_artifacts.hypnogram_path(session_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No hypnogram for this session")
+    
+    if end is None:
+        end = index.duration_seconds
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+    
+    onset, stop, codes = index.segments(start, end)
+    return {
+        "session_id": session_id,
+        "start": start,
+        "end": end,
+        "segments": [
+            {"start": float(a), "end": float(b), "stage": STAGES[c]}
+            for a, b, c in zip(onset, stop, codes)
+        ],
+        "stage_seconds": index.stage_seconds(start, end),
+    }
+
+
+@router.get("/sessions/{session_id}/fatigue-by-stage")
+async def get_session_fatigue_by_stage(
     session_id: int,
+    start: float = Query(0.0, ge=0),
+    end: float | None = Query(None, gt=0),
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user),
 ):
-    """Récupère le score de fatigue estimé pour une session."""
+    """Score de fatigue moyen / maximum par stade de sommeil sur [start, end).
+
+    Chaque fenêtre de la série fatigue est étiquetée par le stade à son
+    instant (searchsorted vectorisé sur l'index de l'hypnogramme).
+    """
     session = db.query(SessionModel).filter(
         SessionModel.session_id == session_id,
-        SessionModel.organisation_id == current_user.organisation_id,
+        SessionModel.organisation_id == current_user["organisation_id"],
         SessionModel.deleted_at.is_(None),
     ).first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Calcul simplifié du score de fatigue basé sur le mode et l'heure
-    import random
-    from datetime import datetime
+    try:
+        index = await dsp_executor.run(HypnogramIndex.load, session_artifacts.hypnogram_path(session_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No hypnogram for this session")
+    try:
+        series = await dsp_executor.run(FatigueSeriesReader, session_artifacts.fatigue_dir(session_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No fatigue series recorded for this session")
     
-    base_fatigue = 50
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
     
-    # Varie selon le mode
-    mode_fatigue_map = {
-        "fatigue": 75,
-        "moteur": 45,
-        "attention": 55,
-        "relax": 30,
+    windows, stages = await dsp_executor.run(_fatigue_by_stage, index, series, start, end)
+    return {
+        "session_id": session_id,
+        "start": start,
+        "end": end,
+        "windows": windows,
+        "stages": stages,
     }
+
+
+def _fatigue_by_stage(index: HypnogramIndex, series: FatigueSeriesReader, start: float, end: float | None) -> tuple[int, dict]:
+    """Nombre de fenêtres et agrégats par stade sur [start, end) (thread DSP)"""
+    t, scores = series.arrays(start, end)
+    return len(t), aggregate_by_stage(index, t, scores)
+
+
+@router.get("/sessions/{session_id}/epochs")
+async def get_session_epochs(
+    session_id: int,
+    start: float = Query(0.0, ge=0),
+    end: float | None = Query(None, gt=0),
+    columns: str | None = Query(None, description="Colonnes séparées par des virgules (défaut : toutes)"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Table de features par epoch (bandes, theta/alpha, fatigue, qualité, stade).
+
+    Calculée une fois à l'arrêt de la session ou à l'import : lecture des
+    colonnes memory-mappées sur les epochs qui commencent dans [start, end),
+    dans le pool de threads DSP.
+    """
+    session = db.query(SessionModel).filter(
+        SessionModel.session_id == session_id,
+        SessionModel.organisation_id == current_user["organisation_id"],
+        SessionModel.deleted_at.is_(None),
+    ).first()
     
-    if session.mode:
-        base_fatigue = mode_fatigue_map.get(session.mode.lower(), 50)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
     
-    # Ajoute un peu d'aléatoire
-    fatigue_score = max(0, min(100, base_fatigue + random.randint(-10, 10)))
+    try:
+        table = await dsp_executor.run(EpochTable, session_artifacts.epochs_dir(session_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No epoch table for this session")
     
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+    names = [c.strip() for c in columns.split(",") if c.strip()] if columns else table.column_names
+    unknown = [c for c in names if c not in table.column_names]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+    
+    data = await dsp_executor.run(_epoch_columns, table, names, start, end)
     return {
         "session_id": session_id,
-        "fatigue_score": fatigue_score,
-        "mode": session.mode,
+        "epoch_seconds": table.epoch_seconds,
+        "channels": table.channels,
+        "flags": FLAGS,
+        "epochs": len(next(iter(data.values()))) if data else 0,
+        "columns": data,
     }
+
+
+def _epoch_columns(table: EpochTable, names: list[str], start: float, end: float | None) -> dict[str, list]:
+    """Colonnes de la table sur [start, end) en types JSON (thread DSP)"""
+    data = table.read(names, start, end)
+    if "stage" in data:
+        data["stage"] = [STAGES[c] for c in data["stage"]]
+    return {name: v if isinstance(v, list) else v.tolist() for name, v in data.items()}
+
+
+@router.get("/sessions/{session_id}/alerts")
+async def get_session_alerts(
+    session_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Alertes levées pendant la session (règles du flux EEG), avec comptes par règle."""
+    session = db.query(SessionModel).filter(
+        SessionModel.session_id == session_id,
+        SessionModel.organisation_id == current_user["organisation_id"],
+        SessionModel.deleted_at.is_(None),
+    ).first()
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    repo = SessionAlertRepository(db)
+    alerts = repo.list_by_session(session_id)
+    
+    return {
+        "session_id": session_id,
+        "counts": repo.count_by_rule(session_id),
+        "alerts": [
+            {
+                "rule": a.rule,
+                "severity": a.severity,
+                "message": a.message,
+                "raised_at_s": a.raised_at_s,
+                "cleared_at_s": a.cleared_at_s,
+                "peak_value": a.peak_value,
+            }
+            for a in alerts
+        ],
+    }
+
+
+@router.get("/patients/{patient_id}/trend")
+def get_patient_trend(
+    patient_id: int,
+    start: date | None = Query(None, description="Première date incluse (YYYY-MM-DD)"),
+    end: date | None = Query(None, description="Dernière date incluse (YYYY-MM-DD)"),
+    mode: str | None = Query(None, max_length=20),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Évolution de la fatigue d'un patient, une ligne par session.
+
+    Lu uniquement depuis les résumés écrits en fin de session
+    (t_session_resume, index (patient_id, started_at)) : ni samples ni série.
+    Réponse déjà en types JSON : pas de passage par jsonable_encoder, qui
+    coûte plus que la requête pour des centaines de sessions.
+    """
+    patient = db.query(PatientModel).filter(
+        PatientModel.patient_id == patient_id,
+        PatientModel.organisation_id == current_user["organisation_id"],
+        PatientModel.deleted_at.is_(None),
+    ).first()
+    
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    
+    rows = SessionSummaryRepository(db).list_by_patient(
+        patient_id,
+        current_user["organisation_id"],
+        start=datetime.combine(start, time.min) if start is not None else None,
+        end=datetime.combine(end + timedelta(days=1), time.min) if end is not None else None,
+        mode=mode,
+    )
+    
+    # Une conversion par ligne (l'accès par attribut d'une Row est coûteux)
+    fields = rows[0]._fields if rows else ()
+    sessions = [dict(zip(fields, r)) for r in rows]
+    for row in sessions:
+        row["started_at"] = row["started_at"].isoformat()
+    
+    # Moyennes globales pondérées par la durée des sessions
+    scored = [r for r in sessions if r["fatigue_mean"] is not None and r["duration_s"] > 0]
+    rated = [r for r in sessions if r["quality_mean"] is not None and r["duration_s"] > 0]
+    scored_s = sum(r["duration_s"] for r in scored)
+    rated_s = sum(r["duration_s"] for r in rated)
+    return JSONResponse({
+        "patient_id": patient_id,
+        "start": start.isoformat() if start is not None else None,
+        "end": end.isoformat() if end is not None else None,
+        "mode": mode,
+        "fatigue_threshold": settings.fatigue_threshold,
+        "summary": {
+            "sessions": len(sessions),
+            "duration_s": round(sum(r["duration_s"] for r in sessions), 3),
+            "fatigue_mean": round(sum(r["fatigue_mean"] * r["duration_s"] for r in scored) / scored_s, 1) if scored_s else None,
+            "fatigue_max": max((r["fatigue_max"] for r in sessions if r["fatigue_max"] is not None), default=None),
+            "fatigue_above_s": round(sum(r["fatigue_above_s"] for r in sessions), 3),
+            "quality_mean": round(sum(r["quality_mean"] * r["duration_s"] for r in rated) / rated_s, 1) if rated_s else None,
+            "alert_count": sum(r["alert_count"] for r in sessions),
+        },
+        "sessions": sessions,
+    })
+
+
+@router.get("/organisation/rollups")
+def get_organisation_rollups(
+    start: date | None = Query(None, description="Première date incluse (YYYY-MM-DD)"),
+    end: date | None = Query(None, description="Dernière date incluse (YYYY-MM-DD)"),
+    group_by: str = Query("service_id,medecin_referent_id,mode", description="Axes parmi day, service_id, medecin_referent_id, mode"),
+    mode: str | None = Query(None, max_length=20),
+    service_id: int | None = Query(None),
+    medecin_referent_id: int | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Indicateurs de l'organisation (sessions, durée, fatigue et qualité moyennes).
+
+    Lu uniquement depuis les rollups journaliers (t_rollup_jour), tenus à
+    jour par la tâche de fond : une session terminée ou modifiée y apparaît
+    au plus ROLLUP_REFRESH_SECONDS plus tard (pending_days > 0 entre-temps).
+    Les moyennes sont pondérées par la durée des sessions.
+    """
+    axes = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in axes if name not in ROLLUP_GROUPS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by: {', '.join(unknown)}")
+    if len(set(axes)) != len(axes):
+        raise HTTPException(status_code=400, detail="Duplicate group_by")
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    
+    rollups = DailyRollupRepository(db)
+    rows = rollups.aggregate(
+        current_user["organisation_id"],
+        axes,
+        start=start,
+        end=end,
+        mode=mode,
+        service_id=service_id,
+        medecin_referent_id=medecin_referent_id,
+    )
+    
+    def indicators(sessions, duration_s, fatigue_sum, fatigue_seconds, quality_sum, quality_seconds) -> dict:
+        return {
+            "sessions": int(sessions or 0),
+            "duration_s": round(duration_s or 0.0, 3),
+            "fatigue_mean": round(fatigue_sum / fatigue_seconds, 1) if fatigue_seconds else None,
+            "quality_mean": round(quality_sum / quality_seconds, 1) if quality_seconds else None,
+        }
+    
+    sums = ("sessions", "duration_s", "fatigue_sum", "fatigue_seconds", "quality_sum", "quality_seconds")
+    fields = rows[0]._fields if rows else ()
+    groups = []
+    totals = dict.fromkeys(sums, 0)
+    for row in rows:
+        values = dict(zip(fields, row))
+        group = {name: values[name] for name in axes}
+        if "day" in group:
+            group["day"] = group["day"].isoformat()
+        for key in sums:
+            totals[key] += values[key] or 0
+        groups.append({**group, **indicators(*(values[key] for key in sums))})
+    
+    return JSONResponse({
+        "organisation_id": current_user["organisation_id"],
+        "start": start.isoformat() if start is not None else None,
+        "end": end.isoformat() if end is not None else None,
+        "group_by": axes,
+        "filters": {"mode": mode, "service_id": service_id, "medecin_referent_id": medecin_referent_id},
+        # Totaux recalculés depuis les sommes (pas de moyenne de moyennes)
+        "totals": indicators(*totals.values()),
+        "groups": groups,
+        "pending_days": rollups.pending(current_user["organisation_id"]),
+        "job": rollup_job.stats(),
+    })
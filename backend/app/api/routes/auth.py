@@ -134,10 +134,15 @@ def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
 ) -> dict:
-    if not credentials or not credentials.credentials:
+    return authenticate_token(credentials.credentials if credentials else None, db)
+
+
+def authenticate_token(token: str | None, db: Session) -> dict:
+    """Jeton d'accès -> utilisateur (aussi pour les WebSockets, jeton en paramètre de requête)"""
+    if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
     try:
-        payload = decode_token(credentials.credentials)
+        payload = decode_token(token)
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
@@ -1,9 +1,26 @@
-import asyncio
+from functools import partial
 from pathlib import Path
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
 
+from app.api.schemas.eeg import EEGStreamMeta
 from app.config import settings
+from app.core.alert_rules import AlertEpisode, parse_rules
+from app.core.dsp_executor import DSPExecutor
+from app.core.eeg_frames import DTYPE_CODES
+from app.core.eeg_hub import BACKPRESSURE_POLICIES, EEGStreamHub
 from app.core.eeg_processor import EEGProcessor
+from app.core.eeg_sleepedf import load_edf_mne
+from app.core.epoch_features import EpochFeatureBuilder
+from app.core.pacing import parse_speed
+from app.core.recording_cache import RecordingCache
+from app.core.session_artifacts import SessionArtifacts, validate_session_id
+from app.core.session_summary import summarize_session
+from app.api.routes.auth import authenticate_token
+from app.data.db import SessionLocal
+from app.data.repositories.alert_repository import SessionAlertRepository
+from app.data.repositories.result_repository import SessionRepository
+from app.data.repositories.session_summary_repository import SessionSummaryRepository
 
 router = APIRouter(prefix="/eeg", tags=["EEG"])
 processor = EEGProcessor(
@@ -13,17 +30,212 @@ processor = EEGProcessor(
     alpha_max=settings.alpha_max,
     fatigue_ratio_min=settings.fatigue_ratio_min,
     fatigue_ratio_max=settings.fatigue_ratio_max,
+    bands={
+        "delta": (settings.delta_min, settings.delta_max),
+        "theta": (settings.theta_min, settings.theta_max),
+        "alpha": (settings.alpha_min, settings.alpha_max),
+        "beta": (settings.beta_min, settings.beta_max),
+        "gamma": (settings.gamma_min, settings.gamma_max),
+    },
+    default_picks=settings.default_picks,
 )
+dsp_executor = DSPExecutor(
+    thread_workers=settings.dsp_thread_workers,
+    process_workers=settings.dsp_process_workers,
+)
+recording_cache = RecordingCache(
+    max_bytes=settings.edf_cache_max_mb * 1024 * 1024,
+    default_picks=settings.default_picks,
+    # Variantes EDF refusées par le lecteur memory-mappé (ex. EDF+D) : chargement MNE
+    # dans le pool de processus (get_reader tourne déjà dans un thread DSP)
+    fallback=partial(dsp_executor.call_process, load_edf_mne, default_picks=settings.default_picks),
+)
+session_artifacts = SessionArtifacts(settings.session_store_dir)
+
+
+def authorize_stream(token: str | None, session_id: str | None) -> str | None:
+    """
+    Vérifier le jeton du client et, si le flux est rattaché à une session,
+    qu'elle existe dans t_session_mesure et appartient à son organisation.
+    Retourne le motif du refus, None si le flux est autorisé.
+    """
+    db = SessionLocal()
+    try:
+        try:
+            user = authenticate_token(token, db)
+        except HTTPException as e:
+            return e.detail
+        if session_id is None:
+            return None
+        if not session_id.isdigit():
+            return "Session not found"
+        if SessionRepository(db).get_for_organisation(int(session_id), user["organisation_id"]) is None:
+            return "Session not found"
+        return None
+    finally:
+        db.close()
+
+
+def persist_alert_episodes(session_id: str, episodes: list[AlertEpisode]) -> None:
+    """Alertes d'un flux rattaché à une ligne t_session_mesure (id entier)"""
+    if not session_id.isdigit():
+        return
+    db = SessionLocal()
+    try:
+        SessionAlertRepository(db).add_many(int(session_id), episodes)
+    finally:
+        db.close()
+
+
+def persist_session_summary(session_id: str, fatigue: dict | None, quality: dict | None) -> None:
+    """Fin de flux : résumé de la session dans t_session_resume (tendances patient)"""
+    if not session_id.isdigit():
+        return
+    db = SessionLocal()
+    try:
+        SessionSummaryRepository(db).upsert(
+            int(session_id), summarize_session(fatigue, quality, settings.fatigue_threshold), source="stream"
+        )
+    finally:
+        db.close()
+
+
+hub = EEGStreamHub(
+    processor,
+    recording_cache,
+    dsp_executor,
+    chunk_seconds=settings.chunk_seconds,
+    window_seconds=settings.fatigue_window_seconds,
+    score_interval_seconds=settings.fatigue_score_interval_seconds,
+    queue_max_frames=settings.stream_queue_max_frames,
+    max_lag_seconds=settings.stream_max_lag_seconds,
+    channel_weights=settings.fatigue_channel_weights,
+    quality_weighting=settings.fatigue_quality_weighting,
+    filter_params={
+        "highpass_hz": settings.filter_highpass_hz,
+        "lowpass_hz": settings.filter_lowpass_hz,
+        "notch_hz": settings.filter_notch_hz,
+        "notch_q": settings.filter_notch_q,
+        "order": settings.filter_order,
+    } if settings.filter_enabled else None,
+    quality_params={
+        "window_seconds": settings.quality_window_seconds,
+        "line_hz": settings.quality_line_hz,
+        "outlier_z": settings.quality_outlier_z,
+    },
+    artifacts=session_artifacts,
+    flush_seconds=settings.session_flush_seconds,
+    alert_rules=parse_rules(settings.alert_rules),
+    alert_sink=persist_alert_episodes,
+    summary_sink=persist_session_summary,
+    store_params={
+        "block_seconds": settings.sample_store_block_seconds,
+        "dtype": settings.sample_store_dtype,
+        "compression_level": settings.sample_store_compression_level,
+        "pyramid_factor": settings.sample_store_pyramid_factor,
+        "pyramid_levels": settings.sample_store_pyramid_levels,
+    } if settings.sample_store_enabled else None,
+    record_fatigue=settings.fatigue_series_enabled,
+    recorder_params={
+        "queue_max_chunks": settings.recorder_queue_max_chunks,
+        "spill_max_chunks": settings.recorder_spill_max_chunks,
+        "batch_seconds": settings.recorder_batch_seconds,
+        "fsync_seconds": settings.recorder_fsync_seconds,
+    },
+    session_grace_seconds=settings.stream_session_grace_seconds,
+    epoch_builder=EpochFeatureBuilder(
+        processor,
+        epoch_seconds=settings.epoch_seconds,
+        channel_weights=settings.fatigue_channel_weights,
+        quality_weighting=settings.fatigue_quality_weighting,
+        line_hz=settings.quality_line_hz,
+        outlier_z=settings.quality_outlier_z,
+    ) if settings.epoch_features_enabled and settings.sample_store_enabled else None,
+)
+
+
+@router.get("/cache/stats")
+def eeg_cache_stats():
+    """Compteurs du cache d'enregistrements EDF partagé"""
+    return recording_cache.stats()
+
+
+@router.get("/dsp/stats")
+def eeg_dsp_stats():
+    """Profondeur des files des pools DSP (threads / processus)"""
+    return dsp_executor.stats()
+
+
+@router.get("/hub/stats")
+def eeg_hub_stats():
+    """Sources diffusées et état des files par abonné"""
+    return hub.stats()
 
 
 @router.websocket("/stream")
-async def eeg_stream(ws: WebSocket):
-    """WebSocket pour streaming EEG temps réel"""
+async def eeg_stream(
+    ws: WebSocket,
+    fmt: str = Query("json", alias="format"),
+    dtype: str = Query("float32"),
+    backpressure: str = Query(settings.stream_backpressure),
+    speed: str = Query(settings.stream_speed),
+    session_id: str | None = Query(None),
+    token: str | None = Query(None),
+):
+    """
+    WebSocket pour streaming EEG temps réel.
+
+    format=json (défaut) : un EEGStreamPayload JSON par chunk.
+    format=binary : un message EEGStreamMeta puis des frames binaires
+    (voir app.core.eeg_frames), dtype=float32 ou int16.
+    backpressure=drop|merge|decimate : comportement si le client prend du
+    retard (voir app.core.eeg_hub.Subscription).
+    speed=1|10|max : vitesse de relecture (tests de régression / charge).
+    token : jeton d'accès (/auth/login), obligatoire.
+    session_id : id t_session_mesure de l'organisation de l'utilisateur ;
+    rattache le flux à la session (résumés, série, alertes persistés). Une
+    déconnexion ne termine la session qu'après STREAM_SESSION_GRACE_SECONDS
+    sans client : une reconnexion entre-temps reprend le même flux.
+    En mode binaire, les alertes levées / retombées sont envoyées en
+    messages texte {"type": "alert", ...} avant la frame concernée.
+
+    Tous les clients d'une même source partagent un seul producteur (hub) :
+    chaque connexion ne fait qu'envoyer des frames déjà encodées.
+    """
     await ws.accept()
 
-    # Chemin au dataset EDF
-    base = Path(__file__).resolve().parents[2]  # backend/app/
-    psg = base / "data" / "sleep_edf" / "SC4001E0-PSG.edf"
+    if fmt not in ("json", "binary") or dtype not in DTYPE_CODES:
+        await ws.send_json({"error": f"Unsupported stream format: {fmt}/{dtype}"})
+        await ws.close()
+        return
+    if backpressure not in BACKPRESSURE_POLICIES:
+        await ws.send_json({"error": f"Unsupported backpressure policy: {backpressure}"})
+        await ws.close()
+        return
+    try:
+        playback_speed = parse_speed(speed)
+    except ValueError as e:
+        await ws.send_json({"error": str(e)})
+        await ws.close()
+        return
+    if session_id is not None:
+        try:
+            session_id = validate_session_id(session_id)
+        except ValueError as e:
+            await ws.send_json({"error": str(e)})
+            await ws.close()
+            return
+    denied = await run_in_threadpool(authorize_stream, token, session_id)
+    if denied is not None:
+        await ws.send_json({"error": denied})
+        await ws.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    binary = fmt == "binary"
+
+    # Chemin au dataset EDF (relatif : depuis backend/)
+    psg = Path(settings.stream_psg_path)
+    if not psg.is_absolute():
+        psg = Path(__file__).resolve().parents[3] / psg
 
     if not psg.exists():
         await ws.send_json({"error": f"EDF file not found: {psg}"})
@@ -31,7 +243,12 @@ async def eeg_stream(ws: WebSocket):
         return
 
     try:
-        sfreq, channels, data = processor.load_edf(psg)
+        sub = await hub.subscribe(
+            psg,
+            policy=backpressure,
+            speed=playback_speed,
+            session_id=session_id,
+        )
     except Exception as e:
         await ws.send_json({
             "error": f"Failed to load EDF: {type(e).__name__}: {e}"
@@ -39,67 +256,30 @@ async def eeg_stream(ws: WebSocket):
         await ws.close()
         return
 
-    # Ring buffer for fatigue window
-    win_size = int(settings.fatigue_window_seconds * sfreq)
-    n_ch = data.shape[0]
-    import numpy as np
-    buf = np.zeros((n_ch, win_size), dtype=np.float32)
-    w_idx = 0
-    filled = 0
-    t0 = 0.0
-
-    chunk_size = int(round(sfreq * settings.chunk_seconds))
-    n_samples = data.shape[1]
-
     try:
-        for start in range(0, n_samples, chunk_size):
-            end = min(start + chunk_size, n_samples)
-            chunk = data[:, start:end].astype(np.float32)
-
-            n_chunk = chunk.shape[1]
-            if n_chunk == 0:
-                continue
-
-            # Ajouter au ring buffer
-            e = w_idx + n_chunk
-            if e <= win_size:
-                buf[:, w_idx:e] = chunk
-            else:
-                first = win_size - w_idx
-                second = n_chunk - first
-                buf[:, w_idx:win_size] = chunk[:, :first]
-                buf[:, 0:second] = chunk[:, first:first + second]
-            w_idx = (w_idx + n_chunk) % win_size
-            filled = min(win_size, filled + n_chunk)
-
-            # Reconstruire la fenêtre chronologique
-            if filled < win_size:
-                window = buf[:, :filled]
-            else:
-                window = np.concatenate([buf[:, w_idx:], buf[:, :w_idx]], axis=1)
+        if binary:
+            meta = EEGStreamMeta(
+                format=fmt,
+                dtype=dtype,
+                sfreq=sub.producer.sfreq,
+                channels=sub.producer.channels,
+                quality=sub.producer.quality.report.label,
+                chunk_seconds=settings.chunk_seconds,
+                window_seconds=settings.fatigue_window_seconds,
+            )
+            await ws.send_json(meta.model_dump())
 
-            # Calculer score fatigue
-            score = processor.compute_fatigue_score(window, sfreq)
-
-            payload = {
-                "t0": t0,
-                "sfreq": sfreq,
-                "channels": channels,
-                "samples": chunk.tolist(),
-                "fatigue": score,
-                "quality": "Good",
-                "alerts": [],
-                "chunk_seconds": settings.chunk_seconds,
-                "window_seconds": settings.fatigue_window_seconds,
-            }
-
-            await ws.send_json(payload)
-            await asyncio.sleep(settings.chunk_seconds)
-
-            t0 += (end - start) / sfreq
-
-            if end >= n_samples:
+        while True:
+            frame = await sub.next_frame()
+            if frame is None:
                 break
+            if binary:
+                for event in frame.alert_events:
+                    await ws.send_json(event)
+                await ws.send_bytes(frame.encode("binary", dtype))
+            else:
+                await ws.send_text(frame.encode("json"))
+            sub.mark_sent(frame)
 
     except WebSocketDisconnect:
         pass
@@ -110,3 +290,5 @@ async def eeg_stream(ws: WebSocket):
             })
         except Exception:
             pass
+    finally:
+        hub.unsubscribe(sub)
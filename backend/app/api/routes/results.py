@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 
 from app.data.db import get_db
 from app.data.repositories.result_repository import SessionRepository
+from app.data.repositories.session_summary_repository import SessionSummaryRepository
 
 from app.api.schemas.result import (
     SessionCreateRequest,
@@ -85,6 +86,8 @@ def update_result(
     session = repo.update(session_id, **fields)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    # Patient, mode, date ou suppression logique : recopiés dans le résumé (tendances)
+    SessionSummaryRepository(repo.db).sync_session(session)
     return SessionResponse.model_validate(session)
 
 
@@ -94,6 +97,8 @@ def delete_result(
     repo=Depends(get_repo),
 ):
     """Supprimer une session"""
+    # Le résumé part en cascade : ses jours de rollup sont recalculés (même commit)
+    SessionSummaryRepository(repo.db).invalidate_rollups([session_id])
     success = repo.delete(session_id)
     if not success:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -1,14 +1,42 @@
 from pydantic import BaseModel, Field
 
 
+class EEGAlertEvent(BaseModel):
+    """Changement d'état d'une alerte (aussi envoyé seul en mode binaire)"""
+    type: str = Field(default="alert", description="Type de message")
+    rule: str = Field(description="Nom de la règle")
+    state: str = Field(description="raised ou cleared")
+    t: float = Field(description="Instant dans la session (secondes)")
+    value: float = Field(description="Valeur de la métrique au déclenchement")
+    severity: str = Field(description="warning ou critical")
+    message: str = Field(description="Libellé de l'alerte")
+
+
 class EEGStreamPayload(BaseModel):
     """Payload EEG émis via WebSocket"""
     t0: float = Field(description="Timestamp de départ du chunk (secondes)")
     sfreq: float = Field(description="Fréquence d'échantillonnage (Hz)")
     channels: list[str] = Field(description="Noms des canaux EEG")
     samples: list[list[float]] = Field(description="Samples (n_channels x n_samples)")
-    fatigue: int = Field(ge=0, le=100, description="Score fatigue 0-100")
+    fatigue: int = Field(ge=0, le=100, description="Score fatigue 0-100 (fusion pondérée des canaux)")
+    channel_fatigue: list[int] = Field(default_factory=list, description="Score fatigue par canal (ordre de channels)")
+    quality: str = Field(description="Qualité du signal (Good, Fair, Poor, No signal)")
+    quality_score: int = Field(ge=0, le=100, description="Score qualité 0-100 (moyenne des canaux)")
+    channel_quality: list[int] = Field(default_factory=list, description="Score qualité par canal")
+    alerts: list[str] = Field(default_factory=list, description="Alertes actives")
+    alert_events: list[EEGAlertEvent] = Field(default_factory=list, description="Alertes levées / retombées sur ce chunk")
+    stage: str = Field(default="?", description="Stade de sommeil (W, N1, N2, N3, REM, MOVE, ? si inconnu)")
+    chunk_seconds: float = Field(description="Durée du chunk")
+    window_seconds: float = Field(description="Fenêtre glissante pour calcul")
+
+
+class EEGStreamMeta(BaseModel):
+    """Message texte initial en mode binaire (?format=binary), avant les frames"""
+    type: str = Field(default="meta", description="Type de message")
+    format: str = Field(description="Format des frames suivantes (binary)")
+    dtype: str = Field(description="Type des samples (float32 ou int16)")
+    sfreq: float = Field(description="Fréquence d'échantillonnage (Hz)")
+    channels: list[str] = Field(description="Noms des canaux EEG (ordre des lignes)")
     quality: str = Field(description="Qualité du signal")
-    alerts: list[str] = Field(default_factory=list, description="Alertes détectées")
     chunk_seconds: float = Field(description="Durée du chunk")
     window_seconds: float = Field(description="Fenêtre glissante pour calcul")
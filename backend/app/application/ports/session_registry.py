@@ -0,0 +1,8 @@
+from typing import Protocol
+from app.domain.entities.acquisition_session import AcquisitionSession
+
+class SessionRegistry(Protocol):
+    def create(self, session: AcquisitionSession) -> AcquisitionSession: ...
+    def get(self, session_id: str) -> AcquisitionSession | None: ...
+    def stop(self, session_id: str) -> AcquisitionSession | None: ...
+    def evict_expired(self) -> int: ...
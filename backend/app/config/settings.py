@@ -1,6 +1,8 @@
 import os  # Read environment variables.
 from pydantic_settings import BaseSettings  # Settings base class.
 
+from app.core.alert_rules import DEFAULT_ALERT_RULES  # Default stream alert rules.
+
 
 class Settings(BaseSettings):
     """Configuration centralisee de l'application."""
@@ -41,7 +43,51 @@ class Settings(BaseSettings):
     # EEG
     chunk_seconds: float = 0.05  # 50ms chunks.
     fatigue_window_seconds: float = 10.0  # 10s sliding window.
+    fatigue_score_interval_seconds: float = 0.25  # Fatigue scoring rate (independent of chunk rate).
     default_picks: list[str] = ["Fpz-Cz", "Pz-Oz"]  # Default channels.
+    edf_cache_max_mb: int = 512  # Shared EDF recording cache budget (MB).
+    stream_queue_max_frames: int = 40  # Per-subscriber frame queue (oldest dropped when full).
+    stream_backpressure: str = "drop"  # Slow client policy: drop, merge or decimate.
+    stream_max_lag_seconds: float = 0.5  # Lag beyond which a client is considered congested.
+    stream_speed: str = "1"  # Default playback speed: multiplier (1, 10...) or "max".
+    stream_session_grace_seconds: float = 10.0  # A session stream without clients is ended after this delay.
+    stream_psg_path: str = "app/data/sleep_edf/SC4001E0-PSG.edf"  # Recording replayed by /eeg/stream (relative to backend/).
+    dsp_thread_workers: int = 4  # Thread pool for NumPy DSP / memmap reads.
+    dsp_process_workers: int = 2  # Process pool for heavy parsing (MNE).
+    filter_enabled: bool = True  # Streaming IIR preprocessing (notch + band-pass) before plot and score.
+    filter_highpass_hz: float = 0.5  # High-pass cutoff, removes DC drift (0 = off).
+    filter_lowpass_hz: float = 40.0  # Low-pass cutoff (0 = off).
+    filter_notch_hz: float = 50.0  # Mains notch, skipped above Nyquist (0 = off).
+    filter_notch_q: float = 30.0  # Notch quality factor.
+    filter_order: int = 4  # Butterworth order of high/low-pass.
+    quality_window_seconds: float = 2.0  # Sliding window of the signal quality estimator.
+    quality_line_hz: float = 50.0  # Mains frequency tracked for line-noise ratio.
+    quality_outlier_z: float = 6.0  # Amplitude outlier threshold (standard deviations).
+    session_flush_seconds: float = 10.0  # Per-session quality summary / alerts write interval (signal time).
+    session_store_dir: str = "app/data/sessions"  # Per-session artifacts (quality summary...).
+    fatigue_series_enabled: bool = True  # Persist every scored window of session streams.
+    sample_store_enabled: bool = True  # Archive raw samples of session streams.
+    sample_store_block_seconds: float = 10.0  # Duration of one compressed block per channel.
+    sample_store_dtype: str = "int16"  # int16 (scaled, delta-encoded) or float32.
+    sample_store_compression_level: int = 1  # zlib level (1 = fastest).
+    sample_store_pyramid_factor: int = 8  # Samples per bucket ratio between min/max/mean pyramid levels.
+    sample_store_pyramid_levels: int = 6  # Pyramid levels (coarsest bucket = factor ** levels samples).
+    recorder_queue_max_chunks: int = 256  # Bounded queue between stream producer and writer thread.
+    recorder_spill_max_chunks: int = 4096  # In-memory overflow when the queue is full, then chunks are dropped (counted).
+    recorder_batch_seconds: float = 1.0  # Chunks are grouped into writes of this much signal (or wait).
+    recorder_fsync_seconds: float = 5.0  # fsync interval of session files (wall clock).
+    epoch_features_enabled: bool = True  # Per-epoch feature table built at session stop and ingest.
+    epoch_seconds: float = 30.0  # Epoch length of the feature table (hypnogram scoring epoch).
+    ingest_workers: int = 0  # Worker processes of `python -m app.ingest` (0 = CPU count).
+    ingest_batch_size: int = 32  # Recordings per batched t_session_mesure INSERT.
+    rollup_job_enabled: bool = True  # Background refresh of organisation daily rollups (t_rollup_jour).
+    rollup_refresh_seconds: float = 60.0  # Delay between two rollup refresh passes.
+    rollup_batch_days: int = 200  # Invalidated days recomputed per transaction.
+    alert_rules: list[dict] = DEFAULT_ALERT_RULES  # Declarative stream alert rules (JSON list in env).
+    acquisition_registry_backend: str = "sqlite"  # memory (single process, tests) or sqlite (shared by workers).
+    acquisition_registry_path: str = "app/data/acquisition_sessions.sqlite3"  # SQLite registry file.
+    acquisition_session_ttl_seconds: float = 3600.0  # Stopped sessions are evicted after this delay.
+    acquisition_stop_timeout_seconds: float = 30.0  # /acquisition/stop waits this long for the stream to be finalised.
     
     # EEG Fatigue Scoring
     theta_min: float = 4.0  # Theta band min.
@@ -50,6 +96,17 @@ class Settings(BaseSettings):
     alpha_max: float = 12.0  # Alpha band max.
     fatigue_ratio_min: float = 0.5  # Min fatigue ratio.
     fatigue_ratio_max: float = 3.0  # Max fatigue ratio.
+    fatigue_channel_weights: dict[str, float] = {}  # Static per-channel fusion weights (missing = 1.0).
+    fatigue_quality_weighting: bool = True  # Down-weight channels with abnormal variance (artifacts).
+    fatigue_threshold: float = 70.0  # Critical score for "time above threshold" session aggregates.
+
+    # EEG Spectral features (theta / alpha above)
+    delta_min: float = 0.5  # Delta band min.
+    delta_max: float = 4.0  # Delta band max.
+    beta_min: float = 12.0  # Beta band min.
+    beta_max: float = 30.0  # Beta band max.
+    gamma_min: float = 30.0  # Gamma band min.
+    gamma_max: float = 45.0  # Gamma band max.
     
     class Config:
         env_file = ".env"  # Load env vars from .env if present.
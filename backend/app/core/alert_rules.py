@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+
+_OPS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+DEFAULT_ALERT_RULES = [
+    {
+        "name": "fatigue_high",
+        "metric": "fatigue",
+        "op": ">=",
+        "threshold": 70,
+        "clear_threshold": 60,
+        "for_seconds": 10.0,
+        "clear_seconds": 5.0,
+        "severity": "warning",
+        "message": "Fatigue élevée (seuil 70)",
+    },
+    {
+        "name": "quality_low",
+        "metric": "quality_score",
+        "op": "<",
+        "threshold": 50,
+        "clear_threshold": 60,
+        "for_seconds": 5.0,
+        "clear_seconds": 5.0,
+        "severity": "warning",
+        "message": "Qualité du signal dégradée",
+    },
+    {
+        "name": "signal_lost",
+        "metric": "signal_lost",
+        "op": ">=",
+        "threshold": 1,
+        "for_seconds": 2.0,
+        "clear_seconds": 1.0,
+        "severity": "critical",
+        "message": "Perte du signal EEG",
+    },
+]
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """
+    Règle déclarative : metric op threshold, maintenue for_seconds.
+
+    Hystérésis : une fois levée, l'alerte ne retombe que quand la métrique
+    repasse de l'autre côté de clear_threshold (threshold par défaut)
+    pendant clear_seconds.
+    """
+    name: str
+    metric: str
+    op: str
+    threshold: float
+    clear_threshold: float | None = None
+    for_seconds: float = 0.0
+    clear_seconds: float = 0.0
+    severity: str = "warning"
+    message: str = ""
+
+    def __post_init__(self):
+        if self.op not in _OPS:
+            raise ValueError(f"Unsupported alert operator: {self.op}")
+        if self.for_seconds < 0 or self.clear_seconds < 0:
+            raise ValueError(f"Negative debounce in alert rule: {self.name}")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> AlertRule:
+        return cls(**data)
+
+    def triggered(self, value: float) -> bool:
+        return _OPS[self.op](value, self.threshold)
+
+    def cleared(self, value: float) -> bool:
+        limit = self.threshold if self.clear_threshold is None else self.clear_threshold
+        # Condition inverse de la règle, appliquée au seuil de retombée
+        return not _OPS[self.op](value, limit)
+
+
+def parse_rules(rules: list[dict]) -> list[AlertRule]:
+    parsed = [AlertRule.from_dict(r) for r in rules]
+    names = [r.name for r in parsed]
+    if len(names) != len(set(names)):
+        raise ValueError("Alert rule names must be unique")
+    return parsed
+
+
+@dataclass
+class AlertEvent:
+    """Changement d'état d'une alerte (levée ou retombée), en temps signal"""
+    rule: str
+    state: str  # raised / cleared
+    t: float
+    value: float
+    severity: str
+    message: str
+
+    def to_dict(self) -> dict:
+        return {
+            "type": "alert",
+            "rule": self.rule,
+            "state": self.state,
+            "t": self.t,
+            "value": self.value,
+            "severity": self.severity,
+            "message": self.message,
+        }
+
+
+@dataclass
+class AlertEpisode:
+    """Alerte complète (levée -> retombée) telle que persistée"""
+    rule: str
+    severity: str
+    message: str
+    raised_at: float
+    cleared_at: float | None = None
+    peak_value: float | None = None
+
+
+@dataclass
+class _RuleState:
+    active: bool = False
+    pending_since: float | None = None  # début de la condition en attente (anti-rebond)
+    episode: AlertEpisode | None = None
+    raised_count: int = 0
+
+
+class AlertEngine:
+    """
+    Évaluation des règles à chaque fenêtre scorée, état par session.
+
+    Mémoire constante par flux : un état par règle, quelle que soit la durée.
+    Les épisodes terminés sont accumulés jusqu'à drain_episodes().
+    """
+
+    def __init__(self, rules: list[AlertRule]):
+        self.rules = list(rules)
+        self._states = {rule.name: _RuleState() for rule in self.rules}
+        self._closed: list[AlertEpisode] = []
+
+    def evaluate(self, t: float, metrics: dict[str, float]) -> list[AlertEvent]:
+        """Mettre à jour l'état des règles au temps t (s) et retourner les transitions"""
+        events = []
+        for rule in self.rules:
+            value = metrics.get(rule.metric)
+            if value is None:
+                continue
+            state = self._states[rule.name]
+
+            if state.active:
+                episode = state.episode
+                if rule.triggered(value) and (episode.peak_value is None or self._worse(rule, value, episode.peak_value)):
+                    episode.peak_value = float(value)
+                waiting = rule.cleared(value)
+                hold = rule.clear_seconds
+            else:
+                waiting = rule.triggered(value)
+                hold = rule.for_seconds
+
+            if not waiting:
+                state.pending_since = None
+                continue
+            if state.pending_since is None:
+                state.pending_since = t
+            if t - state.pending_since < hold:
+                continue
+
+            state.pending_since = None
+            if state.active:
+                state.active = False
+                state.episode.cleared_at = t
+                self._closed.append(state.episode)
+                state.episode = None
+                events.append(self._event(rule, "cleared", t, value))
+            else:
+                state.active = True
+                state.raised_count += 1
+                state.episode = AlertEpisode(
+                    rule=rule.name,
+                    severity=rule.severity,
+                    message=rule.message,
+                    raised_at=t,
+                    peak_value=float(value),
+                )
+                events.append(self._event(rule, "raised", t, value))
+        return events
+
+    @property
+    def active(self) -> list[AlertRule]:
+        return [rule for rule in self.rules if self._states[rule.name].active]
+
+    def active_messages(self) -> list[str]:
+        return [rule.message or rule.name for rule in self.active]
+
+    def counts(self) -> dict[str, int]:
+        """Nombre de levées par règle depuis le début de la session"""
+        return {name: state.raised_count for name, state in self._states.items()}
+
+    def drain_episodes(self, include_open: bool = False) -> list[AlertEpisode]:
+        """Épisodes terminés depuis le dernier appel (+ ceux en cours si include_open)"""
+        episodes, self._closed = self._closed, []
+        if include_open:
+            episodes += [
+                state.episode for state in self._states.values()
+                if state.active and state.episode is not None
+            ]
+        return episodes
+
+    @staticmethod
+    def _worse(rule: AlertRule, value: float, peak: float) -> bool:
+        return value > peak if rule.op in (">", ">=") else value < peak
+
+    @staticmethod
+    def _event(rule: AlertRule, state: str, t: float, value: float) -> AlertEvent:
+        return AlertEvent(
+            rule=rule.name,
+            state=state,
+            t=t,
+            value=float(value),
+            severity=rule.severity,
+            message=rule.message,
+        )
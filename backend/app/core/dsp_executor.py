@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class _PoolCounters:
+    """Compteurs de file d'un pool (soumis / démarrés / terminés)"""
+
+    def __init__(self, workers: int, track_start: bool = True):
+        self.workers = workers
+        self.track_start = track_start
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def on_submit(self) -> None:
+        with self._lock:
+            self.submitted += 1
+
+    def on_start(self) -> None:
+        with self._lock:
+            self.started += 1
+
+    def on_done(self, ok: bool) -> None:
+        with self._lock:
+            self.completed += 1
+            if not ok:
+                self.failed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            if self.track_start:
+                queued = self.submitted - self.started
+                running = self.started - self.completed
+            else:
+                # Démarrage non observable (autre processus) : estimation
+                in_flight = self.submitted - self.completed
+                running = min(in_flight, self.workers)
+                queued = in_flight - running
+            return {
+                "workers": self.workers,
+                "queued": queued,
+                "running": running,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+
+def _call_tracked(counters: _PoolCounters, fn: Callable, *args, **kwargs):
+    counters.on_start()
+    return fn(*args, **kwargs)
+
+
+class DSPExecutor:
+    """
+    Exécution du traitement EEG hors de la boucle asyncio.
+
+    - run() : pool de threads, pour le NumPy / la lecture memmap (libère le
+      GIL) : chunks du flux EEG et lectures lourdes des routes analytics
+    - call_process() : pool de processus, pour le parsing lourd (chargement
+      MNE des EDF refusés par EDFReader) depuis un thread DSP, créé à la
+      première utilisation. fn doit être picklable.
+    """
+
+    def __init__(self, thread_workers: int = 4, process_workers: int = 2):
+        self._threads = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="dsp")
+        self._thread_counters = _PoolCounters(thread_workers)
+        self._process_workers = process_workers
+        self._processes: ProcessPoolExecutor | None = None
+        self._process_counters = _PoolCounters(process_workers, track_start=False)
+        self._process_lock = threading.Lock()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Exécuter fn dans le pool de threads"""
+        counters = self._thread_counters
+        call = functools.partial(_call_tracked, counters, fn, *args, **kwargs)
+        return await self._submit(self._threads, counters, call)
+
+    def call_process(self, fn: Callable, *args, **kwargs) -> Any:
+        """Exécuter fn dans le pool de processus et attendre le résultat (depuis un thread, pas la boucle)"""
+        counters = self._process_counters
+        counters.on_submit()
+        ok = False
+        try:
+            result = self._get_processes().submit(fn, *args, **kwargs).result()
+            ok = True
+            return result
+        finally:
+            counters.on_done(ok)
+
+    async def _submit(self, pool: Executor, counters: _PoolCounters, call: Callable) -> Any:
+        counters.on_submit()
+        loop = asyncio.get_running_loop()
+        ok = False
+        try:
+            result = await loop.run_in_executor(pool, call)
+            ok = True
+            return result
+        finally:
+            counters.on_done(ok)
+
+    def _get_processes(self) -> ProcessPoolExecutor:
+        with self._process_lock:
+            if self._processes is None:
+                # spawn : pas de fork d'un process qui contient déjà des threads
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self._process_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._processes
+
+    def stats(self) -> dict:
+        return {
+            "threads": self._thread_counters.snapshot(),
+            "processes": self._process_counters.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
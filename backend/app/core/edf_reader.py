@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+# Facteurs vers le volt, comme MNE (les données sont retournées en V)
+_UNIT_SCALE = {"uv": 1e-6, "µv": 1e-6, "mv": 1e-3, "v": 1.0}
+
+
+class EDFFormatError(ValueError):
+    """Fichier EDF non supporté par le lecteur memory-mappé"""
+
+
+def resolve_picks(labels: list[str], picks: list[str] | None, default_picks: Sequence[str] = ()) -> list[str]:
+    """Canaux demandés, sinon ceux de default_picks présents, sinon les 2 premiers (hors annotations)"""
+    if picks is not None:
+        return list(picks)
+    chosen = [ch for ch in default_picks if ch in labels]
+    return chosen or [lab for lab in labels if lab != "EDF Annotations"][:2]
+
+
+@dataclass(frozen=True)
+class EDFSignal:
+    label: str
+    unit: str
+    samples_per_record: int
+    offset: int  # position (en samples) du signal dans un data record
+    gain: float
+    bias: float
+    physical_min: float = -np.inf  # plage physique (V), saturation de l'ampli
+    physical_max: float = np.inf
+
+
+class EDFReader:
+    """
+    Lecteur EDF/EDF+C paresseux basé sur np.memmap.
+
+    Seul l'en-tête est parsé à l'ouverture. Les data records restent sur
+    disque et seuls les canaux / samples demandés sont décodés en float32.
+    Sans picks : canaux de default_picks (settings côté appelant) présents dans le fichier.
+    """
+
+    def __init__(self, path: Path, picks: list[str] | None = None, default_picks: Sequence[str] = ()):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            head = f.read(256)
+            if len(head) < 256:
+                raise EDFFormatError(f"Truncated EDF header: {self.path}")
+            n_signals = int(head[252:256])
+            sig_head = f.read(256 * n_signals)
+
+        reserved = head[192:236].decode("ascii", "ignore").strip()
+        if reserved.startswith("EDF+D"):
+            raise EDFFormatError("Discontinuous EDF+D files are not supported")
+
+        self.header_bytes = int(head[184:192])
+        self.start_time = self._parse_start_time(head)
+        self.record_duration = float(head[244:252])
+        self.signals = self._parse_signals(sig_head, n_signals)
+
+        record_len = sum(s.samples_per_record for s in self.signals)
+        data_bytes = self.path.stat().st_size - self.header_bytes
+        n_records = int(head[236:244])
+        if n_records < 0:
+            n_records = data_bytes // (2 * record_len)
+        n_records = min(n_records, data_bytes // (2 * record_len))
+        self.n_records = n_records
+
+        self._records = np.memmap(
+            self.path,
+            dtype="<i2",
+            mode="r",
+            offset=self.header_bytes,
+            shape=(n_records, record_len),
+        )
+
+        labels = [s.label for s in self.signals]
+        picks = resolve_picks(labels, picks, default_picks)
+        missing = [ch for ch in picks if ch not in labels]
+        if missing:
+            raise EDFFormatError(f"Channels not found in EDF: {missing}")
+
+        self._picked = [self.signals[labels.index(ch)] for ch in picks]
+        spr = {s.samples_per_record for s in self._picked}
+        if len(spr) != 1:
+            raise EDFFormatError("Picked channels must share the same sampling rate")
+
+        self.channels = list(picks)
+        self._spr = spr.pop()
+        self.sfreq = self._spr / self.record_duration
+        self.n_samples = self.n_records * self._spr
+
+    @staticmethod
+    def _parse_start_time(head: bytes) -> datetime | None:
+        """dd.mm.yy hh.mm.ss (années 85-99 -> 19xx, sinon 20xx) ; None si illisible"""
+        try:
+            day, month, year = (int(v) for v in head[168:176].decode("ascii").split("."))
+            hour, minute, second = (int(v) for v in head[176:184].decode("ascii").split("."))
+            year += 1900 if year >= 85 else 2000
+            return datetime(year, month, day, hour, minute, second)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_signals(raw: bytes, n: int) -> list[EDFSignal]:
+        pos = 0
+
+        def field(width: int) -> list[str]:
+            nonlocal pos
+            out = [
+                raw[pos + i * width: pos + (i + 1) * width].decode("latin-1").strip()
+                for i in range(n)
+            ]
+            pos += width * n
+            return out
+
+        labels = field(16)
+        field(80)  # transducer
+        units = field(8)
+        phys_min = [float(v) for v in field(8)]
+        phys_max = [float(v) for v in field(8)]
+        dig_min = [float(v) for v in field(8)]
+        dig_max = [float(v) for v in field(8)]
+        field(80)  # prefiltering
+        spr = [int(v) for v in field(8)]
+
+        signals = []
+        offset = 0
+        for i in range(n):
+            span = dig_max[i] - dig_min[i] or 1.0
+            gain = (phys_max[i] - phys_min[i]) / span
+            bias = phys_min[i] - gain * dig_min[i]
+            scale = _UNIT_SCALE.get(units[i].lower(), 1.0)
+            signals.append(EDFSignal(
+                label=labels[i],
+                unit=units[i],
+                samples_per_record=spr[i],
+                offset=offset,
+                gain=gain * scale,
+                bias=bias * scale,
+                physical_min=min(phys_min[i], phys_max[i]) * scale,
+                physical_max=max(phys_min[i], phys_max[i]) * scale,
+            ))
+            offset += spr[i]
+        return signals
+
+    @property
+    def nbytes(self) -> int:
+        """Mémoire résidente propre au lecteur (les records restent mappés)"""
+        return self.header_bytes
+
+    @property
+    def physical_range(self) -> tuple[np.ndarray, np.ndarray]:
+        """Bornes physiques (min, max) des canaux choisis, en volts"""
+        low = np.array([s.physical_min for s in self._picked], dtype=np.float64)
+        high = np.array([s.physical_max for s in self._picked], dtype=np.float64)
+        return low, high
+
+    @property
+    def duration(self) -> float:
+        return self.n_samples / self.sfreq
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """Décoder les samples [start, stop) des canaux choisis -> (n_channels, n) float32"""
+        start = max(0, int(start))
+        stop = min(self.n_samples, int(stop))
+        if stop <= start:
+            return np.zeros((len(self._picked), 0), dtype=np.float32)
+
+        spr = self._spr
+        r0 = start // spr
+        r1 = -(-stop // spr)
+        lo = start - r0 * spr
+        hi = lo + (stop - start)
+
+        out = np.empty((len(self._picked), stop - start), dtype=np.float32)
+        block = self._records[r0:r1]
+        for i, sig in enumerate(self._picked):
+            raw = block[:, sig.offset:sig.offset + spr].reshape(-1)[lo:hi]
+            np.multiply(raw, sig.gain, out=out[i], casting="unsafe")
+            out[i] += sig.bias
+        return out
+
+    def read_seconds(self, t_start: float, t_stop: float) -> np.ndarray:
+        return self.read(int(round(t_start * self.sfreq)), int(round(t_stop * self.sfreq)))
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal
+
+
+@lru_cache(maxsize=32)
+def design_sos(
+    sfreq: float,
+    highpass_hz: float = 0.5,
+    lowpass_hz: float = 40.0,
+    notch_hz: float = 50.0,
+    notch_q: float = 30.0,
+    order: int = 4,
+) -> np.ndarray:
+    """
+    Cascade SOS (notch + passe-haut + passe-bas), mise en cache par paramètres.
+    Une fréquence à 0 désactive le filtre ; un filtre au-delà de Nyquist est ignoré
+    (ex. notch 50 Hz à 100 Hz d'échantillonnage).
+    """
+    nyquist = sfreq / 2.0
+    sections = []
+
+    if 0 < notch_hz < nyquist:
+        b, a = signal.iirnotch(notch_hz, notch_q, fs=sfreq)
+        sections.append(signal.tf2sos(b, a))
+    if 0 < highpass_hz < nyquist:
+        sections.append(signal.butter(order, highpass_hz, btype="highpass", fs=sfreq, output="sos"))
+    if 0 < lowpass_hz < nyquist:
+        sections.append(signal.butter(order, lowpass_hz, btype="lowpass", fs=sfreq, output="sos"))
+
+    sos = np.concatenate(sections) if sections else np.zeros((0, 6))
+    # Partagé entre tous les flux de même fréquence : lecture seule
+    sos.setflags(write=False)
+    return sos
+
+
+class StreamingFilterBank:
+    """
+    Filtrage IIR en flux, chunk par chunk, sans refiltrer l'historique.
+
+    Tous les canaux passent dans un seul appel sosfilt (axe des samples),
+    l'état des sections (zi) est conservé d'un chunk à l'autre : la sortie
+    est identique au filtrage de l'enregistrement complet en une fois.
+    L'état est initialisé sur le premier sample (régime établi, pas de
+    transitoire sur l'offset DC).
+    """
+
+    def __init__(self, sos: np.ndarray):
+        # Copie propre à chaque flux : sosfilt exige un tableau inscriptible
+        self.sos = np.array(sos, dtype=np.float64)
+        self._zi: np.ndarray | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sos.shape[0] > 0
+
+    def process(self, chunk_2d: np.ndarray) -> np.ndarray:
+        """Filtrer un chunk (n_channels, n_samples) en place et le retourner"""
+        if not self.enabled or chunk_2d.shape[-1] == 0:
+            return chunk_2d
+
+        if self._zi is None or self._zi.shape[1] != chunk_2d.shape[0]:
+            # (n_sections, n_channels, 2), mis à l'échelle du premier sample
+            zi = signal.sosfilt_zi(self.sos)
+            self._zi = zi[:, np.newaxis, :] * chunk_2d[np.newaxis, :, 0, np.newaxis].astype(np.float64)
+
+        filtered, self._zi = signal.sosfilt(self.sos, chunk_2d, axis=-1, zi=self._zi)
+        chunk_2d[...] = filtered
+        return chunk_2d
+
+    def reset(self) -> None:
+        self._zi = None
@@ -0,0 +1,87 @@
+"""
+Format binaire des frames EEG envoyées sur /eeg/stream (?format=binary).
+
+En-tête little-endian de 32 octets, suivi du bloc de samples
+(n_channels x n_samples, ordre C, canal par canal) :
+
+    offset  type     champ
+    0       4s       magic  b"NEEG"
+    4       uint8    version (1)
+    5       uint8    dtype  (0 = float32, 1 = int16 * scale)
+    6       uint16   n_channels
+    8       uint32   n_samples
+    12      float64  t0 (s)
+    20      float32  sfreq (Hz)
+    24      float32  scale (int16 -> valeur physique, 1.0 en float32)
+    28      int16    fatigue (0-100)
+    30      uint8    stade de sommeil (index dans app.core.hypnogram.STAGES, 0 = inconnu)
+    31      1x       réservé
+"""
+from __future__ import annotations
+
+import struct
+
+import numpy as np
+
+FRAME_MAGIC = b"NEEG"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<4sBBHIdffhBx")
+
+DTYPE_CODES = {"float32": 0, "int16": 1}
+_NP_DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<i2")}
+
+
+def encode_frame(
+    chunk: np.ndarray,
+    t0: float,
+    sfreq: float,
+    fatigue: int,
+    dtype: str = "float32",
+    stage: int = 0,
+) -> bytes:
+    """Encoder un chunk (n_channels, n_samples) en frame binaire"""
+    code = DTYPE_CODES[dtype]
+    n_channels, n_samples = chunk.shape
+
+    if code == 0:
+        block = np.ascontiguousarray(chunk, dtype="<f4")
+        scale = 1.0
+    else:
+        peak = float(np.max(np.abs(chunk))) if chunk.size else 0.0
+        scale = peak / 32767.0 if peak > 0 else 1.0
+        block = np.round(chunk / scale).astype("<i2")
+
+    header = FRAME_HEADER.pack(
+        FRAME_MAGIC, FRAME_VERSION, code, n_channels, n_samples,
+        float(t0), float(sfreq), scale, int(fatigue), int(stage),
+    )
+    return header + block.tobytes()
+
+
+def decode_frame(buf: bytes) -> tuple[dict, np.ndarray]:
+    """Décoder une frame binaire -> (en-tête, samples float32 (n_channels, n_samples))"""
+    magic, version, code, n_channels, n_samples, t0, sfreq, scale, fatigue, stage = (
+        FRAME_HEADER.unpack_from(buf)
+    )
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise ValueError("Not a NeuralES EEG frame")
+
+    raw = np.frombuffer(
+        buf,
+        dtype=_NP_DTYPES[code],
+        count=n_channels * n_samples,
+        offset=FRAME_HEADER.size,
+    ).reshape(n_channels, n_samples)
+    samples = raw if code == 0 else raw.astype(np.float32) * np.float32(scale)
+
+    header = {
+        "t0": t0,
+        "sfreq": sfreq,
+        "n_channels": n_channels,
+        "n_samples": n_samples,
+        "dtype": "float32" if code == 0 else "int16",
+        "scale": scale,
+        "fatigue": fatigue,
+        "stage": stage,
+    }
+    return header, samples
@@ -0,0 +1,797 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from app.core.alert_rules import AlertEngine, AlertEpisode, AlertRule
+from app.core.dsp_executor import DSPExecutor
+from app.core.eeg_filters import StreamingFilterBank, design_sos
+from app.core.eeg_frames import encode_frame
+from app.core.eeg_processor import EEGProcessor
+from app.core.epoch_features import EpochFeatureBuilder, write_epoch_table
+from app.core.fatigue_series import FatigueSeriesWriter, FatigueSummary
+from app.core.hypnogram import STAGE_CODES, HypnogramIndex, load_hypnogram_for
+from app.core.live_slot import LiveSlotWriter
+from app.core.pacing import PlaybackClock
+from app.core.recorder import SessionRecorder
+from app.core.recording_cache import RecordingCache
+from app.core.sample_store import SampleStoreReader, SampleStoreWriter
+from app.core.session_artifacts import SessionArtifacts
+from app.core.signal_quality import QualitySummary, SignalQualityEstimator
+from app.core.streaming_fatigue import StreamingFatigueScorer
+
+
+@dataclass
+class EEGFrame:
+    """Chunk EEG produit une seule fois et partagé entre tous les abonnés"""
+    t0: float
+    sfreq: float
+    channels: list[str]
+    samples: np.ndarray  # (n_channels, n_samples) float32, lecture seule
+    fatigue: int
+    quality: str
+    alerts: list[str]
+    chunk_seconds: float
+    window_seconds: float
+    produced_at: float = 0.0  # time.monotonic() à la production
+    channel_fatigue: list[int] = field(default_factory=list)  # score par canal (ordre de channels)
+    quality_score: int = 100
+    channel_quality: list[int] = field(default_factory=list)  # score qualité par canal
+    alert_events: list[dict] = field(default_factory=list)  # alertes levées / retombées sur ce chunk
+    stage: str = "?"  # stade de sommeil au milieu du chunk (hypnogramme), "?" si inconnu
+    _encoded: dict = field(default_factory=dict, repr=False)
+
+    def to_payload(self) -> dict:
+        return {
+            "t0": self.t0,
+            "sfreq": self.sfreq,
+            "channels": self.channels,
+            "samples": self.samples.tolist(),
+            "fatigue": self.fatigue,
+            "channel_fatigue": self.channel_fatigue,
+            "quality": self.quality,
+            "quality_score": self.quality_score,
+            "channel_quality": self.channel_quality,
+            "alerts": self.alerts,
+            "alert_events": self.alert_events,
+            "stage": self.stage,
+            "chunk_seconds": self.chunk_seconds,
+            "window_seconds": self.window_seconds,
+        }
+
+    def encode(self, fmt: str, dtype: str = "float32") -> str | bytes:
+        """Encodage mis en cache : calculé une fois par format, quel que soit N abonnés"""
+        key = (fmt, dtype if fmt == "binary" else None)
+        data = self._encoded.get(key)
+        if data is None:
+            if fmt == "binary":
+                data = encode_frame(
+                    self.samples, self.t0, self.sfreq, self.fatigue, dtype, STAGE_CODES[self.stage]
+                )
+            else:
+                # Même sérialisation que WebSocket.send_json
+                data = json.dumps(self.to_payload(), separators=(",", ":"), ensure_ascii=False)
+            self._encoded[key] = data
+        return data
+
+
+def _decimate(samples: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Un sample par bloc de factor samples : moyenne du bloc (passe-bas, comme
+    la pyramide du sample store) plutôt qu'un pas simple qui replierait
+    le bruit haute fréquence dans la bande affichée.
+    """
+    n_ch, n = samples.shape
+    full = n - n % factor
+    out = samples[:, :full].reshape(n_ch, -1, factor).mean(axis=2, dtype=np.float64)
+    if full < n:
+        # Bloc incomplet en fin de fusion (dernière frame plus courte)
+        out = np.concatenate([out, samples[:, full:].mean(axis=1, keepdims=True, dtype=np.float64)], axis=1)
+    return out.astype(samples.dtype, copy=False)
+
+
+def merge_frames(frames: list[EEGFrame], decimate: int = 1) -> EEGFrame:
+    """Fusionner des frames consécutives en une seule, éventuellement décimée"""
+    first, last = frames[0], frames[-1]
+    samples = np.concatenate([f.samples for f in frames], axis=1)
+    if decimate > 1:
+        samples = _decimate(samples, decimate)
+    alerts = list(dict.fromkeys(a for f in frames for a in f.alerts))
+    return replace(
+        last,
+        t0=first.t0,
+        sfreq=first.sfreq / decimate,
+        samples=samples,
+        alerts=alerts,
+        alert_events=[e for f in frames for e in f.alert_events],
+        produced_at=first.produced_at,
+        _encoded={},
+    )
+
+
+BACKPRESSURE_POLICIES = ("drop", "merge", "decimate")
+
+
+class Subscription:
+    """
+    Abonné à une source, avec file bornée et politique de backpressure.
+
+    - drop : les frames en retard de plus de max_lag_seconds sont jetées
+    - merge : tout le retard est envoyé en une seule frame plus grosse
+    - decimate : en retard, le retard est fusionné puis décimé pour garder
+      une taille de frame constante (résolution réduite pour ce client)
+    """
+
+    def __init__(
+        self,
+        producer: SourceProducer,
+        max_frames: int,
+        policy: str = "drop",
+        max_lag_seconds: float = 0.5,
+    ):
+        self.producer = producer
+        self.max_frames = max_frames
+        self.policy = policy
+        self.max_lag_seconds = max_lag_seconds
+        self.queue: asyncio.Queue[EEGFrame | None] = asyncio.Queue(maxsize=max_frames)
+        self._pending: deque[EEGFrame] = deque()
+        self._carried_events: list[dict] = []  # alertes des frames jetées, jamais perdues
+        self._ended = False
+        self.sent = 0
+        self.dropped = 0
+        self.merged = 0
+        self.decimated = 0
+        self.lag_seconds = 0.0
+        self.max_lag_seen = 0.0
+
+    def offer(self, frame: EEGFrame | None) -> None:
+        # Jamais bloquant : un client lent ne freine pas le producteur
+        while self.queue.full():
+            self._discard(self.queue.get_nowait())
+        self.queue.put_nowait(frame)
+
+    async def next_frame(self) -> EEGFrame | None:
+        """Prochaine frame à envoyer selon la politique, None en fin de flux"""
+        if not self._pending and not self._ended:
+            self._take(await self.queue.get())
+        while not self.queue.empty():
+            self._take(self.queue.get_nowait())
+        while len(self._pending) > self.max_frames:
+            self._discard(self._pending.popleft())
+
+        if not self._pending:
+            return None
+
+        now = time.monotonic()
+        lagging = now - self._pending[0].produced_at > self.max_lag_seconds
+
+        if self.policy == "drop":
+            while len(self._pending) > 1 and now - self._pending[0].produced_at > self.max_lag_seconds:
+                self._discard(self._pending.popleft())
+            return self._with_carried(self._pending.popleft())
+
+        frames = list(self._pending)
+        self._pending.clear()
+        if len(frames) == 1:
+            return self._with_carried(frames[0])
+        if self.policy == "decimate" and lagging:
+            self.decimated += 1
+            return self._with_carried(merge_frames(frames, decimate=len(frames)))
+        self.merged += len(frames) - 1
+        return self._with_carried(merge_frames(frames))
+
+    def mark_sent(self, frame: EEGFrame) -> None:
+        self.sent += 1
+        self.lag_seconds = time.monotonic() - frame.produced_at
+        self.max_lag_seen = max(self.max_lag_seen, self.lag_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "decimated": self.decimated,
+            "queued": self.queue.qsize() + len(self._pending),
+            "lag_seconds": round(self.lag_seconds, 4),
+            "max_lag_seconds": round(self.max_lag_seen, 4),
+        }
+
+    def _discard(self, frame: EEGFrame | None) -> None:
+        if frame is None:
+            self._ended = True
+            return
+        self.dropped += 1
+        self._carried_events.extend(frame.alert_events)
+
+    def _with_carried(self, frame: EEGFrame) -> EEGFrame:
+        """Rattacher à la frame envoyée les alertes des frames jetées"""
+        if not self._carried_events:
+            return frame
+        events, self._carried_events = self._carried_events, []
+        return replace(frame, alert_events=events + frame.alert_events, _encoded={})
+
+    def _take(self, frame: EEGFrame | None) -> None:
+        if frame is None:
+            self._ended = True
+        else:
+            self._pending.append(frame)
+
+
+# Intervalle de relecture d'une demande d'arrêt venue d'un autre worker
+STOP_POLL_SECONDS = 0.25
+
+
+class SourceProducer:
+    """
+    Une tâche par source : lecture, scoring et pacing faits une seule fois.
+    La lecture et le DSP tournent dans le DSPExecutor, pas dans la boucle.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        psg: Path,
+        processor: EEGProcessor,
+        cache: RecordingCache,
+        executor: DSPExecutor,
+        chunk_seconds: float,
+        window_seconds: float,
+        score_interval_seconds: float,
+        speed: float = 1.0,
+        channel_weights: dict[str, float] | None = None,
+        quality_weighting: bool = True,
+        filter_params: dict | None = None,
+        quality_params: dict | None = None,
+        session_id: str | None = None,
+        artifacts: SessionArtifacts | None = None,
+        flush_seconds: float = 10.0,
+        alert_rules: list[AlertRule] | None = None,
+        alert_sink: Callable[[str, list[AlertEpisode]], None] | None = None,
+        summary_sink: Callable[[str, dict | None, dict | None], None] | None = None,
+        store_params: dict | None = None,
+        record_fatigue: bool = True,
+        recorder_params: dict | None = None,
+        epoch_builder: EpochFeatureBuilder | None = None,
+    ):
+        self.key = key
+        self.psg = psg
+        self.processor = processor
+        self.cache = cache
+        self.executor = executor
+        self.chunk_seconds = chunk_seconds
+        self.window_seconds = window_seconds
+        self.score_interval_seconds = score_interval_seconds
+        self.channel_weights = channel_weights or {}
+        self.quality_weighting = quality_weighting
+        self.filter_params = filter_params
+        self.quality_params = quality_params or {}
+        self.session_id = session_id
+        self.artifacts = artifacts
+        self.flush_seconds = flush_seconds
+        self.alert_rules = alert_rules or []
+        self.alert_sink = alert_sink
+        self.summary_sink = summary_sink
+        self.store_params = store_params
+        self.record_fatigue = record_fatigue
+        self.recorder_params = recorder_params or {}
+        self.epoch_builder = epoch_builder
+        self.epoch_table_errors = 0
+        self.clock = PlaybackClock(chunk_seconds, speed)
+        self.subscribers: set[Subscription] = set()
+        self.frames = 0
+        self.schedule_lag = 0.0
+        self.opening: asyncio.Future | None = None
+        self.task: asyncio.Task | None = None
+        self.reader = None
+        self.scorer: StreamingFatigueScorer | None = None
+        self.filters: StreamingFilterBank | None = None
+        self.quality: SignalQualityEstimator | None = None
+        self.quality_summary: QualitySummary | None = None
+        self.alerts: AlertEngine | None = None
+        self.recorder: SessionRecorder | None = None
+        self.fatigue_summary: FatigueSummary | None = None
+        self.hypnogram: HypnogramIndex | None = None
+        self.live: LiveSlotWriter | None = None
+        self._live_last: tuple[int, int, int] | None = None
+        # Temps de session du début de ce flux (> 0 quand une session enregistrée est reprise)
+        self.time_offset = 0.0
+        self._scored = 0
+        self._scored_at: float | None = None
+        self.alert_sink_errors = 0
+        self.summary_sink_errors = 0
+        self._unsaved_episodes: list[AlertEpisode] = []
+        self._flushed_at = 0.0
+        self._session_lock = threading.Lock()
+        self.stop_handle: asyncio.TimerHandle | None = None  # fin différée (plus d'abonné)
+        self.started_at = time.time()
+        self.stop_requested = False  # /acquisition/stop reçu par un autre worker
+        self._stop_polled_at = 0.0
+
+    async def open(self) -> None:
+        # Lecteur memory-mappé partagé : seul l'en-tête est parsé
+        self.reader = await self.executor.run(self.cache.get_reader, self.psg)
+        self.sfreq = self.reader.sfreq
+        self.channels = list(self.reader.channels)
+        # Poids statiques par nom de canal (1.0 si absent)
+        weights = np.array([self.channel_weights.get(ch, 1.0) for ch in self.channels])
+        self.scorer = StreamingFatigueScorer(
+            self.processor,
+            self.sfreq,
+            window_seconds=self.window_seconds,
+            score_interval_seconds=self.score_interval_seconds,
+            channel_weights=weights,
+            quality_weighting=self.quality_weighting,
+        )
+        if self.filter_params is not None:
+            self.filters = StreamingFilterBank(design_sos(self.sfreq, **self.filter_params))
+        self.quality = SignalQualityEstimator(
+            self.sfreq,
+            physical_range=self.reader.physical_range,
+            **self.quality_params,
+        )
+        self.quality_summary = QualitySummary(self.channels)
+        if self.alert_rules:
+            self.alerts = AlertEngine(self.alert_rules)
+        try:
+            # Index des stades (cache .npz à côté de l'hypnogramme)
+            self.hypnogram = await self.executor.run(load_hypnogram_for, self.psg)
+        except (OSError, ValueError):
+            self.hypnogram = None  # hypnogramme illisible : chunks non étiquetés
+        if self.session_id is not None and self.artifacts is not None:
+            await self.executor.run(self._open_session_files)
+
+    def _open_session_files(self) -> None:
+        self.live = LiveSlotWriter(self.artifacts.live_slot_path(self.session_id, create=True))
+        if self.hypnogram is not None:
+            # Copie par session : /analytics agrège par stade sans retrouver l'EDF
+            self.hypnogram.save(self.artifacts.hypnogram_path(self.session_id))
+        store = fatigue_series = None
+        if self.store_params is not None:
+            path = self.artifacts.samples_dir(self.session_id, create=True)
+            store = SampleStoreWriter(path, self.sfreq, self.channels, **self.store_params)
+        if self.record_fatigue:
+            path = self.artifacts.fatigue_dir(self.session_id, create=True)
+            fatigue_series = FatigueSeriesWriter(path, self.channels)
+            self.fatigue_summary = FatigueSummary.from_dict(
+                self.channels, self.artifacts.read_json(self.session_id, "fatigue")
+            )
+        self.quality_summary = QualitySummary.from_dict(
+            self.channels, self.artifacts.read_json(self.session_id, "quality")
+        )
+        self._flushed_at = self.quality_summary.seconds
+        # Reprise : la source repart de 0, la session continue après ce qui est
+        # déjà archivé (samples ajoutés à la suite, série fatigue triée par t)
+        self.time_offset = max(
+            store.n_samples / self.sfreq if store is not None else 0.0,
+            fatigue_series.end_t if fatigue_series is not None else 0.0,
+        )
+        if store is not None or fatigue_series is not None:
+            # Écritures disque hors du thread DSP (et donc du chemin d'envoi)
+            self.recorder = SessionRecorder(
+                store,
+                fatigue_series,
+                name=f"recorder-{self.session_id}",
+                **self.recorder_params,
+            )
+
+    def publish(self, frame: EEGFrame | None) -> None:
+        for sub in list(self.subscribers):
+            sub.offer(frame)
+
+    def _process(self, start: int, end: int) -> EEGFrame | None:
+        """Décodage, qualité, filtrage, scoring et alertes d'un chunk (thread du DSPExecutor)"""
+        self._poll_stop()
+        chunk = self.reader.read(start, end)
+        if chunk.shape[1] == 0:
+            return None
+
+        with self._session_lock:
+            # Qualité sur le signal brut : le notch masquerait le bruit secteur
+            report = self.quality.push(chunk)
+            self.quality_summary.update(report, chunk.shape[1] / self.sfreq)
+            if self.recorder is not None:
+                # Signal brut archivé (copie : le filtrage se fait en place)
+                self.recorder.submit_samples(chunk.copy())
+
+            if self.filters is not None:
+                # Filtré une fois par source : tracé et score voient le même signal
+                self.filters.process(chunk)
+            chunk.setflags(write=False)
+            score = self.scorer.push(chunk)
+            if self.fatigue_summary is not None and self.scorer.scored != self._scored:
+                self._scored = self.scorer.scored
+                self._record_score(self.time_offset + end / self.sfreq)
+
+            events = []
+            if self.alerts is not None:
+                metrics = {
+                    "quality_score": report.score,
+                    "signal_lost": 1.0 if report.label == "No signal" else 0.0,
+                }
+                if self.scorer.ready:
+                    # Pas d'alerte fatigue sur une fenêtre incomplète
+                    metrics["fatigue"] = score
+                events = self.alerts.evaluate(self.time_offset + end / self.sfreq, metrics)
+
+            if self.live is not None:
+                # Lu par /acquisition/{id}/live sans verrou ni base
+                self._publish_live(score, report.score, end, streaming=True)
+
+            if self.session_id is not None:
+                seconds = self.quality_summary.seconds
+                if seconds - self._flushed_at >= self.flush_seconds:
+                    self._flushed_at = seconds
+                    self._flush_session(final=False)
+
+            return EEGFrame(
+                t0=start / self.sfreq,
+                sfreq=self.sfreq,
+                channels=self.channels,
+                samples=chunk,
+                fatigue=score,
+                quality=report.label,
+                alerts=self.alerts.active_messages() if self.alerts is not None else [],
+                chunk_seconds=self.chunk_seconds,
+                window_seconds=self.window_seconds,
+                channel_fatigue=list(self.scorer.channel_scores),
+                quality_score=report.score,
+                channel_quality=[ch.score for ch in report.channels],
+                alert_events=[e.to_dict() for e in events],
+                stage=(
+                    self.hypnogram.stage_at((start + end) / 2 / self.sfreq)
+                    if self.hypnogram is not None else "?"
+                ),
+            )
+
+    def _publish_live(self, fatigue: int, quality_score: int, samples: int, streaming: bool) -> None:
+        self._live_last = (fatigue, quality_score, samples)
+        self.live.publish(
+            fatigue=fatigue,
+            quality_score=quality_score,
+            samples=samples,
+            frames=self.frames,
+            signal_time=samples / self.sfreq,
+            streaming=streaming,
+            fatigue_ready=self.scorer.ready,
+            active_alerts=len(self.alerts.active) if self.alerts is not None else 0,
+        )
+
+    def _record_score(self, t: float) -> None:
+        """Fenêtre scorée -> série et agrégats (fenêtres complètes seulement)"""
+        if not self.scorer.ready:
+            return
+        # Durée représentée par ce score : jusqu'au score précédent
+        seconds = self.score_interval_seconds if self._scored_at is None else t - self._scored_at
+        self._scored_at = t
+        self.recorder.submit_score(t, self.scorer.score, self.scorer.channel_scores)
+        self.fatigue_summary.update(self.scorer.score, self.scorer.channel_scores, seconds)
+
+    def _poll_stop(self) -> None:
+        """Demande d'arrêt postérieure au début du flux (stop.json de la session), relue au plus toutes les STOP_POLL_SECONDS"""
+        if self.session_id is None or self.artifacts is None:
+            return
+        now = time.monotonic()
+        if now - self._stop_polled_at < STOP_POLL_SECONDS:
+            return
+        self._stop_polled_at = now
+        requested_at = self.artifacts.stop_requested_at(self.session_id)
+        if requested_at is not None and requested_at >= self.started_at:
+            self.stop_requested = True
+
+    def flush_session(self, final: bool = False) -> None:
+        with self._session_lock:
+            self._flush_session(final)
+
+    def _flush_session(self, final: bool) -> None:
+        """Persister les résumés et les alertes terminées ; en fin de flux, vider l'enregistreur"""
+        if self.session_id is None:
+            return
+        if final and self.recorder is not None:
+            self.recorder.close()
+            if self.epoch_builder is not None and self.recorder.store is not None:
+                self._write_epoch_table()
+        if self.fatigue_summary is not None:
+            self.artifacts.write_json(self.session_id, "fatigue", self.fatigue_summary.to_dict())
+        if self.artifacts is not None and self.quality_summary is not None:
+            # Relu par /analytics sans relire le signal
+            self.artifacts.write_json(self.session_id, "quality", self.quality_summary.to_dict())
+
+        if self.alerts is not None and self.alert_sink is not None:
+            self._sink_alerts(final)
+        if final and self.summary_sink is not None:
+            # Après les alertes : le résumé compte les épisodes enregistrés
+            try:
+                self.summary_sink(
+                    self.session_id,
+                    self.fatigue_summary.to_dict() if self.fatigue_summary is not None else None,
+                    self.quality_summary.to_dict() if self.quality_summary is not None else None,
+                )
+            except Exception:
+                self.summary_sink_errors += 1
+        if final and self.live is not None:
+            # Fin du flux, tout est écrit : dernière valeur conservée, marquée
+            # arrêtée (/acquisition/stop attend ce passage, quel que soit le worker)
+            if self._live_last is not None:
+                self._publish_live(*self._live_last, streaming=False)
+            self.live.close()
+
+    def _sink_alerts(self, final: bool) -> None:
+        episodes = self._unsaved_episodes + self.alerts.drain_episodes(include_open=final)
+        self._unsaved_episodes = []
+        if not episodes:
+            return
+        try:
+            self.alert_sink(self.session_id, episodes)
+        except Exception:
+            # Base indisponible : nouvel essai au prochain flush
+            self.alert_sink_errors += 1
+            if not final:
+                self._unsaved_episodes = episodes
+
+    def _write_epoch_table(self) -> None:
+        """Fin de session : features par epoch depuis les samples archivés"""
+        try:
+            store = SampleStoreReader(self.artifacts.samples_dir(self.session_id))
+            columns = self.epoch_builder.build(store, self.hypnogram, self.reader.physical_range)
+            write_epoch_table(
+                self.artifacts.epochs_dir(self.session_id), columns, self.epoch_builder.meta(store)
+            )
+        except (OSError, ValueError):
+            self.epoch_table_errors += 1
+
+    async def run(self) -> None:
+        sfreq = self.sfreq
+        chunk_size = int(round(sfreq * self.chunk_seconds))
+        n_samples = self.reader.n_samples
+        clock = self.clock
+        clock.start()
+
+        try:
+            for k, start in enumerate(range(0, n_samples, chunk_size)):
+                end = min(start + chunk_size, n_samples)
+                frame = await self.executor.run(self._process, start, end)
+                if self.stop_requested:
+                    break
+                if frame is None:
+                    continue
+
+                # Le chunk k part à start + k·chunk_seconds/speed (pas de dérive)
+                await clock.wait_for(k)
+                self.schedule_lag = clock.lag(k)
+                frame.produced_at = time.monotonic()
+                self.publish(frame)
+                self.frames += 1
+        finally:
+            # Fin d'enregistrement (ou annulation) : prévenir les abonnés
+            self.publish(None)
+            if self.session_id is not None:
+                await self._final_flush()
+
+    async def _final_flush(self) -> None:
+        """
+        Flush final protégé : une annulation (dernier abonné parti, /stop)
+        pendant qu'il attend un thread du pool ne doit pas l'abandonner.
+        L'annulation est propagée une fois l'écriture terminée.
+        """
+        flush = asyncio.ensure_future(self.executor.run(self.flush_session, True))
+        cancelled = False
+        while not flush.done():
+            try:
+                await asyncio.shield(flush)
+            except asyncio.CancelledError:
+                cancelled = True
+        if cancelled:
+            raise asyncio.CancelledError
+
+
+class EEGStreamHub:
+    """Registre des sources : un producteur par source, N abonnés"""
+
+    def __init__(
+        self,
+        processor: EEGProcessor,
+        cache: RecordingCache,
+        executor: DSPExecutor,
+        chunk_seconds: float,
+        window_seconds: float,
+        score_interval_seconds: float,
+        queue_max_frames: int,
+        max_lag_seconds: float = 0.5,
+        channel_weights: dict[str, float] | None = None,
+        quality_weighting: bool = True,
+        filter_params: dict | None = None,
+        quality_params: dict | None = None,
+        artifacts: SessionArtifacts | None = None,
+        flush_seconds: float = 10.0,
+        alert_rules: list[AlertRule] | None = None,
+        alert_sink: Callable[[str, list[AlertEpisode]], None] | None = None,
+        summary_sink: Callable[[str, dict | None, dict | None], None] | None = None,
+        store_params: dict | None = None,
+        record_fatigue: bool = True,
+        recorder_params: dict | None = None,
+        epoch_builder: EpochFeatureBuilder | None = None,
+        session_grace_seconds: float = 0.0,
+    ):
+        self.processor = processor
+        self.cache = cache
+        self.executor = executor
+        self.chunk_seconds = chunk_seconds
+        self.window_seconds = window_seconds
+        self.score_interval_seconds = score_interval_seconds
+        self.queue_max_frames = queue_max_frames
+        self.max_lag_seconds = max_lag_seconds
+        self.channel_weights = channel_weights or {}
+        self.quality_weighting = quality_weighting
+        self.filter_params = filter_params
+        self.quality_params = quality_params
+        self.artifacts = artifacts
+        self.flush_seconds = flush_seconds
+        self.alert_rules = alert_rules
+        self.alert_sink = alert_sink
+        self.summary_sink = summary_sink
+        self.store_params = store_params
+        self.record_fatigue = record_fatigue
+        self.recorder_params = recorder_params
+        self.epoch_builder = epoch_builder
+        self.session_grace_seconds = session_grace_seconds
+        self.producers: dict[str, SourceProducer] = {}
+
+    async def subscribe(
+        self,
+        psg: Path,
+        policy: str = "drop",
+        speed: float = 1.0,
+        session_id: str | None = None,
+    ) -> Subscription:
+        """S'abonner à une source, en démarrant son producteur si besoin"""
+        # Une même source rejouée à des vitesses différentes = producteurs distincts ;
+        # un flux rattaché à une session a son propre producteur (qualité, alertes...)
+        key = f"{Path(psg).resolve()}@{speed:g}"
+        if session_id is not None:
+            key += f"#{session_id}"
+        producer = self.producers.get(key)
+        if producer is not None and producer.stop_handle is not None:
+            # Reconnexion pendant le délai de grâce : la session continue
+            producer.stop_handle.cancel()
+            producer.stop_handle = None
+        if producer is None:
+            producer = SourceProducer(
+                key,
+                psg,
+                self.processor,
+                self.cache,
+                self.executor,
+                chunk_seconds=self.chunk_seconds,
+                window_seconds=self.window_seconds,
+                score_interval_seconds=self.score_interval_seconds,
+                speed=speed,
+                channel_weights=self.channel_weights,
+                quality_weighting=self.quality_weighting,
+                filter_params=self.filter_params,
+                quality_params=self.quality_params,
+                session_id=session_id,
+                artifacts=self.artifacts,
+                flush_seconds=self.flush_seconds,
+                alert_rules=self.alert_rules,
+                alert_sink=self.alert_sink,
+                summary_sink=self.summary_sink,
+                store_params=self.store_params,
+                record_fatigue=self.record_fatigue,
+                recorder_params=self.recorder_params,
+                epoch_builder=self.epoch_builder,
+            )
+            self.producers[key] = producer
+            producer.opening = asyncio.ensure_future(producer.open())
+
+        try:
+            # shield : un abonné qui abandonne n'annule pas l'ouverture des autres
+            await asyncio.shield(producer.opening)
+        except Exception:
+            if self.producers.get(key) is producer:
+                del self.producers[key]
+            raise
+
+        if self.producers.get(key) is not producer:
+            # Producteur arrêté pendant l'ouverture : repartir sur un neuf
+            return await self.subscribe(psg, policy=policy, speed=speed, session_id=session_id)
+        if producer.task is None:
+            producer.task = asyncio.create_task(self._run(producer))
+
+        sub = Subscription(
+            producer,
+            self.queue_max_frames,
+            policy=policy,
+            max_lag_seconds=self.max_lag_seconds,
+        )
+        producer.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        producer = sub.producer
+        producer.subscribers.discard(sub)
+        if producer.subscribers or producer.task is None or producer.task.done():
+            return
+        if producer.session_id is not None and self.session_grace_seconds > 0:
+            # Session : une coupure réseau ne la termine pas tout de suite
+            if producer.stop_handle is None and not producer.task.cancelling():
+                producer.stop_handle = asyncio.get_running_loop().call_later(
+                    self.session_grace_seconds, self._expire, producer
+                )
+            return
+        self._stop_producer(producer)
+
+    def _expire(self, producer: SourceProducer) -> None:
+        producer.stop_handle = None
+        if not producer.subscribers:
+            self._stop_producer(producer)
+
+    def _stop_producer(self, producer: SourceProducer) -> None:
+        # Plus personne n'écoute : arrêter la lecture (un nouvel abonné
+        # repartira sur un producteur neuf)
+        if self.producers.get(producer.key) is producer:
+            del self.producers[producer.key]
+        # Déjà annulé (stop_session) : ne pas interrompre le flush final
+        if not producer.task.cancelling():
+            producer.task.cancel()
+
+    async def stop_session(self, session_id: str) -> list[dict]:
+        """
+        Arrêter les flux d'une session portés par ce worker et attendre la
+        fin de leur écriture (file de l'enregistreur vidée, fsync). Retourne
+        les métriques des enregistreurs. Les flux des autres workers
+        s'arrêtent sur SessionArtifacts.request_stop.
+        """
+        producers = [p for p in self.producers.values() if p.session_id == session_id]
+        for producer in producers:
+            if producer.stop_handle is not None:
+                producer.stop_handle.cancel()
+                producer.stop_handle = None
+            if self.producers.get(producer.key) is producer:
+                del self.producers[producer.key]
+            if producer.task is not None:
+                producer.task.cancel()
+        # _run absorbe l'annulation : attendre = attendre le flush final
+        await asyncio.gather(*(p.task for p in producers if p.task is not None), return_exceptions=True)
+        return [p.recorder.stats() for p in producers if p.recorder is not None]
+
+    async def _run(self, producer: SourceProducer) -> None:
+        try:
+            await producer.run()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if producer.stop_handle is not None:
+                producer.stop_handle.cancel()
+                producer.stop_handle = None
+            if self.producers.get(producer.key) is producer:
+                del self.producers[producer.key]
+
+    def stats(self) -> dict:
+        return {
+            "sources": [
+                {
+                    "source": p.key,
+                    "frames": p.frames,
+                    "speed": p.clock.speed,
+                    "session_id": p.session_id,
+                    "grace_pending": p.stop_handle is not None,
+                    "alerts": p.alerts.counts() if p.alerts is not None else {},
+                    "alert_sink_errors": p.alert_sink_errors,
+                    "summary_sink_errors": p.summary_sink_errors,
+                    "recorder": p.recorder.stats() if p.recorder is not None else None,
+                    "epoch_table_errors": p.epoch_table_errors,
+                    "schedule_lag_seconds": round(p.schedule_lag, 4),
+                    "subscribers": [s.stats() for s in p.subscribers],
+                }
+                for p in self.producers.values()
+            ]
+        }
@@ -1,6 +1,94 @@
 from pathlib import Path
+from typing import Sequence
 import numpy as np
 
+from app.core.edf_reader import EDFReader
+from app.core.eeg_sleepedf import load_sleep_edf, open_sleep_edf
+
+
+DEFAULT_BANDS: dict[str, tuple[float, float]] = {
+    "delta": (0.5, 4.0),
+    "theta": (4.0, 8.0),
+    "alpha": (8.0, 12.0),
+    "beta": (12.0, 30.0),
+    "gamma": (30.0, 45.0),
+}
+
+DEFAULT_RATIOS: dict[str, tuple[str, str]] = {
+    "theta_alpha": ("theta", "alpha"),
+    "theta_beta": ("theta", "beta"),
+    "alpha_beta": ("alpha", "beta"),
+}
+
+
+class SpectralFeatureExtractor:
+    """
+    Extraction multi-bandes en une passe : un seul spectre par fenêtre.
+
+    Fenêtre de Hanning et matrice des bandes précalculées et mises en cache
+    par (n, sfreq) : ajouter une bande ne coûte qu'une ligne de plus dans
+    le produit matriciel spectre x bandes.
+    """
+
+    def __init__(
+        self,
+        bands: dict[str, tuple[float, float]] | None = None,
+        ratios: dict[str, tuple[str, str]] | None = None,
+        max_plans: int = 32,
+    ):
+        self.bands = dict(bands or DEFAULT_BANDS)
+        self.band_names = list(self.bands)
+        ratios = DEFAULT_RATIOS if ratios is None else ratios
+        self.ratios = {k: v for k, v in ratios.items() if v[0] in self.bands and v[1] in self.bands}
+        self._plans: dict[tuple[int, float], tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._max_plans = max_plans
+
+    def plan(self, n: int, sfreq: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(fenêtre float32, fréquences, matrice de moyenne par bande (n_bands, n_freqs))"""
+        key = (n, float(sfreq))
+        cached = self._plans.get(key)
+        if cached is None:
+            win = np.hanning(n).astype(np.float32)
+            freqs = np.fft.rfftfreq(n, d=1.0 / sfreq)
+            avg = np.zeros((len(self.band_names), freqs.size), dtype=np.float32)
+            for i, name in enumerate(self.band_names):
+                fmin, fmax = self.bands[name]
+                band = (freqs >= fmin) & (freqs < fmax)
+                if band.any():
+                    avg[i, band] = 1.0 / band.sum()
+            if len(self._plans) >= self._max_plans:
+                self._plans.pop(next(iter(self._plans)))
+            cached = (win, freqs, avg)
+            self._plans[key] = cached
+        return cached
+
+    def spectrum(self, x: np.ndarray, sfreq: float) -> np.ndarray:
+        """Spectre de puissance (detrend + Hanning) sur le dernier axe"""
+        x = np.asarray(x, dtype=np.float32)
+        win, _, _ = self.plan(x.shape[-1], sfreq)
+        xw = (x - x.mean(axis=-1, keepdims=True)) * win
+        return np.abs(np.fft.rfft(xw, axis=-1)) ** 2
+
+    def band_powers(self, x: np.ndarray, sfreq: float) -> np.ndarray:
+        """
+        Puissance moyenne par bande.
+        x: (..., n_samples) -> (..., n_bands), dans l'ordre de band_names
+        """
+        x = np.asarray(x, dtype=np.float32)
+        n = x.shape[-1]
+        if n < 16:
+            return np.zeros(x.shape[:-1] + (len(self.band_names),), dtype=np.float32)
+        _, _, avg = self.plan(n, sfreq)
+        return self.spectrum(x, sfreq) @ avg.T
+
+    def extract(self, x: np.ndarray, sfreq: float) -> dict[str, float]:
+        """Bandes + ratios pour une fenêtre 1D"""
+        powers = self.band_powers(x, sfreq)
+        feats = {name: float(powers[i]) for i, name in enumerate(self.band_names)}
+        for name, (num, den) in self.ratios.items():
+            feats[name] = feats[num] / (feats[den] + 1e-9)
+        return feats
+
 
 class EEGProcessor:
     """Traitement EEG avec calcul de fatigue"""
@@ -13,7 +101,10 @@ class EEGProcessor:
         alpha_max: float = 12.0,
         fatigue_ratio_min: float = 0.5,
         fatigue_ratio_max: float = 3.0,
+        bands: dict[str, tuple[float, float]] | None = None,
+        default_picks: Sequence[str] = (),
     ):
+        self.default_picks = list(default_picks)
         self.theta_min = theta_min
         self.theta_max = theta_max
         self.alpha_min = alpha_min
@@ -21,23 +112,22 @@ class EEGProcessor:
         self.fatigue_ratio_min = fatigue_ratio_min
         self.fatigue_ratio_max = fatigue_ratio_max
 
-    def load_edf(self, psg_path: Path, picks: list[str] | None = None):
-        """Charger fichier EDF avec MNE et retourner (sfreq, channels, data)"""
-        import mne
-
-        raw = mne.io.read_raw_edf(str(psg_path), preload=True, verbose=False)
+        # theta / alpha suivent toujours les paramètres du score fatigue
+        bands = dict(bands or DEFAULT_BANDS)
+        bands["theta"] = (theta_min, theta_max)
+        bands["alpha"] = (alpha_min, alpha_max)
+        self.spectral = SpectralFeatureExtractor(bands)
+        self._theta_idx = self.spectral.band_names.index("theta")
+        self._alpha_idx = self.spectral.band_names.index("alpha")
 
-        if picks is None:
-            picks = ["Fpz-Cz", "Pz-Oz"]
-            picks = [ch for ch in picks if ch in raw.ch_names]
-            if not picks:
-                picks = raw.ch_names[:2]
+    def open_edf(self, psg_path: Path, picks: list[str] | None = None) -> EDFReader:
+        """Ouvrir un EDF en lecture paresseuse (memory-map, aucun préchargement)"""
+        return open_sleep_edf(psg_path, picks, self.default_picks)
 
-        raw = raw.copy().pick_channels(picks)
-        sfreq = float(raw.info["sfreq"])
-        data = raw.get_data()  # (n_channels, n_samples)
-        channels = list(raw.ch_names)
-        return sfreq, channels, data
+    def load_edf(self, psg_path: Path, picks: list[str] | None = None):
+        """Charger fichier EDF et retourner (sfreq, channels, data), via MNE si EDFReader le refuse"""
+        sfreq, channels, data = load_sleep_edf(psg_path, picks, self.default_picks)
+        return sfreq, list(channels), data
 
     def bandpower_fft(
         self,
@@ -50,19 +140,12 @@ class EEGProcessor:
         Calcul puissance de bande via FFT.
         x: (n_samples,) ou compatible
         """
-        x = np.asarray(x, dtype=np.float32)
+        x = np.asarray(x, dtype=np.float32).ravel()
         if x.size < 16:
             return 0.0
 
-        # Detrend simple
-        x = x - float(np.mean(x))
-
-        n = x.size
-        win = np.hanning(n).astype(np.float32)
-        xw = x * win
-
-        freqs = np.fft.rfftfreq(n, d=1.0 / sfreq)
-        spec = np.abs(np.fft.rfft(xw)) ** 2
+        _, freqs, _ = self.spectral.plan(x.size, sfreq)
+        spec = self.spectral.spectrum(x, sfreq)
 
         band = (freqs >= fmin) & (freqs < fmax)
         if not np.any(band):
@@ -70,27 +153,156 @@ class EEGProcessor:
 
         return float(np.mean(spec[band]))
 
-    def compute_fatigue_score(self, window_2d: np.ndarray, sfreq: float) -> int:
+    def compute_fatigue_score(
+        self,
+        window_2d: np.ndarray,
+        sfreq: float,
+        weights: np.ndarray | None = None,
+        quality_weighting: bool = True,
+    ) -> int:
         """
         Score fatigue 0-100 basé sur ratio theta/alpha.
         window_2d: (n_channels, n_samples)
+        Même score que le flux : scores par canal fusionnés (compute_channel_fatigue).
+        """
+        return self.compute_channel_fatigue(np.atleast_2d(window_2d), sfreq, weights, quality_weighting)[0]
+
+    def compute_channel_fatigue(
+        self,
+        window_2d: np.ndarray,
+        sfreq: float,
+        weights: np.ndarray | None = None,
+        quality_weighting: bool = True,
+    ) -> tuple[int, list[int]]:
+        """
+        Score fatigue par canal (une FFT batchée sur l'axe des canaux) puis fusion.
+        window_2d: (n_channels, n_samples)
+        weights: poids statiques par canal (1.0 par défaut)
+        quality_weighting: atténuer les canaux anormalement variables (artefacts)
+        Retourne (score fusionné, scores par canal).
         """
         if window_2d.size == 0:
-            return 0
+            return 0, []
+
+        window_2d = np.asarray(window_2d, dtype=np.float32)
+        powers = self.spectral.band_powers(window_2d, sfreq)  # (n_channels, n_bands)
+        ratios = powers[:, self._theta_idx] / (powers[:, self._alpha_idx] + 1e-9)
+        scores = [self.ratio_to_score(float(r)) for r in ratios]
+
+        w = np.ones(len(scores)) if weights is None else np.asarray(weights, dtype=np.float64)
+        if quality_weighting:
+            w = w * self.variance_weights(np.var(window_2d, axis=1, dtype=np.float64))
+        return self.fuse_channel_scores(scores, w), scores
+
+    @staticmethod
+    def variance_weights(variances: np.ndarray) -> np.ndarray:
+        """Poids qualité : un canal bien plus variable que la médiane (clignements, artefacts) est atténué"""
+        var = np.maximum(np.asarray(variances, dtype=np.float64), 1e-30)
+        # Médiane sur quelques canaux : tri direct, bien moins coûteux que np.median
+        ordered = np.sort(var)
+        k = ordered.size
+        median = 0.5 * (ordered[(k - 1) // 2] + ordered[k // 2])
+        return np.minimum(1.0, median / var)
 
-        # Moyenner les canaux
-        x = np.mean(window_2d, axis=0)
+    @staticmethod
+    def fuse_channel_scores(scores: list[int] | np.ndarray, weights: np.ndarray) -> int:
+        """Moyenne pondérée des scores par canal"""
+        scores = np.asarray(scores, dtype=np.float64)
+        total = float(np.sum(weights))
+        if scores.size == 0 or total <= 0:
+            return 0
+        return int(round(float(np.dot(scores, weights)) / total))
 
-        theta = self.bandpower_fft(x, sfreq, self.theta_min, self.theta_max)
-        alpha = self.bandpower_fft(x, sfreq, self.alpha_min, self.alpha_max) + 1e-9
+    def compute_features(
+        self,
+        window_2d: np.ndarray,
+        sfreq: float,
+        weights: np.ndarray | None = None,
+        quality_weighting: bool = True,
+    ) -> dict[str, float]:
+        """
+        Puissances de toutes les bandes configurées + ratios, calculés par
+        canal puis moyennés avec les poids de fusion du score fatigue.
+        """
+        x = np.atleast_2d(np.asarray(window_2d, dtype=np.float32))
+        powers = self.spectral.band_powers(x, sfreq)  # (n_channels, n_bands)
+        w = np.ones(x.shape[0]) if weights is None else np.asarray(weights, dtype=np.float64)
+        if quality_weighting:
+            w = w * self.variance_weights(np.var(x, axis=1, dtype=np.float64))
+        total = float(np.sum(w))
+        if x.size == 0 or total <= 0:
+            w, total = np.ones(x.shape[0]), float(x.shape[0])
 
-        ratio = theta / alpha
+        feats = {name: float(np.dot(powers[:, i], w) / total) for i, name in enumerate(self.spectral.band_names)}
+        for name, (num, den) in self.spectral.ratios.items():
+            i, j = self.spectral.band_names.index(num), self.spectral.band_names.index(den)
+            feats[name] = float(np.dot(powers[:, i] / (powers[:, j] + 1e-9), w) / total)
+        return feats
 
-        # Mapper ratio vers 0-100
+    def ratio_to_score(self, ratio: float) -> int:
+        """Mapper le ratio theta/alpha vers un score 0-100"""
         norm = (ratio - self.fatigue_ratio_min) / (
             self.fatigue_ratio_max - self.fatigue_ratio_min
         )
         norm = max(0.0, min(1.0, norm))
-        score = int(round(norm * 100))
+        return int(round(norm * 100))
+
+    def compute_fatigue_series(
+        self,
+        data: np.ndarray,
+        sfreq: float,
+        window_seconds: float,
+        hop_seconds: float,
+        weights: np.ndarray | None = None,
+        quality_weighting: bool = True,
+        batch_windows: int = 2048,
+        with_channels: bool = False,
+    ) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+        """
+        Scores fatigue de toutes les fenêtres d'un enregistrement, en batch.
+        data: (n_channels, n_samples)
+        Fenêtre i = samples [i*hop, i*hop + n) ; retourne (n_windows,) int.
+        Mêmes scores que compute_channel_fatigue appelé fenêtre par fenêtre :
+        scores par canal, poids statiques x poids qualité, fusion pondérée.
+        with_channels : retourne aussi les scores par canal (n_channels, n_windows).
+        """
+        data = np.atleast_2d(np.asarray(data, dtype=np.float32))
+        n = int(window_seconds * sfreq)
+        hop = max(1, int(round(hop_seconds * sfreq)))
+        if data.size == 0 or data.shape[-1] < n or n < 16:
+            empty = np.zeros(0, dtype=np.int64)
+            return (empty, np.zeros((data.shape[0], 0), dtype=np.int64)) if with_channels else empty
+
+        # Vue strided (aucune copie) : (n_channels, n_windows, n)
+        windows = np.lib.stride_tricks.sliding_window_view(data, n, axis=-1)[:, ::hop]
+        n_windows = windows.shape[1]
+        static = np.ones(data.shape[0]) if weights is None else np.asarray(weights, dtype=np.float64)
+
+        fused = np.empty(n_windows, dtype=np.float64)
+        channel_scores = np.empty((data.shape[0], n_windows), dtype=np.int64) if with_channels else None
+        # Par paquets pour borner la mémoire (une nuit = des dizaines de milliers de fenêtres)
+        for b in range(0, n_windows, batch_windows):
+            batch = windows[:, b:b + batch_windows]
+            powers = self.spectral.band_powers(batch, sfreq)  # (n_channels, n_batch, n_bands)
+            ratios = powers[..., self._theta_idx] / (powers[..., self._alpha_idx] + 1e-9)
+            norm = (ratios.astype(np.float64) - self.fatigue_ratio_min) / (
+                self.fatigue_ratio_max - self.fatigue_ratio_min
+            )
+            scores = np.round(np.clip(norm, 0.0, 1.0) * 100)  # (n_channels, n_batch)
+            if with_channels:
+                channel_scores[:, b:b + batch_windows] = scores
 
-        return score
+            w = np.repeat(static[:, None], scores.shape[1], axis=1)
+            if quality_weighting:
+                # variance_weights fenêtre par fenêtre (médiane sur l'axe des canaux)
+                var = np.maximum(np.var(batch, axis=-1, dtype=np.float64), 1e-30)
+                ordered = np.sort(var, axis=0)
+                k = ordered.shape[0]
+                median = 0.5 * (ordered[(k - 1) // 2] + ordered[k // 2])
+                w = w * np.minimum(1.0, median / var)
+            total = np.sum(w, axis=0)
+            fused[b:b + batch_windows] = np.where(
+                total > 0, np.sum(scores * w, axis=0) / np.where(total > 0, total, 1.0), 0.0
+            )
+        fused = np.round(fused).astype(np.int64)
+        return (fused, channel_scores) if with_channels else fused
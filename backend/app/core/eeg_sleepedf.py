@@ -1,8 +1,11 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Sequence
 import numpy as np
 
+from app.core.edf_reader import EDFFormatError, EDFReader, resolve_picks
+
 @dataclass
 class EEGChunk:
     t0: float
@@ -10,40 +13,54 @@ class EEGChunk:
     channels: list[str]
     samples: list[list[float]]  # shape: (n_channels, n_samples)
 
-def load_sleep_edf(psg_path: Path, picks: list[str] | None = None):
+def load_sleep_edf(psg_path: Path, picks: list[str] | None = None, default_picks: Sequence[str] = ()):
     """
-    Retourne (raw, sfreq, channels, data ndarray [n_channels, n_samples])
+    Retourne (sfreq, channels, data ndarray [n_channels, n_samples])
+    Lecteur memory-mappé, MNE pour les variantes EDF qu'il refuse.
     """
-    import mne
+    try:
+        reader = open_sleep_edf(psg_path, picks, default_picks)
+    except EDFFormatError:
+        return load_edf_mne(psg_path, picks, default_picks)
+    data = reader.read(0, reader.n_samples)  # float32 (n_channels, n_samples)
+    return reader.sfreq, reader.channels, data
 
-    raw = mne.io.read_raw_edf(psg_path, preload=True, verbose=False)
+def load_edf_mne(psg_path: Path, picks: list[str] | None = None, default_picks: Sequence[str] = ()):
+    """
+    Chargement complet via MNE (formats non gérés par EDFReader, ex. EDF+D).
+    Fonction de module : exécutable dans un process pool.
+    """
+    import mne
 
-    if picks is None:
-        # Sleep-EDF typique : 2 EEG
-        candidates = ["Fpz-Cz", "Pz-Oz"]
-        picks = [ch for ch in candidates if ch in raw.ch_names]
-        if not picks:
-            # fallback: prendre les 2 premiers canaux
-            picks = raw.ch_names[:2]
+    raw = mne.io.read_raw_edf(str(psg_path), preload=True, verbose=False)
+    raw = raw.pick(resolve_picks(raw.ch_names, picks, default_picks))
+    data = raw.get_data().astype(np.float32)  # (n_channels, n_samples)
+    return float(raw.info["sfreq"]), list(raw.ch_names), data
 
-    raw = raw.copy().pick_channels(picks)
-    sfreq = float(raw.info["sfreq"])
-    data = raw.get_data()  # numpy array (n_channels, n_samples)
-    channels = raw.ch_names
-    return sfreq, channels, data
+def open_sleep_edf(psg_path: Path, picks: list[str] | None = None, default_picks: Sequence[str] = ()) -> EDFReader:
+    """
+    Ouvre le PSG en memory-map : rien n'est décodé avant le premier read().
+    Sans picks : canaux de default_picks présents, sinon les 2 premiers canaux.
+    """
+    return EDFReader(psg_path, picks, default_picks)
 
-def iter_chunks(data: np.ndarray, sfreq: float, chunk_seconds: float = 1.0):
+def iter_chunks(data, sfreq: float, chunk_seconds: float = 1.0):
     """
     Générateur : yield EEGChunk toutes les chunk_seconds.
-    data shape: (n_channels, n_samples)
+    data shape: (n_channels, n_samples), ou un lecteur (read(start, stop)) décodé chunk par chunk
     """
-    n_channels, n_samples = data.shape
+    if hasattr(data, "read"):
+        n_samples = data.n_samples
+        read = data.read
+    else:
+        n_samples = data.shape[1]
+        read = lambda start, end: data[:, start:end]
     chunk_size = int(round(sfreq * chunk_seconds))
     t0 = 0.0
 
     for start in range(0, n_samples, chunk_size):
         end = min(start + chunk_size, n_samples)
-        samples = data[:, start:end].tolist()
+        samples = read(start, end).tolist()
         yield t0, samples
         t0 += (end - start) / sfreq
         if end >= n_samples:
@@ -0,0 +1,259 @@
+"""
+Table de features par epoch (30 s) d'une session, calculée hors ligne.
+
+Stockage en colonnes : un .npy par colonne dans <session>/epochs/, plus
+meta.json. Chaque colonne se relit en memory-map (np.load mmap_mode="r") :
+une requête sur N sessions = N tranches de tableaux, sans DSP.
+
+    colonne         dtype  forme                 contenu
+    t               f8     (n,)                  début de l'epoch (s)
+    stage           u1     (n,)                  stade (app.core.hypnogram.STAGES)
+    fatigue         u1     (n,)                  score fusionné 0-100
+    channel_fatigue u1     (n, n_channels)       score par canal
+    power_<bande>   f4     (n, n_channels)       puissance moyenne de la bande (V²)
+    theta_alpha     f4     (n, n_channels)       ratio theta / alpha
+    quality         u1     (n,)                  score qualité 0-100 (moyenne des canaux)
+    flags           u1     (n, n_channels)       drapeaux qualité (FLAG_*)
+
+Seuls les epochs complets sont écrits (le reste de fin de session est ignoré).
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from app.core.eeg_processor import EEGProcessor
+from app.core.hypnogram import HypnogramIndex
+from app.core.sample_store import SampleStoreReader
+from app.core.signal_quality import channel_scores
+
+TABLE_VERSION = 1
+
+# Drapeaux qualité par canal et par epoch (bits de la colonne flags)
+FLAG_FLAT = 1  # plus de 5 % de samples sans variation
+FLAG_CLIP = 2  # plus de 5 % de samples en butée de la plage physique
+FLAG_OUTLIER = 4  # plus de 5 % de samples à plus de outlier_z écarts-types
+FLAG_LINE_NOISE = 8  # plus de 25 % de la puissance à la fréquence secteur
+FLAG_HIGH_AMPLITUDE = 16  # écart-type au-dessus de max_std
+FLAG_NO_SIGNAL = 32  # canal perdu (plat ou écart-type sous min_std)
+FLAGS = {
+    "flat": FLAG_FLAT,
+    "clip": FLAG_CLIP,
+    "outlier": FLAG_OUTLIER,
+    "line_noise": FLAG_LINE_NOISE,
+    "high_amplitude": FLAG_HIGH_AMPLITUDE,
+    "no_signal": FLAG_NO_SIGNAL,
+}
+
+
+class EpochFeatureBuilder:
+    """
+    Calcul vectorisé des features d'epochs : les epochs d'un lot sont
+    empilés en (n_epochs, n_channels, n) et passent dans une seule FFT.
+    Scores fatigue / qualité : mêmes formules que le flux (par canal,
+    fusion pondérée, pénalités qualité).
+    """
+
+    def __init__(
+        self,
+        processor: EEGProcessor,
+        epoch_seconds: float = 30.0,
+        channel_weights: dict[str, float] | None = None,
+        quality_weighting: bool = True,
+        line_hz: float = 50.0,
+        outlier_z: float = 6.0,
+        flat_eps: float = 1e-9,
+        clip_margin: float = 0.002,
+        min_std: float = 0.5e-6,
+        max_std: float = 200e-6,
+        batch_epochs: int = 120,
+    ):
+        self.processor = processor
+        self.epoch_seconds = epoch_seconds
+        self.channel_weights = channel_weights or {}
+        self.quality_weighting = quality_weighting
+        self.line_hz = line_hz
+        self.outlier_z = outlier_z
+        self.flat_eps = flat_eps
+        self.clip_margin = clip_margin
+        self.min_std = min_std
+        self.max_std = max_std
+        self.batch_epochs = batch_epochs
+        self.band_names = list(processor.spectral.band_names)
+
+    def build(
+        self,
+        store: SampleStoreReader,
+        hypnogram: HypnogramIndex | None = None,
+        physical_range: tuple[np.ndarray, np.ndarray] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Colonnes de la table pour tous les epochs complets du stockage de samples"""
+        sfreq = store.sfreq
+        n = int(round(self.epoch_seconds * sfreq))
+        n_epochs = store.n_samples // n if n >= 16 else 0
+        n_ch = len(store.channels)
+        weights = np.array([self.channel_weights.get(ch, 1.0) for ch in store.channels])
+
+        columns = self._allocate(n_epochs, n_ch)
+        columns["t"][:] = np.arange(n_epochs) * (n / sfreq)
+        for e0 in range(0, n_epochs, self.batch_epochs):
+            e1 = min(e0 + self.batch_epochs, n_epochs)
+            data = store.read(e0 * n, e1 * n)
+            # (n_channels, k·n) -> (k, n_channels, n), sans copie
+            epochs = data.reshape(n_ch, e1 - e0, n).transpose(1, 0, 2)
+            self._compute(epochs, sfreq, weights, physical_range, columns, slice(e0, e1))
+
+        if hypnogram is not None:
+            # Stade au milieu de l'epoch
+            columns["stage"][:] = hypnogram.codes_at(columns["t"] + n / sfreq / 2)
+        return columns
+
+    def _allocate(self, n_epochs: int, n_ch: int) -> dict[str, np.ndarray]:
+        columns = {
+            "t": np.zeros(n_epochs, dtype=np.float64),
+            "stage": np.zeros(n_epochs, dtype=np.uint8),
+            "fatigue": np.zeros(n_epochs, dtype=np.uint8),
+            "channel_fatigue": np.zeros((n_epochs, n_ch), dtype=np.uint8),
+        }
+        for band in self.band_names:
+            columns[f"power_{band}"] = np.zeros((n_epochs, n_ch), dtype=np.float32)
+        columns["theta_alpha"] = np.zeros((n_epochs, n_ch), dtype=np.float32)
+        columns["quality"] = np.zeros(n_epochs, dtype=np.uint8)
+        columns["flags"] = np.zeros((n_epochs, n_ch), dtype=np.uint8)
+        return columns
+
+    def _compute(self, x, sfreq, weights, physical_range, columns, rows) -> None:
+        processor = self.processor
+        n = x.shape[-1]
+        x64 = x.astype(np.float64)
+
+        # Spectre une fois : bandes, ratio et bruit secteur
+        _, freqs, avg = processor.spectral.plan(n, sfreq)
+        spec = processor.spectral.spectrum(x, sfreq)  # (k, n_channels, n_freqs)
+        powers = spec @ avg.T
+        for i, band in enumerate(self.band_names):
+            columns[f"power_{band}"][rows] = powers[..., i]
+        theta = powers[..., self.band_names.index("theta")]
+        alpha = powers[..., self.band_names.index("alpha")]
+        ratio = theta / (alpha + 1e-9)
+        columns["theta_alpha"][rows] = ratio
+
+        norm = (ratio - processor.fatigue_ratio_min) / (
+            processor.fatigue_ratio_max - processor.fatigue_ratio_min
+        )
+        ch_scores = np.round(np.clip(norm, 0.0, 1.0) * 100)
+        columns["channel_fatigue"][rows] = ch_scores
+
+        var = x64.var(axis=-1)
+        w = np.broadcast_to(weights, var.shape).astype(np.float64)
+        if self.quality_weighting:
+            # Canal bien plus variable que la médiane de l'epoch : atténué
+            var_safe = np.maximum(var, 1e-30)
+            w = w * np.minimum(1.0, np.median(var_safe, axis=1, keepdims=True) / var_safe)
+        total = w.sum(axis=1)
+        fused = np.where(total > 0, (ch_scores * w).sum(axis=1) / np.where(total > 0, total, 1.0), 0.0)
+        columns["fatigue"][rows] = np.round(fused)
+
+        # Qualité : parts de samples drapeautés sur l'epoch
+        std = np.sqrt(var)
+        flat = (np.abs(np.diff(x64, axis=-1)) <= self.flat_eps).mean(axis=-1)
+        mean = x64.mean(axis=-1, keepdims=True)
+        limit = np.where(std > 0, self.outlier_z * std, np.inf)[..., np.newaxis]
+        outlier = (np.abs(x64 - mean) > limit).mean(axis=-1)
+        clip = np.zeros_like(std)
+        if physical_range is not None:
+            low, high = (np.asarray(v, dtype=np.float64)[:, np.newaxis] for v in physical_range)
+            margin = self.clip_margin * (high - low)
+            clip = ((x64 <= low + margin) | (x64 >= high - margin)).mean(axis=-1)
+        line = np.zeros_like(std)
+        if 0 < self.line_hz <= sfreq / 2:
+            # Fenêtre de Hanning : la raie s'étale sur le bin et ses deux voisins
+            k = int(np.argmin(np.abs(freqs - self.line_hz)))
+            total_power = spec[..., 1:].sum(axis=-1)
+            line = spec[..., max(k - 1, 1):k + 2].sum(axis=-1) / np.maximum(total_power, 1e-30)
+
+        scores, lost = channel_scores(flat, clip, outlier, line, std, self.min_std, self.max_std)
+        columns["quality"][rows] = np.rint(scores.mean(axis=1))
+        flags = (
+            (flat > 0.05) * FLAG_FLAT
+            | (clip > 0.05) * FLAG_CLIP
+            | (outlier > 0.05) * FLAG_OUTLIER
+            | (line > 0.25) * FLAG_LINE_NOISE
+            | (std > self.max_std) * FLAG_HIGH_AMPLITUDE
+            | lost * FLAG_NO_SIGNAL
+        )
+        columns["flags"][rows] = flags
+
+    def meta(self, store: SampleStoreReader) -> dict:
+        return {
+            "version": TABLE_VERSION,
+            "epoch_seconds": self.epoch_seconds,
+            "sfreq": store.sfreq,
+            "channels": store.channels,
+            "bands": {band: list(self.processor.spectral.bands[band]) for band in self.band_names},
+            "flags": FLAGS,
+        }
+
+
+def write_epoch_table(path: str | Path, columns: dict[str, np.ndarray], meta: dict) -> None:
+    """Écrire la table dans un dossier temporaire puis le substituer à path"""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.mkdir(parents=True)
+    for name, values in columns.items():
+        np.save(tmp / f"{name}.npy", values)
+    n_epochs = len(columns["t"]) if "t" in columns else 0
+    (tmp / "meta.json").write_text(
+        json.dumps({**meta, "n_epochs": n_epochs, "columns": list(columns)}), encoding="utf-8"
+    )
+    if path.exists():
+        old = path.with_name(f".{path.name}.{uuid.uuid4().hex}.old")
+        os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.replace(tmp, path)
+
+
+class EpochTable:
+    """Lecture de la table : colonnes memory-mappées, chargées à la demande"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No epoch table in {self.path}")
+        self.meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        self.channels: list[str] = self.meta["channels"]
+        self.epoch_seconds: float = self.meta["epoch_seconds"]
+        self.column_names: list[str] = self.meta["columns"]
+        self._columns: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.meta["n_epochs"]
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self.column_names:
+            raise KeyError(f"Unknown epoch column: {name}")
+        values = self._columns.get(name)
+        if values is None:
+            # Fichier vide : np.load ne sait pas mapper un tableau de taille 0
+            values = np.load(self.path / f"{name}.npy", mmap_mode="r" if len(self) else None)
+            self._columns[name] = values
+        return values
+
+    def rows(self, start: float = 0.0, end: float | None = None) -> slice:
+        """Epochs qui commencent dans [start, end) (recherche dichotomique sur t)"""
+        t = self.column("t")
+        lo = int(np.searchsorted(t, start, side="left"))
+        hi = int(np.searchsorted(t, end, side="left")) if end is not None else len(t)
+        return slice(lo, hi)
+
+    def read(self, columns: list[str] | None = None, start: float = 0.0, end: float | None = None) -> dict[str, np.ndarray]:
+        rows = self.rows(start, end)
+        return {name: self.column(name)[rows] for name in (columns or self.column_names)}
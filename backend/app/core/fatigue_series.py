@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from app.core.eeg_filters import StreamingFilterBank, design_sos
+from app.core.eeg_processor import EEGProcessor
+from app.core.sample_store import SampleStoreReader
+
+
+def series_dtype(n_channels: int) -> np.dtype:
+    """Un enregistrement par fenêtre scorée : temps signal, score fusionné, scores par canal"""
+    return np.dtype([
+        ("t", "<f4"),
+        ("score", "u1"),
+        ("channels", "u1", (n_channels,)),
+    ])
+
+
+class FatigueSeriesWriter:
+    """
+    Série temporelle du score fatigue d'une session, append-only.
+
+    series.bin : enregistrements de taille fixe triés par t (quelques octets
+    par fenêtre) ; meta.json : canaux. Une reprise tronque l'enregistrement
+    partiel éventuel et continue à la suite : l'appelant décale ses temps
+    au-delà de end_t pour garder la série triée.
+    """
+
+    def __init__(self, path: str | Path, channels: list[str]):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.channels = list(channels)
+        self.dtype = series_dtype(len(self.channels))
+
+        meta_path = self.path / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta["channels"] != self.channels:
+                raise ValueError(f"Fatigue series {self.path} has different channels")
+        else:
+            meta_path.write_text(json.dumps({"channels": self.channels}), encoding="utf-8")
+
+        self._file = open(self.path / "series.bin", "ab")
+        self.count = self._file.tell() // self.dtype.itemsize
+        self._file.truncate(self.count * self.dtype.itemsize)
+        self._file.seek(self.count * self.dtype.itemsize)
+        self._record = np.zeros(1, dtype=self.dtype)
+        # Temps du dernier enregistrement (0 pour une série neuve)
+        self.end_t = 0.0
+        if self.count:
+            with open(self.path / "series.bin", "rb") as f:
+                f.seek((self.count - 1) * self.dtype.itemsize)
+                self.end_t = float(np.frombuffer(f.read(self.dtype.itemsize), dtype=self.dtype)["t"][0])
+
+    def append(self, t: float, score: int, channel_scores: list[int]) -> None:
+        rec = self._record
+        rec["t"] = t
+        rec["score"] = score
+        rec["channels"] = channel_scores
+        self._file.write(rec.tobytes())
+        self.count += 1
+
+    def append_many(self, t: np.ndarray, scores: np.ndarray, channel_scores: np.ndarray) -> None:
+        """Lot de fenêtres en une écriture : t (n,), scores (n,), channel_scores (n, n_channels)"""
+        records = np.zeros(len(t), dtype=self.dtype)
+        records["t"] = t
+        records["score"] = scores
+        records["channels"] = channel_scores
+        self._file.write(records.tobytes())
+        self.count += len(records)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class FatigueSeriesReader:
+    """Lecture par plage de temps (recherche dichotomique sur t, fichier memory-mappé)"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No fatigue series in {self.path}")
+        self.channels = json.loads(meta_path.read_text(encoding="utf-8"))["channels"]
+        dtype = series_dtype(len(self.channels))
+        size = (self.path / "series.bin").stat().st_size // dtype.itemsize
+        self._records = (
+            np.memmap(self.path / "series.bin", dtype=dtype, mode="r", shape=(size,))
+            if size else np.zeros(0, dtype=dtype)
+        )
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def arrays(self, start: float = 0.0, end: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """(t, score) bruts sur [start, end), sans copie du fichier mappé"""
+        t = self._records["t"]
+        lo = int(np.searchsorted(t, start, side="left"))
+        hi = int(np.searchsorted(t, end, side="left")) if end is not None else len(t)
+        return t[lo:hi], self._records["score"][lo:hi]
+
+    def read(self, start: float = 0.0, end: float | None = None, max_points: int | None = None) -> dict:
+        """
+        Scores sur [start, end) secondes.
+
+        Avec max_points, les fenêtres sont regroupées par paquets consécutifs
+        (moyenne et maximum du paquet, t = début du paquet).
+        """
+        t = self._records["t"]
+        lo = int(np.searchsorted(t, start, side="left"))
+        hi = int(np.searchsorted(t, end, side="left")) if end is not None else len(t)
+        rec = self._records[lo:hi]
+
+        times = np.asarray(rec["t"], dtype=np.float64)
+        scores = np.asarray(rec["score"], dtype=np.float64)
+        channels = np.asarray(rec["channels"], dtype=np.float64).T
+        maxima = scores
+        group = 1
+        if max_points and len(rec) > max_points:
+            group = -(-len(rec) // max_points)
+            idx = np.arange(0, len(rec), group)
+            sizes = np.diff(np.append(idx, len(rec)))
+            times = times[idx]
+            maxima = np.maximum.reduceat(scores, idx)
+            scores = np.add.reduceat(scores, idx) / sizes
+            channels = np.add.reduceat(channels, idx, axis=1) / sizes if channels.size else channels
+
+        return {
+            "t": np.round(times, 3).tolist(),
+            "score": np.round(scores, 1).tolist(),
+            "max": maxima.astype(int).tolist() if group > 1 else None,
+            "channels": {
+                name: np.round(values, 1).tolist() for name, values in zip(self.channels, channels)
+            },
+            "windows_per_point": group,
+        }
+
+
+class FatigueSummary:
+    """
+    Agrégats de la série fatigue, tenus à jour à chaque fenêtre (mémoire constante).
+
+    Scores entiers 0-100 : un histogramme pondéré par la durée suffit à
+    donner moyenne, maximum, percentiles et temps au-dessus de n'importe quel
+    seuil sans relire la série.
+    """
+
+    def __init__(self, channels: list[str]):
+        self.channels = list(channels)
+        self.count = 0
+        self.seconds = 0.0
+        self.histogram = np.zeros(101)  # secondes passées à chaque score
+        self._channel_sums = np.zeros(len(channels))
+
+    @classmethod
+    def from_dict(cls, channels: list[str], data: dict | None) -> FatigueSummary:
+        """Reprendre les agrégats d'une session déjà enregistrée (flux relancé)"""
+        summary = cls(channels)
+        if data and [ch["name"] for ch in data.get("channels", [])] == summary.channels:
+            summary.count = data["windows"]
+            summary.seconds = data["duration_seconds"]
+            summary.histogram = np.asarray(data["histogram_seconds"], dtype=np.float64)
+            summary._channel_sums = np.array([
+                (ch["mean"] or 0.0) * summary.seconds for ch in data["channels"]
+            ])
+        return summary
+
+    def update(self, score: int, channel_scores: list[int], seconds: float) -> None:
+        if seconds <= 0:
+            return
+        self.count += 1
+        self.seconds += seconds
+        self.histogram[int(np.clip(score, 0, 100))] += seconds
+        if len(channel_scores) == len(self.channels):
+            self._channel_sums += np.asarray(channel_scores, dtype=np.float64) * seconds
+
+    def update_many(self, scores: np.ndarray, channel_scores: np.ndarray, seconds: np.ndarray) -> None:
+        """update() vectorisé : scores (n,), channel_scores (n, n_channels), seconds (n,)"""
+        keep = np.asarray(seconds, dtype=np.float64) > 0
+        seconds = np.asarray(seconds, dtype=np.float64)[keep]
+        self.count += int(keep.sum())
+        self.seconds += float(seconds.sum())
+        np.add.at(self.histogram, np.clip(np.asarray(scores)[keep], 0, 100).astype(np.intp), seconds)
+        channel_scores = np.asarray(channel_scores, dtype=np.float64)[keep]
+        if channel_scores.shape[1:] == (len(self.channels),):
+            self._channel_sums += seconds @ channel_scores
+
+    def to_dict(self) -> dict:
+        return {
+            "windows": self.count,
+            "duration_seconds": round(self.seconds, 3),
+            "histogram_seconds": np.round(self.histogram, 3).tolist(),
+            "channels": [
+                {"name": name, "mean": round(float(s / self.seconds), 1) if self.seconds > 0 else None}
+                for name, s in zip(self.channels, self._channel_sums)
+            ],
+        }
+
+
+class FatigueSeriesBuilder:
+    """
+    Série fatigue d'un enregistrement complet (import), scorée en batch
+    (EEGProcessor.compute_fatigue_series) : même fenêtre, même cadence,
+    mêmes filtres et même fusion par canal que le flux. Fenêtre i =
+    samples [i*hop, i*hop + n), horodatée à sa fin comme dans le flux.
+    """
+
+    def __init__(
+        self,
+        processor: EEGProcessor,
+        window_seconds: float = 10.0,
+        score_interval_seconds: float = 0.25,
+        channel_weights: dict[str, float] | None = None,
+        quality_weighting: bool = True,
+        filter_params: dict | None = None,
+        block_seconds: float = 600.0,
+    ):
+        self.processor = processor
+        self.window_seconds = window_seconds
+        self.score_interval_seconds = score_interval_seconds
+        self.channel_weights = channel_weights or {}
+        self.quality_weighting = quality_weighting
+        self.filter_params = filter_params
+        self.block_seconds = block_seconds
+
+    def build(self, store: SampleStoreReader, path: str | Path) -> FatigueSummary:
+        """Écrire la série dans path (FatigueSeriesWriter) et retourner ses agrégats"""
+        sfreq = store.sfreq
+        n = int(self.window_seconds * sfreq)
+        hop = max(1, int(round(self.score_interval_seconds * sfreq)))
+        weights = np.array([self.channel_weights.get(ch, 1.0) for ch in store.channels])
+        filters = (
+            StreamingFilterBank(design_sos(sfreq, **self.filter_params))
+            if self.filter_params is not None else None
+        )
+        writer = FatigueSeriesWriter(path, store.channels)
+        summary = FatigueSummary(store.channels)
+        # Signal filtré pas encore couvert par une fenêtre, et son premier sample
+        tail = np.zeros((len(store.channels), 0), dtype=np.float32)
+        first = 0
+        step = max(n, int(self.block_seconds * sfreq))
+        try:
+            for start in range(0, store.n_samples, step):
+                chunk = store.read(start, start + step)
+                if filters is not None:
+                    # État conservé d'un bloc à l'autre : identique à un filtrage en une passe
+                    filters.process(chunk)
+                data = np.concatenate([tail, chunk], axis=1)
+                scores, channel_scores = self.processor.compute_fatigue_series(
+                    data,
+                    sfreq,
+                    self.window_seconds,
+                    self.score_interval_seconds,
+                    weights,
+                    self.quality_weighting,
+                    with_channels=True,
+                )
+                k = len(scores)
+                if k:
+                    t = (first + np.arange(k) * hop + n) / sfreq
+                    # Durée représentée : jusqu'à la fenêtre précédente (cadence pour la première)
+                    seconds = np.full(k, hop / sfreq)
+                    if summary.count == 0:
+                        seconds[0] = self.score_interval_seconds
+                    writer.append_many(t, scores, channel_scores.T)
+                    summary.update_many(scores, channel_scores.T, seconds)
+                tail = data[:, k * hop:]
+                first += k * hop
+            writer.sync()
+        finally:
+            writer.close()
+        return summary
+
+
+def summarize_histogram(histogram_seconds: list[float], threshold: float) -> dict:
+    """Moyenne, min, max, p95 et temps au-dessus du seuil depuis l'histogramme (O(101))"""
+    hist = np.asarray(histogram_seconds, dtype=np.float64)
+    total = hist.sum()
+    if total <= 0:
+        return {
+            "mean": None, "min": None, "max": None, "p95": None,
+            "seconds_above_threshold": 0.0, "ratio_above_threshold": 0.0,
+        }
+    scores = np.arange(hist.size)
+    present = np.flatnonzero(hist)
+    cumulative = np.cumsum(hist)
+    above = float(hist[scores >= threshold].sum())
+    return {
+        "mean": round(float((scores * hist).sum() / total), 1),
+        "min": int(present[0]),
+        "max": int(present[-1]),
+        "p95": int(np.searchsorted(cumulative, 0.95 * total)),
+        "seconds_above_threshold": round(above, 3),
+        "ratio_above_threshold": round(above / total, 4),
+    }
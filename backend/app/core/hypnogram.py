@@ -0,0 +1,216 @@
+"""
+Index des stades de sommeil d'un hypnogramme Sleep-EDF.
+
+Les annotations EDF+ (TAL : "+onset\\x15durée\\x14libellé\\x14\\x00") sont
+parsées une fois en trois tableaux triés par onset :
+
+    onset     float64  début du segment (s depuis le début du PSG)
+    duration  float32  durée (s)
+    stage     uint8    code de stade (index dans STAGES)
+
+Le cache .npz est écrit à côté de l'hypnogramme (<nom>.idx.npz) et
+invalidé si la taille ou la date du fichier source change. Recherche du
+stade à t : searchsorted sur onset (O(log n)).
+"""
+from __future__ import annotations
+
+import os
+import re
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+# Code 0 = non scoré : aussi la valeur de l'octet réservé des anciennes frames
+STAGES = ("?", "W", "N1", "N2", "N3", "REM", "MOVE")
+STAGE_CODES = {name: code for code, name in enumerate(STAGES)}
+
+# Libellés R&K de Sleep-EDF -> stades AASM (3 et 4 fusionnés en N3)
+_ANNOTATION_STAGES = {
+    "Sleep stage W": "W",
+    "Sleep stage 1": "N1",
+    "Sleep stage 2": "N2",
+    "Sleep stage 3": "N3",
+    "Sleep stage 4": "N3",
+    "Sleep stage R": "REM",
+    "Movement time": "MOVE",
+    "Sleep stage ?": "?",
+}
+
+_TAL = re.compile(rb"([+-]\d+(?:\.\d*)?)(?:\x15(\d+(?:\.\d*)?))?\x14([^\x00]*)\x00")
+_CACHE_VERSION = 1
+
+
+def parse_edf_annotations(path: str | Path) -> list[tuple[float, float, str]]:
+    """(onset, durée, libellé) de tous les TAL du signal "EDF Annotations" d'un EDF+"""
+    path = Path(path)
+    with open(path, "rb") as f:
+        head = f.read(256)
+        if len(head) < 256:
+            raise ValueError(f"Truncated EDF header: {path}")
+        n_signals = int(head[252:256])
+        sig_head = f.read(256 * n_signals)
+        data = f.read()
+
+    def field(offset: int, width: int) -> list[str]:
+        start = offset * n_signals
+        return [
+            sig_head[start + i * width: start + (i + 1) * width].decode("latin-1").strip()
+            for i in range(n_signals)
+        ]
+
+    labels = field(0, 16)
+    # labels, transducer, unités, 4 bornes, prefiltering : 216 octets avant samples/record
+    spr = [int(v) for v in field(216, 8)]
+    if "EDF Annotations" not in labels:
+        raise ValueError(f"No EDF Annotations signal in {path}")
+    index = labels.index("EDF Annotations")
+    record_bytes = 2 * sum(spr)
+    lo = 2 * sum(spr[:index])
+    hi = lo + 2 * spr[index]
+
+    annotations = []
+    for r in range(len(data) // record_bytes):
+        block = data[r * record_bytes + lo: r * record_bytes + hi]
+        for onset, duration, texts in _TAL.findall(block):
+            for text in texts.split(b"\x14"):
+                if text:
+                    annotations.append((float(onset), float(duration or 0.0), text.decode("utf-8", "replace")))
+    return annotations
+
+
+class HypnogramIndex:
+    """Segments de stades triés ; les trous entre segments sont non scorés ("?")"""
+
+    def __init__(self, onset: np.ndarray, duration: np.ndarray, stage: np.ndarray):
+        order = np.argsort(onset, kind="stable")
+        self.onset = np.ascontiguousarray(onset[order], dtype=np.float64)
+        self.duration = np.ascontiguousarray(duration[order], dtype=np.float32)
+        self.stage = np.ascontiguousarray(stage[order], dtype=np.uint8)
+        self._end = self.onset + self.duration
+
+    @classmethod
+    def from_annotations(cls, annotations: list[tuple[float, float, str]]) -> HypnogramIndex:
+        rows = [
+            (onset, duration, STAGE_CODES[_ANNOTATION_STAGES[text]])
+            for onset, duration, text in annotations
+            if text in _ANNOTATION_STAGES and duration > 0
+        ]
+        onset, duration, stage = (np.array(col) for col in zip(*rows)) if rows else ([], [], [])
+        return cls(np.asarray(onset, dtype=np.float64), np.asarray(duration), np.asarray(stage))
+
+    @classmethod
+    def load(cls, path: str | Path) -> HypnogramIndex:
+        with np.load(path) as data:
+            return cls(data["onset"], data["duration"], data["stage"])
+
+    def save(self, path: str | Path, **extra) -> None:
+        """Écriture atomique (fichier temporaire + rename)"""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, onset=self.onset, duration=self.duration, stage=self.stage, **extra)
+        os.replace(tmp, path)
+
+    def __len__(self) -> int:
+        return len(self.onset)
+
+    @property
+    def duration_seconds(self) -> float:
+        return float(self._end.max()) if len(self) else 0.0
+
+    def codes_at(self, t: np.ndarray | float) -> np.ndarray:
+        """Codes de stade aux instants t (vectorisé)"""
+        t = np.asarray(t, dtype=np.float64)
+        if not len(self):
+            return np.zeros(t.shape, dtype=np.uint8)
+        i = np.clip(np.searchsorted(self.onset, t, side="right") - 1, 0, None)
+        inside = (t >= self.onset[i]) & (t < self._end[i])
+        return np.where(inside, self.stage[i], 0).astype(np.uint8)
+
+    def stage_at(self, t: float) -> str:
+        return STAGES[int(self.codes_at(t))]
+
+    def segments(self, start: float, end: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(onset, fin, code) des segments qui recoupent [start, end), bornés à la plage"""
+        lo = max(int(np.searchsorted(self.onset, start, side="right")) - 1, 0)
+        hi = int(np.searchsorted(self.onset, end, side="left"))
+        onset = np.maximum(self.onset[lo:hi], start)
+        stop = np.minimum(self._end[lo:hi], end)
+        keep = stop > onset
+        return onset[keep], stop[keep], self.stage[lo:hi][keep]
+
+    def stage_seconds(self, start: float, end: float) -> dict[str, float]:
+        """Secondes passées dans chaque stade sur [start, end) (non scoré inclus)"""
+        onset, stop, codes = self.segments(start, end)
+        seconds = np.bincount(codes, weights=stop - onset, minlength=len(STAGES))
+        seconds[0] += max(end - start, 0.0) - seconds.sum()
+        return {name: round(float(s), 3) for name, s in zip(STAGES, seconds) if s > 0}
+
+
+def aggregate_by_stage(index: HypnogramIndex, t: np.ndarray, values: np.ndarray) -> dict[str, dict]:
+    """
+    Moyenne / maximum de values (une valeur par fenêtre finissant à t) par
+    stade. Chaque fenêtre pèse le temps écoulé depuis la précédente.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if not t.size:
+        return {}
+    steps = np.diff(t)
+    seconds = np.concatenate([[np.median(steps) if steps.size else 0.0], steps])
+    codes = index.codes_at(t)
+    n = len(STAGES)
+    count = np.bincount(codes, minlength=n)
+    total = np.bincount(codes, weights=seconds, minlength=n)
+    weighted = np.bincount(codes, weights=values * seconds, minlength=n)
+    peak = np.full(n, -np.inf)
+    np.maximum.at(peak, codes, values)
+    return {
+        STAGES[code]: {
+            "windows": int(count[code]),
+            "seconds": round(float(total[code]), 3),
+            "mean": round(float(weighted[code] / total[code]), 1) if total[code] > 0 else None,
+            "max": float(peak[code]),
+        }
+        for code in np.flatnonzero(count)
+    }
+
+
+def find_hypnogram(psg: str | Path) -> Path | None:
+    """Hypnogramme d'un PSG Sleep-EDF : même dossier, même préfixe de 7 caractères"""
+    psg = Path(psg)
+    matches = sorted(psg.parent.glob(f"{psg.name[:7]}*-Hypnogram.edf"))
+    return matches[0] if matches else None
+
+
+def cache_path(hypnogram: str | Path) -> Path:
+    hypnogram = Path(hypnogram)
+    return hypnogram.with_name(f"{hypnogram.stem}.idx.npz")
+
+
+def load_hypnogram(hypnogram: str | Path) -> HypnogramIndex:
+    """Index de l'hypnogramme, depuis le cache .npz s'il est à jour"""
+    hypnogram = Path(hypnogram)
+    stat = hypnogram.stat()
+    source = np.array([_CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    cached = cache_path(hypnogram)
+    try:
+        with np.load(cached) as data:
+            if np.array_equal(data["source"], source):
+                return HypnogramIndex(data["onset"], data["duration"], data["stage"])
+    except (OSError, KeyError, ValueError):
+        pass
+
+    index = HypnogramIndex.from_annotations(parse_edf_annotations(hypnogram))
+    try:
+        index.save(cached, source=source)
+    except OSError:
+        pass  # dossier en lecture seule : index recalculé au prochain chargement
+    return index
+
+
+def load_hypnogram_for(psg: str | Path) -> HypnogramIndex | None:
+    """Index de l'hypnogramme associé au PSG, None s'il n'y en a pas"""
+    hypnogram = find_hypnogram(psg)
+    return load_hypnogram(hypnogram) if hypnogram is not None else None
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# seq, fatigue, quality_score, samples, frames, signal_time, updated_at,
+# streaming, fatigue_ready, active_alerts, seq (copie de fin)
+_SLOT = struct.Struct("<QffQQddBBH4xQ")
+_SEQ = struct.Struct("<Q")
+
+
+@dataclass
+class LiveValue:
+    fatigue: float
+    quality_score: float
+    samples: int  # samples traités depuis le début du flux
+    frames: int
+    signal_time: float  # s
+    updated_at: float  # horodatage unix de la dernière publication
+    streaming: bool
+    fatigue_ready: bool  # fenêtre de scoring complète
+    active_alerts: int
+
+
+class LiveSlotWriter:
+    """
+    Dernière valeur d'une session, publiée par le producteur du flux.
+
+    Un enregistrement de taille fixe dans un fichier memory-mappé
+    (seqlock) : un seul écrivain, lecteurs sans verrou, y compris depuis
+    les autres workers. Le numéro de séquence est impair pendant
+    l'écriture et recopié en fin d'enregistrement.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            os.ftruncate(fd, _SLOT.size)
+            self._map = mmap.mmap(fd, _SLOT.size)
+        finally:
+            os.close(fd)
+        seq = _SEQ.unpack_from(self._map, 0)[0]
+        self._seq = seq + (seq & 1)  # reprise après un arrêt en pleine écriture
+
+    def publish(
+        self,
+        fatigue: float,
+        quality_score: float,
+        samples: int,
+        frames: int,
+        signal_time: float,
+        streaming: bool = True,
+        fatigue_ready: bool = True,
+        active_alerts: int = 0,
+    ) -> None:
+        m = self._map
+        _SEQ.pack_into(m, 0, self._seq + 1)
+        self._seq += 2
+        _SLOT.pack_into(
+            m, 0, self._seq - 1, fatigue, quality_score, samples, frames, signal_time,
+            time.time(), streaming, fatigue_ready, active_alerts, self._seq,
+        )
+        # Séquence paire en tête en dernier : la valeur est complète
+        _SEQ.pack_into(m, 0, self._seq)
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+
+
+def read_live_slot(path: str | Path, retries: int = 64) -> LiveValue | None:
+    """Lecture O(1) (une lecture non bufferisée) ; None si la session n'a jamais publié"""
+    try:
+        # buffering=0 : chaque essai relit le fichier (os.pread n'existe pas sous Windows)
+        f = open(path, "rb", buffering=0)
+    except FileNotFoundError:
+        return None
+    with f:
+        for _ in range(retries):
+            f.seek(0)
+            raw = f.read(_SLOT.size)
+            if len(raw) < _SLOT.size:
+                return None
+            fields = _SLOT.unpack(raw)
+            seq, tail = fields[0], fields[-1]
+            if seq == tail and not seq & 1:
+                if seq == 0:
+                    return None
+                return LiveValue(
+                    fatigue=fields[1],
+                    quality_score=fields[2],
+                    samples=fields[3],
+                    frames=fields[4],
+                    signal_time=fields[5],
+                    updated_at=fields[6],
+                    streaming=bool(fields[7]),
+                    fatigue_ready=bool(fields[8]),
+                    active_alerts=fields[9],
+                )
+        return None
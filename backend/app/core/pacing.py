@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+
+
+def parse_speed(value: str | float) -> float:
+    """'1', '10', 'max' -> multiplicateur de vitesse (inf = aussi vite que possible)"""
+    if isinstance(value, str) and value.strip().lower() == "max":
+        return math.inf
+    speed = float(value)
+    if not speed > 0:
+        raise ValueError(f"Invalid playback speed: {value}")
+    return speed
+
+
+class PlaybackClock:
+    """
+    Horloge de lecture sans dérive, basée sur time.monotonic().
+
+    Le chunk k est planifié à start + k * interval / speed : le temps de
+    traitement et d'envoi ne s'accumule pas d'une itération à l'autre.
+    En cas de retard, les chunks suivants partent immédiatement pour
+    rattraper l'échéancier.
+    """
+
+    def __init__(self, interval: float, speed: float = 1.0):
+        self.interval = float(interval)
+        self.speed = float(speed)
+        self._start: float | None = None
+
+    @property
+    def unpaced(self) -> bool:
+        return math.isinf(self.speed)
+
+    def start(self) -> None:
+        self._start = time.monotonic()
+
+    def deadline(self, k: int) -> float:
+        if self._start is None:
+            self.start()
+        return self._start + k * self.interval / self.speed
+
+    def lag(self, k: int) -> float:
+        """Retard (s) sur l'échéance du chunk k"""
+        if self.unpaced:
+            return 0.0
+        return max(0.0, time.monotonic() - self.deadline(k))
+
+    async def wait_for(self, k: int) -> None:
+        """Attendre l'échéance du chunk k"""
+        if self.unpaced:
+            # Vitesse max : rendre quand même la main à la boucle
+            await asyncio.sleep(0)
+            return
+        delay = self.deadline(k) - time.monotonic()
+        await asyncio.sleep(max(0.0, delay))
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """
+    Tâche de fond : appelle fn (bloquante) dans un thread toutes les
+    interval_seconds, dans la boucle asyncio du worker. Une erreur est
+    comptée et journalisée, le passage suivant réessaie.
+    """
+
+    def __init__(self, fn: Callable[[], Any], interval_seconds: float, name: str = "job"):
+        self.fn = fn
+        self.interval_seconds = max(float(interval_seconds), 0.1)
+        self.name = name
+        self.runs = 0
+        self.errors = 0
+        self.last_error: str | None = None
+        self.last_run: float | None = None  # horloge murale (time.time)
+        self.last_result: Any = None
+        self._task: asyncio.Task | None = None
+        self._lock = threading.Lock()  # un seul passage à la fois (boucle et run_once manuel)
+
+    def start(self) -> None:
+        """Démarrer la boucle (à appeler depuis la boucle asyncio)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop(), name=self.name)
+
+    async def stop(self) -> None:
+        """Arrêter la boucle ; un passage en cours dans son thread se termine seul"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def run_once(self) -> Any:
+        """Un passage synchrone ; retourne le résultat de fn (None en cas d'erreur)"""
+        with self._lock:
+            try:
+                result = self.fn()
+            except Exception as exc:
+                self.errors += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("%s: échec du passage", self.name)
+                result = None
+            else:
+                self.last_result = result
+            self.runs += 1
+            self.last_run = time.time()
+            return result
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.to_thread(self.run_once)
+            await asyncio.sleep(self.interval_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "running": self.running,
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "last_run": self.last_run,
+            "last_result": self.last_result,
+        }
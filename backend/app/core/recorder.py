@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from app.core.fatigue_series import FatigueSeriesWriter
+from app.core.sample_store import SampleStoreWriter
+
+_STOP = object()
+
+
+class SessionRecorder:
+    """
+    Étage d'enregistrement d'une session : file bornée + thread d'écriture.
+
+    Le producteur ne fait que déposer ses chunks (submit_samples /
+    submit_score) ; le thread les regroupe en lots d'au moins batch_seconds
+    de signal (ou après batch_seconds d'attente), écrit, puis fsync tous les
+    fsync_seconds. Le dépôt ne bloque jamais (il est fait sous le verrou du
+    DSP) : file pleine, les chunks débordent en mémoire, dans l'ordre, jusqu'à
+    spill_max_chunks ; au-delà ils sont jetés et comptés. close() vide la
+    file et le débordement avant de fermer.
+    """
+
+    def __init__(
+        self,
+        store: SampleStoreWriter | None,
+        fatigue_series: FatigueSeriesWriter | None = None,
+        queue_max_chunks: int = 256,
+        batch_seconds: float = 1.0,
+        fsync_seconds: float = 5.0,
+        spill_max_chunks: int = 4096,
+        name: str = "recorder",
+    ):
+        self.store = store
+        self.fatigue_series = fatigue_series
+        self.batch_samples = max(1, int(batch_seconds * store.sfreq)) if store is not None else 1
+        self.batch_seconds = batch_seconds
+        self.fsync_seconds = fsync_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_max_chunks)
+        # Débordement : tant qu'il n'est pas vide, tout dépôt y va (ordre conservé)
+        self._overflow: deque = deque()
+        self._overflow_lock = threading.Lock()
+        self.spill_max_chunks = spill_max_chunks
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+        # Métriques (écrites par le thread d'écriture, lues sans verrou)
+        self.chunks = 0
+        self.scores = 0
+        self.batches = 0
+        self.samples = 0
+        self.max_depth = 0
+        self.spilled = 0
+        self.overflow_max_depth = 0
+        self.dropped = 0
+        self.flush_ms_last = 0.0
+        self.flush_ms_max = 0.0
+        self._flush_ms_sum = 0.0
+        self.fsyncs = 0
+        self.fsync_ms_last = 0.0
+        self.fsync_ms_max = 0.0
+        self.errors = 0
+        self.last_error: str | None = None
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # --- côté producteur ---
+
+    def submit_samples(self, chunk_2d: np.ndarray) -> None:
+        if self.store is not None:
+            self._put(("samples", chunk_2d))
+
+    def submit_score(self, t: float, score: int, channel_scores: list[int]) -> None:
+        if self.fatigue_series is not None:
+            self._put(("score", (t, score, list(channel_scores))))
+
+    def close(self) -> None:
+        """Vider la file, écrire le reste, fsync et fermer les fichiers"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        with self._overflow_lock:
+            spilling = bool(self._overflow)
+            if spilling:
+                self._overflow.append(_STOP)
+        if not spilling:
+            # Plus de dépôt à ce stade (flush final) : attendre une place est sans risque
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_max_depth": self.max_depth,
+            "queue_capacity": self._queue.maxsize,
+            "chunks": self.chunks,
+            "scores": self.scores,
+            "batches": self.batches,
+            "samples": self.samples,
+            "bytes_written": self.store.bytes_written if self.store is not None else 0,
+            "overflow_depth": len(self._overflow),
+            "overflow_max_depth": self.overflow_max_depth,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+            "flush_ms_last": round(self.flush_ms_last, 3),
+            "flush_ms_mean": round(self._flush_ms_sum / self.batches, 3) if self.batches else 0.0,
+            "flush_ms_max": round(self.flush_ms_max, 3),
+            "fsyncs": self.fsyncs,
+            "fsync_ms_last": round(self.fsync_ms_last, 3),
+            "fsync_ms_max": round(self.fsync_ms_max, 3),
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "closed": self._closed,
+        }
+
+    def _put(self, item) -> None:
+        if self._closed:
+            return
+        with self._overflow_lock:
+            if not self._overflow:
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    pass
+                else:
+                    depth = self._queue.qsize()
+                    if depth > self.max_depth:
+                        self.max_depth = depth
+                    return
+            # Disque lent : débordement en mémoire, jamais d'attente côté DSP
+            if len(self._overflow) >= self.spill_max_chunks:
+                self.dropped += 1
+                self.last_error = f"Recorder overflow: {self.dropped} chunks dropped"
+                return
+            self._overflow.append(item)
+            self.spilled += 1
+            self.overflow_max_depth = max(self.overflow_max_depth, len(self._overflow))
+
+    def _next(self, timeout: float):
+        """Prochain dépôt : file d'abord (plus ancienne), puis débordement"""
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        with self._overflow_lock:
+            if self._overflow:
+                return self._overflow.popleft()
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    # --- thread d'écriture ---
+
+    def _run(self) -> None:
+        pending: list[np.ndarray] = []
+        pending_samples = 0
+        scores: list[tuple] = []
+        first_at: float | None = None
+        synced_at = time.monotonic()
+        stopping = False
+
+        while not stopping:
+            timeout = self.batch_seconds if first_at is None else max(0.0, first_at + self.batch_seconds - time.monotonic())
+            item = self._next(timeout)
+
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                kind, payload = item
+                if kind == "samples":
+                    pending.append(payload)
+                    pending_samples += payload.shape[1]
+                    self.chunks += 1
+                else:
+                    scores.append(payload)
+                    self.scores += 1
+                if first_at is None:
+                    first_at = time.monotonic()
+
+            now = time.monotonic()
+            due = first_at is not None and (
+                pending_samples >= self.batch_samples or now - first_at >= self.batch_seconds
+            )
+            if (due or stopping) and (pending or scores):
+                self._write(pending, scores)
+                self.samples += pending_samples
+                pending, pending_samples, scores, first_at = [], 0, [], None
+
+            if stopping or now - synced_at >= self.fsync_seconds:
+                self._sync()
+                synced_at = time.monotonic()
+
+        self._close_files()
+
+    def _write(self, chunks: list[np.ndarray], scores: list[tuple]) -> None:
+        started = time.perf_counter()
+        try:
+            if chunks:
+                self.store.append(chunks[0] if len(chunks) == 1 else np.concatenate(chunks, axis=1))
+                self.store.flush()
+            for t, score, channel_scores in scores:
+                self.fatigue_series.append(t, score, channel_scores)
+            if scores:
+                self.fatigue_series.flush()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+        elapsed = (time.perf_counter() - started) * 1000.0
+        self.batches += 1
+        self.flush_ms_last = elapsed
+        self._flush_ms_sum += elapsed
+        self.flush_ms_max = max(self.flush_ms_max, elapsed)
+
+    def _sync(self) -> None:
+        started = time.perf_counter()
+        try:
+            if self.store is not None:
+                self.store.sync()
+            if self.fatigue_series is not None:
+                self.fatigue_series.sync()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            return
+        elapsed = (time.perf_counter() - started) * 1000.0
+        self.fsyncs += 1
+        self.fsync_ms_last = elapsed
+        self.fsync_ms_max = max(self.fsync_ms_max, elapsed)
+
+    def _close_files(self) -> None:
+        closers = []
+        if self.store is not None:
+            # Le dernier bloc partiel n'est écrit qu'à la fermeture : fsync après
+            closers.append(lambda: self.store.close(sync=True))
+        if self.fatigue_series is not None:
+            closers.append(self.fatigue_series.close)
+        for close in closers:
+            try:
+                close()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+import numpy as np
+
+from app.core.edf_reader import EDFFormatError, EDFReader
+
+
+@dataclass(frozen=True)
+class CachedRecording:
+    """
+    Enregistrement EDF partagé (données en lecture seule).
+    Même interface de lecture qu'EDFReader : sert de repli quand le
+    lecteur memory-mappé refuse le fichier.
+    """
+    sfreq: float
+    channels: tuple[str, ...]
+    data: np.ndarray  # (n_channels, n_samples), float32, non modifiable
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes)
+
+    @property
+    def n_samples(self) -> int:
+        return int(self.data.shape[1])
+
+    @property
+    def duration(self) -> float:
+        return self.n_samples / self.sfreq
+
+    @property
+    def physical_range(self) -> None:
+        """Plage physique inconnue : pas de détection de saturation"""
+        return None
+
+    @property
+    def start_time(self) -> None:
+        return None
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """Samples [start, stop) -> copie (n_channels, n) float32 modifiable"""
+        return np.array(self.data[:, max(0, int(start)):max(0, int(stop))])
+
+
+Loader = Callable[[Path, list[str] | None], tuple[float, list[str], np.ndarray]]
+CacheKey = tuple[str, str, tuple[str, ...] | None, int]
+CacheEntry = CachedRecording | EDFReader
+
+
+class RecordingCache:
+    """
+    Cache LRU process-wide des enregistrements EDF.
+
+    Clé : (type, chemin absolu, picks, mtime). Chaque stream reçoit soit une
+    vue en lecture seule du même tableau, soit le même lecteur memory-mappé,
+    au lieu de re-parser le fichier.
+
+    default_picks : canaux ouverts quand picks n'est pas précisé.
+    fallback : loader des fichiers refusés par EDFReader (ex. MNE pour EDF+D).
+    """
+
+    def __init__(self, max_bytes: int, default_picks: Sequence[str] = (), fallback: Loader | None = None):
+        self.max_bytes = int(max_bytes)
+        self.default_picks = list(default_picks)
+        self.fallback = fallback
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading: dict[CacheKey, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(kind: str, path: Path, picks: list[str] | None) -> CacheKey:
+        resolved = Path(path).resolve()
+        mtime_ns = resolved.stat().st_mtime_ns
+        return (kind, str(resolved), tuple(picks) if picks is not None else None, mtime_ns)
+
+    def get(self, path: Path, loader: Loader, picks: list[str] | None = None) -> CachedRecording:
+        """Retourner l'enregistrement complet depuis le cache, le charger si absent"""
+        key = self.make_key("array", path, picks)
+
+        def build() -> CachedRecording:
+            sfreq, channels, data = loader(Path(key[1]), picks)
+            data = np.ascontiguousarray(data, dtype=np.float32)
+            data.setflags(write=False)
+            return CachedRecording(sfreq=float(sfreq), channels=tuple(channels), data=data)
+
+        return self._get_or_load(key, build)
+
+    def get_reader(self, path: Path, picks: list[str] | None = None) -> EDFReader | CachedRecording:
+        """
+        Retourner un lecteur memory-mappé partagé (en-tête parsé une seule fois).
+        Fichier refusé par EDFReader : enregistrement complet chargé par fallback.
+        """
+        key = self.make_key("reader", path, picks)
+        try:
+            return self._get_or_load(key, lambda: EDFReader(Path(key[1]), picks, self.default_picks))
+        except EDFFormatError:
+            if self.fallback is None:
+                raise
+            return self.get(path, self.fallback, picks)
+
+    def _get_or_load(self, key: CacheKey, build: Callable[[], CacheEntry]) -> CacheEntry:
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            # Un seul chargement par clé, même si plusieurs streams arrivent en même temps
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry
+                self.misses += 1
+
+            try:
+                entry = build()
+                with self._lock:
+                    self._store(key, entry)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+            return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # --- interne (appelé sous self._lock) ---
+
+    def _lookup(self, key: CacheKey) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def _store(self, key: CacheKey, entry: CacheEntry) -> None:
+        # Une version plus ancienne du même fichier (mtime différent) est obsolète
+        for old_key in [k for k in self._entries if k[:3] == key[:3] and k != key]:
+            self._evict(old_key)
+
+        if entry.nbytes > self.max_bytes:
+            # Trop gros pour le budget : servi sans être conservé
+            return
+
+        while self._entries and self._bytes + entry.nbytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._evict(oldest)
+
+        self._entries[key] = entry
+        self._bytes += entry.nbytes
+
+    def _evict(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+        self.evictions += 1
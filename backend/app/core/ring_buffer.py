@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class SampleRing:
+    """
+    Tampon circulaire (n_channels, n) pour les traitements à fenêtre glissante.
+
+    write() insère un chunk en O(chunk) et retourne les samples sortants
+    (zéros tant que la fenêtre n'est pas remplie), ce qui permet de tenir
+    des sommes ou des DFT glissantes à jour sans reparcourir la fenêtre.
+    """
+
+    def __init__(self, n_channels: int, n: int, dtype=np.float64):
+        self.n = n
+        self.data = np.zeros((n_channels, n), dtype=dtype)
+        self.w_idx = 0
+        self.filled = 0
+
+    @property
+    def n_channels(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def full(self) -> bool:
+        return self.filled >= self.n
+
+    def write(self, x: np.ndarray) -> np.ndarray:
+        """Insérer x (n_channels, m), m <= n, et retourner les samples remplacés"""
+        m = x.shape[1]
+        old = np.empty((self.n_channels, m), dtype=self.data.dtype)
+        for dst_lo, dst_hi, src_lo, src_hi in self._parts(m):
+            old[:, src_lo:src_hi] = self.data[:, dst_lo:dst_hi]
+            self.data[:, dst_lo:dst_hi] = x[:, src_lo:src_hi]
+        self.w_idx = (self.w_idx + m) % self.n
+        self.filled = min(self.n, self.filled + m)
+        return old
+
+    def reset(self, x: np.ndarray) -> None:
+        """Remplacer toute la fenêtre par les n derniers samples de x"""
+        self.data[:] = x[:, -self.n:]
+        self.w_idx = 0
+        self.filled = self.n
+
+    def window(self) -> np.ndarray:
+        """Fenêtre dans l'ordre chronologique (partielle tant que non remplie)"""
+        if self.filled < self.n:
+            return self.data[:, :self.filled]
+        return np.concatenate([self.data[:, self.w_idx:], self.data[:, :self.w_idx]], axis=1)
+
+    def _parts(self, m: int):
+        """Segments [dst_lo, dst_hi, src_lo, src_hi) d'une écriture de m samples"""
+        w = self.w_idx
+        first = min(m, self.n - w)
+        yield (w, w + first, 0, first)
+        if first < m:
+            yield (0, m - first, first, m)
@@ -0,0 +1,515 @@
+"""
+Stockage append-only des samples d'une session.
+
+Un dossier par session :
+
+    meta.json     sfreq, canaux, durée de bloc, dtype, paramètres de pyramide
+    samples.bin   blocs compressés (zlib), un bloc = un canal x block_seconds
+    samples.idx   index, un enregistrement de 32 octets par bloc :
+
+    offset  type     champ
+    0       int64    start (sample de début du bloc)
+    8       uint32   n_samples
+    12      uint16   canal
+    14      uint8    dtype (0 = float32, 1 = int16 * scale, delta-encodé)
+    15      1x       réservé
+    16      float32  scale
+    20      uint64   offset dans samples.bin
+    28      uint32   taille compressée
+
+    pyramid_L.bin niveau L de la pyramide (L = 1..levels) : un enregistrement
+                  float32 (n_channels, 3) = min / max / moyenne par tranche
+                  de factor**L samples, taille fixe -> accès direct par seek
+
+Les données sont écrites avant l'index : un enregistrement d'index n'existe
+que si son bloc est complet sur disque. Une lecture de plage ne lit que
+l'index (quelques Ko) puis seek sur les blocs concernés. Une lecture
+décimée (read_envelope) lit au plus ~factor enregistrements par point
+demandé, quelle que soit la durée de la session.
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+INDEX_RECORD = struct.Struct("<qIHBxfQI")
+INDEX_DTYPE = np.dtype([
+    ("start", "<i8"),
+    ("n_samples", "<u4"),
+    ("channel", "<u2"),
+    ("dtype", "u1"),
+    ("_pad", "u1"),
+    ("scale", "<f4"),
+    ("offset", "<u8"),
+    ("nbytes", "<u4"),
+])
+assert INDEX_DTYPE.itemsize == INDEX_RECORD.size
+
+STORE_DTYPES = {"float32": 0, "int16": 1}
+_RAW_BATCH = 64
+
+
+def _encode_block(x: np.ndarray, code: int, level: int) -> tuple[bytes, float]:
+    if code == 0:
+        return zlib.compress(np.ascontiguousarray(x, dtype="<f4").tobytes(), level), 1.0
+    peak = float(np.max(np.abs(x))) if x.size else 0.0
+    scale = peak / 32767.0 if peak > 0 else 1.0
+    q = np.round(x / scale).astype("<i2")
+    # Delta : les écarts entre samples voisins se compressent bien mieux
+    # (l'arithmétique int16 modulaire rend le cumsum exact au décodage)
+    delta = np.empty_like(q)
+    delta[:1] = q[:1]
+    np.subtract(q[1:], q[:-1], out=delta[1:])
+    return zlib.compress(delta.tobytes(), level), scale
+
+
+def _decode_block(raw: bytes, code: int, scale: float) -> np.ndarray:
+    data = zlib.decompress(raw)
+    if code == 0:
+        return np.frombuffer(data, dtype="<f4")
+    q = np.cumsum(np.frombuffer(data, dtype="<i2"), dtype=np.int16)
+    return q.astype(np.float32) * np.float32(scale)
+
+
+def _pyramid_path(path: Path, level: int) -> Path:
+    return path / f"pyramid_{level}.bin"
+
+
+def _reduce_buckets(stats: np.ndarray, factor: int) -> np.ndarray:
+    """(3, n_channels, k*factor) min/max/moyenne -> (3, n_channels, k)"""
+    n_ch = stats.shape[1]
+    blocks = stats.reshape(3, n_ch, -1, factor)
+    return np.stack([blocks[0].min(axis=2), blocks[1].max(axis=2), blocks[2].mean(axis=2)])
+
+
+class _PyramidBuilder:
+    """
+    Pyramide min / max / moyenne construite au fil des appends.
+
+    Chaque niveau garde moins de factor entrées en attente ; une tranche
+    complète est écrite puis propagée au niveau supérieur. Coût amorti
+    O(1) par sample, mémoire O(levels x factor).
+    """
+
+    def __init__(self, path: Path, n_channels: int, factor: int, levels: int):
+        self.path = path
+        self.n_channels = n_channels
+        self.factor = factor
+        self.levels = levels
+        self.record_size = n_channels * 3 * 4
+        self.counts = [0] * (levels + 1)
+        self._files = []
+        self._pending = [np.zeros((3, n_channels, 0), dtype=np.float32) for _ in range(levels + 1)]
+        # Niveau 1 : samples bruts en tampon fixe, réduits par lots de
+        # _RAW_BATCH tranches (pas de travail numpy à chaque petit chunk)
+        self._raw = np.empty((n_channels, factor * _RAW_BATCH), dtype=np.float32)
+        self._raw_fill = 0
+
+    def open(self, n_samples: int, read_raw) -> None:
+        """Ouvrir les niveaux et reprendre après n_samples (read_raw(start, stop) -> samples)"""
+        n_prev = n_samples
+        for level in range(1, self.levels + 1):
+            file_path = _pyramid_path(self.path, level)
+            size = file_path.stat().st_size if file_path.exists() else 0
+            # Niveau cohérent avec le précédent (arrêt brutal en pleine propagation)
+            n = min(size // self.record_size, n_prev // self.factor)
+            f = open(file_path, "ab")
+            f.truncate(n * self.record_size)
+            f.seek(n * self.record_size)
+            self._files.append(f)
+            self.counts[level] = n
+            n_prev = n
+
+        # Entrées en attente : du haut vers le bas, un niveau en retard se
+        # recalcule sans désordonner ceux du dessus
+        for level in range(self.levels, 0, -1):
+            start = self.counts[level] * self.factor
+            if level == 1:
+                self.push(read_raw(start, n_samples))
+            else:
+                self._push(level, self._read_level(level - 1, start, self.counts[level - 1]))
+
+    def push(self, chunk_2d: np.ndarray) -> None:
+        f = self.factor
+        capacity = self._raw.shape[1]
+        n = chunk_2d.shape[1]
+        pos = 0
+        if self._raw_fill:
+            pos = min(n, capacity - self._raw_fill)
+            self._raw[:, self._raw_fill:self._raw_fill + pos] = chunk_2d[:, :pos]
+            self._raw_fill += pos
+            if self._raw_fill < capacity:
+                return
+            self._emit_raw()
+
+        k = (n - pos) // f
+        if k:
+            self._emit(chunk_2d[:, pos:pos + k * f])
+            pos += k * f
+        rest = n - pos
+        if rest:
+            self._raw[:, :rest] = chunk_2d[:, pos:]
+            self._raw_fill = rest
+
+    def _emit_raw(self) -> None:
+        """Réduire les tranches complètes du tampon brut (le reste est gardé en tête)"""
+        k = self._raw_fill // self.factor
+        if k == 0:
+            return
+        used = k * self.factor
+        self._emit(self._raw[:, :used])
+        rest = self._raw_fill - used
+        self._raw[:, :rest] = self._raw[:, used:self._raw_fill]
+        self._raw_fill = rest
+
+    def _emit(self, x: np.ndarray) -> None:
+        """Samples bruts (n_channels, k*factor) -> k tranches du niveau 1"""
+        blocks = x.reshape(self.n_channels, -1, self.factor)
+        out = np.stack([blocks.min(axis=2), blocks.max(axis=2), blocks.mean(axis=2, dtype=np.float64)])
+        self._write(1, out.astype(np.float32))
+
+    def flush(self) -> None:
+        self._emit_raw()
+        for f in self._files:
+            f.flush()
+
+    def sync(self) -> None:
+        self.flush()
+        for f in self._files:
+            os.fsync(f.fileno())
+
+    def close(self) -> None:
+        self.flush()
+        for f in self._files:
+            f.close()
+
+    def _push(self, level: int, stats: np.ndarray) -> None:
+        if stats.shape[2] == 0:
+            return
+        buf = np.concatenate([self._pending[level], stats], axis=2)
+        k = buf.shape[2] // self.factor
+        self._pending[level] = buf[:, :, k * self.factor:].copy()
+        if k == 0:
+            return
+        self._write(level, _reduce_buckets(buf[:, :, :k * self.factor], self.factor))
+
+    def _write(self, level: int, out: np.ndarray) -> None:
+        # Enregistrement (n_channels, 3) par tranche
+        self._files[level - 1].write(np.ascontiguousarray(out.transpose(2, 1, 0), dtype="<f4").tobytes())
+        self.counts[level] += out.shape[2]
+        if level < self.levels:
+            self._push(level + 1, out)
+
+    def _read_level(self, level: int, start: int, stop: int) -> np.ndarray:
+        f = self._files[level - 1]
+        f.flush()
+        with open(f.name, "rb") as r:
+            r.seek(start * self.record_size)
+            raw = r.read((stop - start) * self.record_size)
+        return np.frombuffer(raw, dtype="<f4").reshape(-1, self.n_channels, 3).transpose(2, 1, 0)
+
+
+class SampleStoreWriter:
+    """
+    Écriture append-only par blocs de durée fixe.
+
+    append() accumule dans un tampon et n'écrit que des blocs complets ;
+    close() écrit le bloc partiel restant. Rouvrir un store existant
+    reprend à la fin (les données non indexées sont ignorées).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        sfreq: float,
+        channels: list[str],
+        block_seconds: float = 10.0,
+        dtype: str = "int16",
+        compression_level: int = 1,
+        pyramid_factor: int = 8,
+        pyramid_levels: int = 6,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.sfreq = float(sfreq)
+        self.channels = list(channels)
+        self.block_size = max(1, int(round(block_seconds * sfreq)))
+        self.code = STORE_DTYPES[dtype]
+        self.level = compression_level
+
+        meta_path = self.path / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta["channels"] != self.channels or meta["sfreq"] != self.sfreq:
+                raise ValueError(f"Sample store {self.path} has a different layout")
+            # La pyramide d'un store existant garde ses paramètres d'origine
+            pyramid_factor = meta.get("pyramid_factor", pyramid_factor)
+            pyramid_levels = meta.get("pyramid_levels", 0)
+        else:
+            meta_path.write_text(json.dumps({
+                "sfreq": self.sfreq,
+                "channels": self.channels,
+                "block_seconds": block_seconds,
+                "dtype": dtype,
+                "pyramid_factor": pyramid_factor,
+                "pyramid_levels": pyramid_levels,
+            }), encoding="utf-8")
+
+        index = _load_index(self.path)
+        self._data = open(self.path / "samples.bin", "ab")
+        self._index = open(self.path / "samples.idx", "ab")
+        # Reprise : données orphelines / index tronqué après un arrêt brutal
+        data_end = int((index["offset"] + index["nbytes"]).max()) if index.size else 0
+        self._data.truncate(data_end)
+        self._data.seek(data_end)
+        self._index.truncate(index.size * INDEX_RECORD.size)
+        self._index.seek(index.size * INDEX_RECORD.size)
+
+        self.n_samples = int((index["start"] + index["n_samples"]).max()) if index.size else 0
+        self.bytes_written = data_end
+        self._buffer = np.empty((len(self.channels), self.block_size), dtype=np.float32)
+        self._buffered = 0
+
+        self.pyramid: _PyramidBuilder | None = None
+        if pyramid_levels > 0:
+            self.pyramid = _PyramidBuilder(self.path, len(self.channels), pyramid_factor, pyramid_levels)
+            self._data.flush()
+            self.pyramid.open(self.n_samples, SampleStoreReader(self.path).read)
+
+    def append(self, chunk_2d: np.ndarray) -> None:
+        """Ajouter un chunk (n_channels, n_samples) à la fin de la session"""
+        if self.pyramid is not None:
+            self.pyramid.push(chunk_2d)
+        pos = 0
+        n = chunk_2d.shape[1]
+        while pos < n:
+            take = min(n - pos, self.block_size - self._buffered)
+            self._buffer[:, self._buffered:self._buffered + take] = chunk_2d[:, pos:pos + take]
+            self._buffered += take
+            pos += take
+            if self._buffered == self.block_size:
+                self._write_block()
+
+    def flush(self) -> None:
+        """Pousser les blocs écrits vers l'OS (le bloc en cours reste en mémoire)"""
+        self._data.flush()
+        self._index.flush()
+        if self.pyramid is not None:
+            self.pyramid.flush()
+
+    def sync(self) -> None:
+        """flush + fsync : les blocs écrits survivent à une coupure"""
+        self.flush()
+        os.fsync(self._data.fileno())
+        os.fsync(self._index.fileno())
+        if self.pyramid is not None:
+            self.pyramid.sync()
+
+    def close(self, sync: bool = False) -> None:
+        """Écrire le bloc en cours et fermer ; sync=True : fsync après ce dernier bloc"""
+        if self._data.closed:
+            return
+        if self._buffered:
+            self._write_block()
+        if sync:
+            self.sync()
+        else:
+            self.flush()
+        self._data.close()
+        self._index.close()
+        if self.pyramid is not None:
+            self.pyramid.close()
+
+    def _write_block(self) -> None:
+        n = self._buffered
+        records = []
+        for ch in range(len(self.channels)):
+            raw, scale = _encode_block(self._buffer[ch, :n], self.code, self.level)
+            offset = self.bytes_written
+            self._data.write(raw)
+            self.bytes_written += len(raw)
+            records.append(INDEX_RECORD.pack(self.n_samples, n, ch, self.code, scale, offset, len(raw)))
+        # Index après les données : jamais d'entrée vers un bloc incomplet
+        self._data.flush()
+        self._index.write(b"".join(records))
+        self.n_samples += n
+        self._buffered = 0
+
+
+def _load_index(path: Path) -> np.ndarray:
+    try:
+        raw = (path / "samples.idx").read_bytes()
+    except FileNotFoundError:
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    n = len(raw) // INDEX_RECORD.size
+    index = np.frombuffer(raw, dtype=INDEX_DTYPE, count=n)
+
+    data_path = path / "samples.bin"
+    data_size = data_path.stat().st_size if data_path.exists() else 0
+    return index[index["offset"] + index["nbytes"] <= data_size]
+
+
+@dataclass
+class Envelope:
+    """Signal décimé : un point = step samples à partir de start (min / max / moyenne par canal)"""
+    start: int
+    stop: int  # fin des samples couverts par le dernier point, bornée par l'enregistrement
+    step: int
+    level: int  # 0 = samples bruts
+    min: np.ndarray  # (n_channels, n_points)
+    max: np.ndarray
+    mean: np.ndarray
+
+
+class SampleStoreReader:
+    """Lecture de plages de temps : recherche dichotomique dans l'index + seek"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No sample store in {self.path}")
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        self.sfreq = float(meta["sfreq"])
+        self.channels = list(meta["channels"])
+        self.block_seconds = float(meta["block_seconds"])
+
+        index = _load_index(self.path)
+        # Un index trié par début de bloc, par canal
+        self._blocks = []
+        for ch in range(len(self.channels)):
+            sub = index[index["channel"] == ch]
+            self._blocks.append(sub[np.argsort(sub["start"], kind="stable")])
+        self.n_samples = min(
+            (int((b["start"] + b["n_samples"]).max()) if b.size else 0) for b in self._blocks
+        ) if self._blocks else 0
+
+        # Tranches complètes par niveau, bornées par les samples indexés
+        # (la pyramide peut être en avance sur le dernier bloc écrit)
+        self.pyramid_factor = int(meta.get("pyramid_factor", 8))
+        self._record_size = len(self.channels) * 3 * 4
+        self._level_counts = [self.n_samples]
+        for level in range(1, int(meta.get("pyramid_levels", 0)) + 1):
+            file_path = _pyramid_path(self.path, level)
+            size = file_path.stat().st_size if file_path.exists() else 0
+            self._level_counts.append(
+                min(size // self._record_size, self._level_counts[-1] // self.pyramid_factor)
+            )
+
+    @property
+    def duration(self) -> float:
+        return self.n_samples / self.sfreq
+
+    def read(self, start: int, stop: int, channels: list[str] | None = None) -> np.ndarray:
+        """Samples [start, stop) -> (n_channels, n) float32"""
+        start = max(0, int(start))
+        stop = min(self.n_samples, int(stop))
+        picks = [self.channels.index(ch) for ch in channels] if channels else range(len(self.channels))
+        out = np.zeros((len(picks), max(0, stop - start)), dtype=np.float32)
+        if stop <= start:
+            return out
+
+        with open(self.path / "samples.bin", "rb") as f:
+            for row, ch in enumerate(picks):
+                blocks = self._blocks[ch]
+                starts = blocks["start"]
+                first = max(0, int(np.searchsorted(starts, start, side="right")) - 1)
+                last = int(np.searchsorted(starts, stop, side="left"))
+                for b in blocks[first:last]:
+                    b_start = int(b["start"])
+                    b_stop = b_start + int(b["n_samples"])
+                    if b_stop <= start:
+                        continue
+                    f.seek(int(b["offset"]))
+                    values = _decode_block(f.read(int(b["nbytes"])), int(b["dtype"]), float(b["scale"]))
+                    lo, hi = max(start, b_start), min(stop, b_stop)
+                    out[row, lo - start:hi - start] = values[lo - b_start:hi - b_start]
+        return out
+
+    def read_seconds(self, t_start: float, t_stop: float, channels: list[str] | None = None) -> np.ndarray:
+        return self.read(int(round(t_start * self.sfreq)), int(round(t_stop * self.sfreq)), channels)
+
+    def read_envelope(self, start: int, stop: int, max_points: int) -> Envelope:
+        """
+        Samples [start, stop) ramenés à au plus max_points points.
+
+        Niveau le plus grossier dont la tranche reste plus fine qu'un point ;
+        la plage est alignée sur les tranches de ce niveau. Le coût dépend de
+        max_points et du nombre de niveaux, pas de la durée de la session.
+        """
+        stop = min(self.n_samples, int(stop))
+        start = min(max(0, int(start)), max(stop, 0))
+        max_points = max(1, int(max_points))
+        if stop - start <= max_points:
+            x = self.read(start, stop)
+            return Envelope(start=start, stop=start + x.shape[1], step=1, level=0, min=x, max=x, mean=x)
+
+        per_point = -(-(stop - start) // max_points)
+        level = 0
+        while level + 1 < len(self._level_counts) and self.pyramid_factor ** (level + 1) <= per_point:
+            level += 1
+        size = self.pyramid_factor ** level
+        group = -(-per_point // size)
+
+        a = start // size * size
+        b = min(self.n_samples, -(-stop // size) * size)
+        lo, hi, total, count = self._level_stats(level, a, b)
+
+        # Regroupement de `group` tranches par point
+        idx = np.arange(0, lo.shape[1], group)
+        counts = np.add.reduceat(count, idx)
+        return Envelope(
+            start=a,
+            stop=min(a + idx.size * size * group, self.n_samples),
+            step=size * group,
+            level=level,
+            min=np.minimum.reduceat(lo, idx, axis=1),
+            max=np.maximum.reduceat(hi, idx, axis=1),
+            mean=(np.add.reduceat(total, idx, axis=1) / counts).astype(np.float32),
+        )
+
+    def _level_stats(self, level: int, a: int, b: int):
+        """min, max, somme (n_channels, k) et effectifs (k,) des tranches du niveau sur [a, b)"""
+        if level == 0:
+            x = self.read(a, b)
+            return x, x, x.astype(np.float64), np.ones(x.shape[1])
+
+        size = self.pyramid_factor ** level
+        first = a // size
+        last = min(-(-b // size), self._level_counts[level])
+        parts = []
+        if last > first:
+            with open(_pyramid_path(self.path, level), "rb") as f:
+                f.seek(first * self._record_size)
+                raw = f.read((last - first) * self._record_size)
+            rec = np.frombuffer(raw, dtype="<f4").reshape(-1, len(self.channels), 3)
+            parts.append((
+                rec[:, :, 0].T,
+                rec[:, :, 1].T,
+                rec[:, :, 2].T.astype(np.float64) * size,
+                np.full(rec.shape[0], float(size)),
+            ))
+
+        tail = max(a, last * size)
+        if tail < b:
+            # Tranches pas encore écrites à ce niveau : agrégées depuis le
+            # niveau inférieur, factor entrées par tranche
+            lo, hi, total, count = self._level_stats(level - 1, tail, b)
+            idx = np.arange(0, lo.shape[1], self.pyramid_factor)
+            parts.append((
+                np.minimum.reduceat(lo, idx, axis=1),
+                np.maximum.reduceat(hi, idx, axis=1),
+                np.add.reduceat(total, idx, axis=1),
+                np.add.reduceat(count, idx),
+            ))
+
+        if not parts:
+            empty = np.zeros((len(self.channels), 0), dtype=np.float32)
+            return empty, empty, empty.astype(np.float64), np.zeros(0)
+        return tuple(np.concatenate(p, axis=-1) for p in zip(*parts))
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def validate_session_id(session_id: str | int) -> str:
+    """session_id -> nom de dossier sûr (id entier de t_session_mesure ou uuid)"""
+    key = str(session_id)
+    if not _SESSION_ID.match(key):
+        raise ValueError(f"Invalid session id: {session_id!r}")
+    return key
+
+
+class SessionArtifacts:
+    """Fichiers d'une session (samples, résumé qualité, ...), un dossier par session_id"""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def session_dir(self, session_id: str | int, create: bool = False) -> Path:
+        path = self.root / validate_session_id(session_id)
+        if create:
+            path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def samples_dir(self, session_id: str | int, create: bool = False) -> Path:
+        """Dossier du stockage de samples (SampleStoreWriter / SampleStoreReader)"""
+        path = self.session_dir(session_id, create) / "samples"
+        if create:
+            path.mkdir(exist_ok=True)
+        return path
+
+    def fatigue_dir(self, session_id: str | int, create: bool = False) -> Path:
+        """Dossier de la série fatigue (FatigueSeriesWriter / FatigueSeriesReader)"""
+        path = self.session_dir(session_id, create) / "fatigue"
+        if create:
+            path.mkdir(exist_ok=True)
+        return path
+
+    def epochs_dir(self, session_id: str | int) -> Path:
+        """Table de features par epoch (write_epoch_table / EpochTable)"""
+        return self.session_dir(session_id) / "epochs"
+
+    def hypnogram_path(self, session_id: str | int, create: bool = False) -> Path:
+        """Index des stades de sommeil de l'enregistrement (HypnogramIndex.save / load)"""
+        return self.session_dir(session_id, create) / "hypnogram.npz"
+
+    def live_slot_path(self, session_id: str | int, create: bool = False) -> Path:
+        """Dernière valeur publiée par le flux (LiveSlotWriter / read_live_slot)"""
+        return self.session_dir(session_id, create) / "live.bin"
+
+    def write_json(self, session_id: str | int, name: str, data: dict) -> None:
+        """Écriture atomique (fichier temporaire + rename) : jamais de JSON tronqué"""
+        path = self.session_dir(session_id, create=True) / f"{name}.json"
+        # Nom temporaire unique : écritures concurrentes (thread DSP / fin de flux) sans collision
+        tmp = path.with_name(f".{name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def request_stop(self, session_id: str | int) -> float:
+        """Demande d'arrêt du flux de la session, relue par le worker qui le porte"""
+        requested_at = time.time()
+        self.write_json(session_id, "stop", {"requested_at": requested_at})
+        return requested_at
+
+    def stop_requested_at(self, session_id: str | int) -> float | None:
+        data = self.read_json(session_id, "stop")
+        return float(data["requested_at"]) if data else None
+
+    def read_json(self, session_id: str | int, name: str) -> dict | None:
+        path = self.session_dir(session_id) / f"{name}.json"
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,54 @@
+"""
+Statistiques résumées d'une session (une ligne de t_session_resume).
+
+Calculées une fois en fin de session depuis les agrégats déjà tenus par
+le flux (histogramme fatigue, résumé qualité) ou, pour un import, depuis
+la table des epochs : jamais depuis les samples.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from app.core.fatigue_series import summarize_histogram
+
+
+def _stats(histogram_seconds, duration: float, quality_mean, quality_min, threshold: float) -> dict:
+    fatigue = summarize_histogram(histogram_seconds, threshold)
+    return {
+        "duration_s": round(float(duration), 3),
+        "fatigue_mean": fatigue["mean"],
+        "fatigue_max": fatigue["max"],
+        "fatigue_p95": fatigue["p95"],
+        "fatigue_above_s": fatigue["seconds_above_threshold"],
+        "quality_mean": round(float(quality_mean), 1) if quality_mean is not None else None,
+        "quality_min": int(quality_min) if quality_min is not None else None,
+    }
+
+
+def summarize_session(fatigue: dict | None, quality: dict | None, threshold: float) -> dict:
+    """Depuis FatigueSummary.to_dict() / QualitySummary.to_dict() (fin de flux)"""
+    fatigue = fatigue or {}
+    quality = quality or {}
+    # Durée de signal traité : la série fatigue ne commence qu'une fois la fenêtre pleine
+    duration = max(quality.get("duration_seconds", 0.0), fatigue.get("duration_seconds", 0.0))
+    return _stats(
+        fatigue.get("histogram_seconds", [0.0]),
+        duration,
+        quality.get("quality_score"),
+        quality.get("min_quality_score"),
+        threshold,
+    )
+
+
+def summarize_epochs(columns: dict[str, np.ndarray], epoch_seconds: float, threshold: float) -> dict:
+    """Depuis les colonnes fatigue / quality de la table des epochs (import)"""
+    fatigue = np.asarray(columns["fatigue"], dtype=np.int64)
+    quality = np.asarray(columns["quality"], dtype=np.float64)
+    histogram = np.bincount(np.clip(fatigue, 0, 100), minlength=101) * epoch_seconds
+    return _stats(
+        histogram,
+        fatigue.size * epoch_seconds,
+        quality.mean() if quality.size else None,
+        quality.min() if quality.size else None,
+        threshold,
+    )
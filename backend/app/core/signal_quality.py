@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.core.ring_buffer import SampleRing
+
+# Drapeaux par sample, empilés par bloc de n_channels lignes
+_FLAGS = ("flat", "clip", "outlier")
+
+
+@dataclass
+class ChannelQuality:
+    score: int  # 0-100
+    flat_ratio: float  # part de samples sans variation
+    clip_ratio: float  # part de samples en butée de la plage physique
+    outlier_ratio: float  # part de samples à plus de outlier_z écarts-types
+    line_noise_ratio: float  # puissance secteur / puissance totale
+    std: float  # écart-type (V)
+
+
+@dataclass
+class QualityReport:
+    score: int  # 0-100, moyenne des canaux
+    label: str  # Good / Fair / Poor / No signal
+    channels: list[ChannelQuality]
+
+
+def quality_label(score: float, signal_lost: bool = False) -> str:
+    if signal_lost:
+        return "No signal"
+    if score >= 80:
+        return "Good"
+    if score >= 50:
+        return "Fair"
+    return "Poor"
+
+
+def channel_scores(
+    flat: np.ndarray,
+    clip: np.ndarray,
+    outlier: np.ndarray,
+    line: np.ndarray,
+    std: np.ndarray,
+    min_std: float = 0.5e-6,
+    max_std: float = 200e-6,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Score 0-100 par canal depuis les parts de samples drapeautés.
+    Retourne (scores int, canal perdu bool). Tableaux de même forme.
+    """
+    # Pénalités multiplicatives ; 5 % de saturation / d'aberrants suffit à annuler le canal
+    q = (
+        (1.0 - flat)
+        * np.clip(1.0 - clip / 0.05, 0.0, 1.0)
+        * np.clip(1.0 - outlier / 0.05, 0.0, 1.0)
+        * np.clip(1.0 - line / 0.5, 0.0, 1.0)
+    )
+    q = np.where(std > max_std, 0.5 * q, q)
+    lost = (flat >= 0.5) | (std < min_std)
+    return np.rint(100 * np.where(lost, 0.0, q)).astype(int), lost
+
+
+class SignalQualityEstimator:
+    """
+    Qualité du signal incrémentale sur fenêtre glissante, par canal.
+
+    Chaque push coûte O(chunk) : les drapeaux (flatline, saturation,
+    valeur aberrante) sont calculés sur les samples entrants et comptés
+    dans la fenêtre via le tampon circulaire ; moyenne / variance et la DFT
+    d'un seul bin à la fréquence secteur sont tenues à jour de la même façon.
+    À appliquer sur le signal brut (avant filtrage, sinon le notch masque
+    le bruit secteur).
+    """
+
+    def __init__(
+        self,
+        sfreq: float,
+        window_seconds: float = 2.0,
+        line_hz: float = 50.0,
+        physical_range: tuple[np.ndarray, np.ndarray] | None = None,
+        flat_eps: float = 1e-9,
+        clip_margin: float = 0.002,
+        outlier_z: float = 6.0,
+        min_std: float = 0.5e-6,
+        max_std: float = 200e-6,
+        resync_seconds: float = 60.0,
+    ):
+        self.sfreq = float(sfreq)
+        self.n = max(2, int(window_seconds * sfreq))
+        self.flat_eps = flat_eps
+        self.outlier_z = outlier_z
+        self.min_std = min_std
+        self.max_std = max_std
+        self.resync_every = max(self.n, int(resync_seconds * sfreq))
+
+        self._clip_low = self._clip_high = None
+        if physical_range is not None:
+            low, high = (np.asarray(v, dtype=np.float64) for v in physical_range)
+            margin = clip_margin * (high - low)
+            self._clip_low = low + margin
+            self._clip_high = high - margin
+
+        # Bruit secteur : DFT glissante d'un seul bin (désactivée au-delà de Nyquist)
+        nyquist = self.sfreq / 2.0
+        self._line_enabled = 0 < line_hz <= nyquist
+        self._omega = 2.0 * np.pi * line_hz / self.sfreq
+        self._line_factor = 1.0 if np.isclose(line_hz, nyquist) else 2.0
+        self._phase_cache: dict[int, tuple[complex, np.ndarray]] = {}
+
+        self._ring: SampleRing | None = None
+        self._flags: SampleRing | None = None
+        self.report = QualityReport(score=100, label="Good", channels=[])
+
+    def push(self, chunk_2d: np.ndarray) -> QualityReport:
+        """Ajouter un chunk brut (n_channels, n_samples) et retourner la qualité courante"""
+        if chunk_2d.size == 0:
+            return self.report
+
+        x = np.asarray(chunk_2d, dtype=np.float64)
+        if self._ring is None or self._ring.n_channels != x.shape[0]:
+            self._allocate(x.shape[0])
+
+        if x.shape[1] >= self.n:
+            x = x[:, -self.n:]
+            self._last = x[:, 0].copy()
+            self._ring.reset(x)
+            self._flags.reset(self._sample_flags(x))
+            self._resync()
+        else:
+            flags = self._sample_flags(x)
+            old = self._ring.write(x)
+            old_flags = self._flags.write(flags)
+            self._update_sums(old, x, old_flags, flags)
+
+        self.report = self._compute_report()
+        return self.report
+
+    # --- interne ---
+
+    def _allocate(self, n_channels: int) -> None:
+        self._ring = SampleRing(n_channels, self.n)
+        self._flags = SampleRing(len(_FLAGS) * n_channels, self.n, dtype=bool)
+        self._sum = np.zeros(n_channels)
+        self._sumsq = np.zeros(n_channels)
+        self._counts = np.zeros(len(_FLAGS) * n_channels, dtype=np.int64)
+        self._line = np.zeros(n_channels, dtype=np.complex128)
+        self._last: np.ndarray | None = None
+        self._since_resync = 0
+
+    def _sample_flags(self, x: np.ndarray) -> np.ndarray:
+        """Drapeaux des samples entrants (3·n_channels, m), comparés à la fenêtre courante"""
+        n_ch = x.shape[0]
+        flags = np.zeros((len(_FLAGS) * n_ch, x.shape[1]), dtype=bool)
+
+        diff = np.empty_like(x)
+        diff[:, 0] = x[:, 0] - (x[:, 0] if self._last is None else self._last)
+        diff[:, 1:] = x[:, 1:] - x[:, :-1]
+        np.less_equal(np.abs(diff), self.flat_eps, out=flags[:n_ch])
+        self._last = x[:, -1].copy()
+
+        if self._clip_low is not None:
+            np.logical_or(
+                x <= self._clip_low[:, np.newaxis],
+                x >= self._clip_high[:, np.newaxis],
+                out=flags[n_ch:2 * n_ch],
+            )
+
+        # Valeurs aberrantes : seulement une fois une seconde de signal accumulée
+        filled = self._ring.filled
+        if filled >= self.sfreq:
+            mean = self._sum / filled
+            std = np.sqrt(np.maximum(self._sumsq / filled - mean ** 2, 0.0))
+            limit = np.where(std > 0, self.outlier_z * std, np.inf)
+            np.greater(np.abs(x - mean[:, np.newaxis]), limit[:, np.newaxis], out=flags[2 * n_ch:])
+        return flags
+
+    def _update_sums(self, old, x, old_flags, flags) -> None:
+        self._sum += x.sum(axis=1) - old.sum(axis=1)
+        self._sumsq += np.einsum("ij,ij->i", x, x) - np.einsum("ij,ij->i", old, old)
+        self._counts += flags.sum(axis=1) - old_flags.sum(axis=1)
+
+        if self._line_enabled:
+            shift, e_step = self._phases(x.shape[1])
+            self._line = shift * (self._line + np.concatenate([old, x], axis=1) @ e_step)
+
+        self._since_resync += x.shape[1]
+        if self._since_resync >= self.resync_every:
+            self._resync()
+
+    def _phases(self, m: int):
+        cached = self._phase_cache.get(m)
+        if cached is None:
+            j = np.arange(m)
+            shift = np.exp(1j * self._omega * m)
+            e_old = -np.exp(-1j * self._omega * j)
+            e_new = np.exp(-1j * self._omega * (self.n + j))
+            cached = (shift, np.concatenate([e_old, e_new]))
+            self._phase_cache[m] = cached
+        return cached
+
+    def _resync(self) -> None:
+        """Recalcul exact des sommes et de la DFT depuis le tampon (borne la dérive)"""
+        # Ordre chronologique : la fenêtre non remplie reste précédée de zéros
+        data = np.concatenate(
+            [self._ring.data[:, self._ring.w_idx:], self._ring.data[:, :self._ring.w_idx]], axis=1
+        )
+        self._sum = data.sum(axis=1)
+        self._sumsq = np.einsum("ij,ij->i", data, data)
+        self._counts = self._flags.data.sum(axis=1)
+        if self._line_enabled:
+            self._line = data @ np.exp(-1j * self._omega * np.arange(self.n))
+        self._since_resync = 0
+
+    def _compute_report(self) -> QualityReport:
+        filled = max(1, self._ring.filled)
+        mean = self._sum / filled
+        var = np.maximum(self._sumsq / filled - mean ** 2, 0.0)
+        std = np.sqrt(var)
+        flat, clip, outlier = (self._counts / filled).reshape(len(_FLAGS), -1)
+
+        if self._line_enabled:
+            line_power = self._line_factor * np.abs(self._line) ** 2 / filled ** 2
+            line = np.clip(line_power / (var + 1e-30), 0.0, 1.0)
+        else:
+            line = np.zeros_like(std)
+
+        scores, lost = channel_scores(flat, clip, outlier, line, std, self.min_std, self.max_std)
+
+        channels = [
+            ChannelQuality(
+                score=int(scores[c]),
+                flat_ratio=float(flat[c]),
+                clip_ratio=float(clip[c]),
+                outlier_ratio=float(outlier[c]),
+                line_noise_ratio=float(line[c]),
+                std=float(std[c]),
+            )
+            for c in range(std.size)
+        ]
+        score = int(round(float(scores.mean()))) if scores.size else 0
+        return QualityReport(score=score, label=quality_label(score, bool(lost.all())), channels=channels)
+
+
+class QualitySummary:
+    """Résumé qualité d'une session, pondéré par la durée de signal (mémoire constante)"""
+
+    def __init__(self, channels: list[str]):
+        self.channels = list(channels)
+        self.seconds = 0.0
+        self._score_sum = 0.0
+        self.min_score: int | None = None
+        self.label_seconds: dict[str, float] = {}
+        self._metric_sums = np.zeros((len(channels), 5))
+
+    @classmethod
+    def from_dict(cls, channels: list[str], data: dict | None) -> QualitySummary:
+        """
+        Reprendre le résumé d'une session déjà enregistrée (flux relancé),
+        depuis les sommes brutes (state) ; valeurs arrondies pour un
+        résumé écrit avant leur ajout.
+        """
+        summary = cls(channels)
+        names = [ch["name"] for ch in data.get("channels", [])] if data else None
+        state = data.get("state") if data else None
+        if names == summary.channels and state is not None:
+            summary.seconds = state["seconds"]
+            summary._score_sum = state["score_sum"]
+            summary.min_score = data["min_quality_score"]
+            summary.label_seconds = dict(state["label_seconds"])
+            metric_sums = np.asarray(state["metric_sums"], dtype=np.float64)
+            if metric_sums.shape == summary._metric_sums.shape:
+                summary._metric_sums = metric_sums
+        elif names == summary.channels and data.get("quality_score") is not None:
+            summary.seconds = data["duration_seconds"]
+            summary._score_sum = data["quality_score"] * summary.seconds
+            summary.min_score = data["min_quality_score"]
+            summary.label_seconds = dict(data["label_seconds"])
+            summary._metric_sums = np.array([
+                [ch["quality_score"], ch["flat_ratio"], ch["clip_ratio"], ch["outlier_ratio"], ch["line_noise_ratio"]]
+                for ch in data["channels"]
+            ], dtype=np.float64) * summary.seconds
+        return summary
+
+    def update(self, report: QualityReport, seconds: float) -> None:
+        if seconds <= 0 or not report.channels:
+            return
+        self.seconds += seconds
+        self._score_sum += report.score * seconds
+        self.min_score = report.score if self.min_score is None else min(self.min_score, report.score)
+        self.label_seconds[report.label] = self.label_seconds.get(report.label, 0.0) + seconds
+        metrics = np.array([
+            [ch.score, ch.flat_ratio, ch.clip_ratio, ch.outlier_ratio, ch.line_noise_ratio]
+            for ch in report.channels
+        ])
+        if metrics.shape == self._metric_sums.shape:
+            self._metric_sums += metrics * seconds
+
+    @property
+    def score(self) -> int | None:
+        if self.seconds <= 0:
+            return None
+        return int(round(self._score_sum / self.seconds))
+
+    def to_dict(self) -> dict:
+        means = self._metric_sums / self.seconds if self.seconds > 0 else self._metric_sums
+        return {
+            "duration_seconds": round(self.seconds, 3),
+            "quality_score": self.score,
+            "quality_label": quality_label(self.score) if self.score is not None else None,
+            "min_quality_score": self.min_score,
+            "label_seconds": {k: round(v, 3) for k, v in self.label_seconds.items()},
+            "channels": [
+                {
+                    "name": name,
+                    "quality_score": int(round(m[0])),
+                    "flat_ratio": round(float(m[1]), 4),
+                    "clip_ratio": round(float(m[2]), 4),
+                    "outlier_ratio": round(float(m[3]), 4),
+                    "line_noise_ratio": round(float(m[4]), 4),
+                }
+                for name, m in zip(self.channels, means)
+            ],
+            # Sommes non arrondies : reprise exacte par from_dict
+            "state": {
+                "seconds": self.seconds,
+                "score_sum": self._score_sum,
+                "label_seconds": dict(self.label_seconds),
+                "metric_sums": self._metric_sums.tolist(),
+            },
+        }
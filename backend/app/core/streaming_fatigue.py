@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.core.eeg_processor import EEGProcessor
+from app.core.ring_buffer import SampleRing
+
+
+class StreamingFatigueScorer:
+    """
+    Score fatigue incrémental sur fenêtre glissante (DFT glissante).
+
+    Reproduit EEGProcessor.compute_channel_fatigue (score par canal, detrend
+    par la moyenne, fenêtre de Hanning, FFT, puis fusion pondérée) sans
+    recalculer de FFT complète : seuls les bins des bandes theta et alpha
+    sont suivis, pour tous les canaux en un seul produit matriciel.
+
+    La fenêtre de Hanning numpy (dénominateur N-1) se décompose en trois
+    exponentielles complexes, donc le spectre fenêtré d'un bin k vaut
+        0.5·S(ωk) - 0.25·S(ωk - a) - 0.25·S(ωk + a),  a = 2π/(N-1)
+    où S(ω) est la DFT non fenêtrée mise à jour en O(chunk) à chaque push.
+    Le detrend est une constante retranchée : -mean·W(ωk), W précalculé.
+
+    Tolérance : écart de ±1 point au plus avec compute_channel_fatigue
+    (arrondi à l'entier du calcul float32 de référence vs float64 ici).
+    Pendant le remplissage de la fenêtre, le calcul de référence est utilisé.
+    """
+
+    def __init__(
+        self,
+        processor: EEGProcessor,
+        sfreq: float,
+        window_seconds: float,
+        score_interval_seconds: float | None = None,
+        resync_seconds: float = 60.0,
+        channel_weights: np.ndarray | None = None,
+        quality_weighting: bool = True,
+    ):
+        self.processor = processor
+        self.channel_weights = channel_weights
+        self.quality_weighting = quality_weighting
+        self.sfreq = float(sfreq)
+        self.n = int(window_seconds * sfreq)
+
+        # Cadence de scoring indépendante de la taille des chunks
+        interval = score_interval_seconds or 0.0
+        self.hop = max(1, int(round(interval * sfreq)))
+        self.resync_every = max(self.n, int(resync_seconds * sfreq))
+
+        # Historique (n_channels, n), alloué au premier chunk
+        self._ring: SampleRing | None = None
+        self._sum = np.zeros(0)
+        self._since_score = self.hop
+        self._since_resync = 0
+        self.score = 0
+        self.channel_scores: list[int] = []
+        self.scored = 0  # nombre de fenêtres scorées (détection des nouveaux scores)
+
+        n = self.n
+        freqs = np.fft.rfftfreq(n, d=1.0 / sfreq)
+        self._theta = np.flatnonzero((freqs >= processor.theta_min) & (freqs < processor.theta_max))
+        self._alpha = np.flatnonzero((freqs >= processor.alpha_min) & (freqs < processor.alpha_max))
+        bins = np.concatenate([self._theta, self._alpha])
+        n_bins = bins.size
+
+        a = 2.0 * np.pi / (n - 1) if n > 1 else 0.0
+        wk = 2.0 * np.pi * bins / n
+        # Fréquences suivies : [ωk, ωk - a, ωk + a]
+        self._omega = np.concatenate([wk, wk - a, wk + a])
+        self._n_bins = n_bins
+        self._S = np.zeros((0, self._omega.size), dtype=np.complex128)
+        self._phase_cache: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+        win = np.hanning(n) if n > 0 else np.zeros(0)
+        idx = np.arange(n)
+        self._win_dft = (np.exp(-1j * np.outer(wk, idx)) @ win) if n_bins else np.zeros(0)
+
+    @property
+    def ready(self) -> bool:
+        """Fenêtre complète : le score ne porte plus sur un signal partiel"""
+        return self._ring is not None and self._ring.full
+
+    def push(self, chunk_2d: np.ndarray) -> int:
+        """Ajouter un chunk (n_channels, n_samples) et retourner le score courant"""
+        if chunk_2d.size == 0 or self.n < 16:
+            return self.score
+
+        x = np.asarray(chunk_2d, dtype=np.float64)
+        if self._ring is None or self._ring.n_channels != x.shape[0]:
+            self._allocate(x.shape[0])
+
+        m = x.shape[1]
+        if m >= self.n:
+            self._ring.reset(x)
+            self._resync()
+        elif not self._ring.full:
+            self._ring.write(x)
+            if self._ring.full:
+                self._resync()
+        else:
+            self._slide(x)
+
+        self._since_score += m
+        if self._since_score >= self.hop:
+            self._since_score = 0
+            self.score, self.channel_scores = self._compute_scores()
+            self.scored += 1
+        return self.score
+
+    # --- interne ---
+
+    def _allocate(self, n_channels: int) -> None:
+        self._ring = SampleRing(n_channels, self.n)
+        self._S = np.zeros((n_channels, self._omega.size), dtype=np.complex128)
+
+    def _slide(self, x: np.ndarray) -> None:
+        m = x.shape[1]
+        old = self._ring.write(x)
+        self._sum += x.sum(axis=1) - old.sum(axis=1)
+
+        # Tous les canaux en un seul produit : (n_ch, 2m) @ (2m, F)
+        shift, e_step = self._phases(m)
+        self._S = shift * (self._S + np.concatenate([old, x], axis=1) @ e_step)
+
+        self._since_resync += m
+        if self._since_resync >= self.resync_every:
+            self._resync()
+
+    def _phases(self, m: int):
+        cached = self._phase_cache.get(m)
+        if cached is None:
+            j = np.arange(m)
+            shift = np.exp(1j * self._omega * m)
+            # Samples sortants (signe -) puis entrants, en un seul produit matriciel
+            e_old = -np.exp(-1j * np.outer(self._omega, j))
+            e_new = np.exp(-1j * np.outer(self._omega, self.n + j))
+            cached = (shift, np.hstack([e_old, e_new]).T.copy())
+            self._phase_cache[m] = cached
+        return cached
+
+    def _resync(self) -> None:
+        """Recalcul exact de S (borne la dérive numérique de la récurrence)"""
+        x = self._ring.window()
+        idx = np.arange(self.n)
+        self._S = x @ np.exp(-1j * np.outer(idx, self._omega))
+        self._sum = x.sum(axis=1)
+        self._since_resync = 0
+
+    def _compute_scores(self) -> tuple[int, list[int]]:
+        if not self._ring.full:
+            return self.processor.compute_channel_fatigue(
+                self._ring.window(),
+                self.sfreq,
+                weights=self.channel_weights,
+                quality_weighting=self.quality_weighting,
+            )
+
+        k = self._n_bins
+        mean = self._sum / self.n
+        spec = (
+            0.5 * self._S[:, :k]
+            - 0.25 * self._S[:, k:2 * k]
+            - 0.25 * self._S[:, 2 * k:]
+            - mean[:, np.newaxis] * self._win_dft
+        )
+        power = np.abs(spec) ** 2
+        n_theta = self._theta.size
+        n_ch = power.shape[0]
+        theta = np.mean(power[:, :n_theta], axis=1) if n_theta else np.zeros(n_ch)
+        alpha = np.mean(power[:, n_theta:], axis=1) if self._alpha.size else np.zeros(n_ch)
+
+        ratios = theta / (alpha + 1e-9)
+        scores = [self.processor.ratio_to_score(float(r)) for r in ratios]
+
+        weights = np.ones(n_ch) if self.channel_weights is None else self.channel_weights
+        if self.quality_weighting:
+            # Variance : l'ordre de l'anneau est indifférent, pas de remise en ordre
+            variances = np.var(self._ring.data, axis=1)
+            weights = weights * self.processor.variance_weights(variances)
+        return self.processor.fuse_channel_scores(scores, weights), scores
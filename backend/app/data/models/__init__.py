@@ -5,5 +5,8 @@ from app.data.models.user_model import UserModel
 from app.data.models.refresh_token_model import RefreshTokenModel
 from app.data.models.service_model import ServiceModel
 from app.data.models.medecin_model import MedecinModel
+from app.data.models.alert_model import SessionAlertModel
+from app.data.models.session_summary_model import SessionSummaryModel
+from app.data.models.rollup_model import DailyRollupModel, RollupInvalidationModel
 
-__all__ = ["OrganisationModel", "PatientModel", "SessionModel", "UserModel", "ServiceModel", "MedecinModel", "RefreshTokenModel"]
+__all__ = ["OrganisationModel", "PatientModel", "SessionModel", "UserModel", "ServiceModel", "MedecinModel", "RefreshTokenModel", "SessionAlertModel", "SessionSummaryModel", "DailyRollupModel", "RollupInvalidationModel"]
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import String, TIMESTAMP, Integer, Float, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.data.models.base import Base
+
+
+class SessionAlertModel(Base):
+    """Maps to t_session_alerte table - alert episodes raised during a session"""
+    __tablename__ = "t_session_alerte"
+
+    alert_id: Mapped[int] = mapped_column(primary_key=True)
+    session_id: Mapped[int] = mapped_column(Integer, ForeignKey("t_session_mesure.session_id"), nullable=False)
+    rule: Mapped[str] = mapped_column(String(50), nullable=False)
+    severity: Mapped[str] = mapped_column(String(20), nullable=False)
+    message: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    raised_at_s: Mapped[float] = mapped_column(Float, nullable=False)  # offset from session start
+    cleared_at_s: Mapped[float | None] = mapped_column(Float, nullable=True)
+    peak_value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False),
+        nullable=False,
+        server_default=func.now(),
+    )
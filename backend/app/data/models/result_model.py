@@ -16,6 +16,7 @@ class SessionModel(Base):
     ended_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
     notes: Mapped[str | None] = mapped_column(String(255), nullable=True)
     app_version: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    deleted_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
     
     # Foreign keys
     device_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("t_dispositif.device_id"), nullable=True)
@@ -0,0 +1,48 @@
+from datetime import date, datetime
+from sqlalchemy import String, TIMESTAMP, Integer, Float, Date, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.data.models.base import Base
+
+
+class DailyRollupModel(Base):
+    """Maps to t_rollup_jour table - daily session aggregates per organisation, service, medecin and mode"""
+    __tablename__ = "t_rollup_jour"
+    __table_args__ = (
+        Index("idx_rollup_jour_org_day", "organisation_id", "day"),
+    )
+
+    rollup_id: Mapped[int] = mapped_column(primary_key=True)
+    organisation_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)  # day of started_at
+    service_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    medecin_referent_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    mode: Mapped[str] = mapped_column(String(20), nullable=False)
+
+    # Sums, not means : any range / grouping is re-aggregated exactly
+    sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    duration_s: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    fatigue_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # sum of fatigue_mean * duration_s
+    fatigue_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # duration of scored sessions
+    quality_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # sum of quality_mean * duration_s
+    quality_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False),
+        nullable=False,
+        server_default=func.now(),
+    )
+
+
+class RollupInvalidationModel(Base):
+    """Maps to t_rollup_jour_invalide table - (organisation, day) pairs whose rollups must be recomputed"""
+    __tablename__ = "t_rollup_jour_invalide"
+
+    invalidation_id: Mapped[int] = mapped_column(primary_key=True)
+    organisation_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False),
+        nullable=False,
+        server_default=func.now(),
+    )
@@ -0,0 +1,45 @@
+from datetime import datetime
+from sqlalchemy import String, TIMESTAMP, Integer, Float, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.data.models.base import Base
+
+
+class SessionSummaryModel(Base):
+    """Maps to t_session_resume table - per-session summary statistics, written when a session ends"""
+    __tablename__ = "t_session_resume"
+    __table_args__ = (
+        Index("idx_session_resume_patient", "patient_id", "started_at"),
+        Index("idx_session_resume_org", "organisation_id", "started_at"),
+    )
+
+    session_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("t_session_mesure.session_id", ondelete="CASCADE"), primary_key=True
+    )
+
+    # Copied from t_session_mesure (kept in sync on update) : trend queries never join
+    organisation_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    patient_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    mode: Mapped[str] = mapped_column(String(20), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=False), nullable=False)
+    deleted_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=False), nullable=True)
+    # Copied from t_patient when the session ends : rollups never join
+    service_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    medecin_referent_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    source: Mapped[str] = mapped_column(String(10), nullable=False)  # stream / ingest
+    duration_s: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    fatigue_mean: Mapped[float | None] = mapped_column(Float, nullable=True)
+    fatigue_max: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    fatigue_p95: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    fatigue_above_s: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # above FATIGUE_THRESHOLD
+    quality_mean: Mapped[float | None] = mapped_column(Float, nullable=True)
+    quality_min: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    alert_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
@@ -0,0 +1,46 @@
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app.data.models.alert_model import SessionAlertModel
+
+
+class SessionAlertRepository:
+    """Accès DB pour les alertes de session"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add_many(self, session_id: int, episodes: list) -> int:
+        """Insertion groupée d'épisodes (AlertEpisode) en un seul commit"""
+        if not episodes:
+            return 0
+        self.db.add_all([
+            SessionAlertModel(
+                session_id=session_id,
+                rule=ep.rule,
+                severity=ep.severity,
+                message=ep.message,
+                raised_at_s=ep.raised_at,
+                cleared_at_s=ep.cleared_at,
+                peak_value=ep.peak_value,
+            )
+            for ep in episodes
+        ])
+        self.db.commit()
+        return len(episodes)
+
+    def list_by_session(self, session_id: int) -> list[SessionAlertModel]:
+        stmt = (
+            select(SessionAlertModel)
+            .where(SessionAlertModel.session_id == session_id)
+            .order_by(SessionAlertModel.raised_at_s)
+        )
+        return self.db.execute(stmt).scalars().all()
+
+    def count_by_rule(self, session_id: int) -> dict[str, int]:
+        stmt = (
+            select(SessionAlertModel.rule, func.count())
+            .where(SessionAlertModel.session_id == session_id)
+            .group_by(SessionAlertModel.rule)
+        )
+        return {rule: count for rule, count in self.db.execute(stmt).all()}
@@ -1,6 +1,6 @@
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, insert
 
 from app.data.models.result_model import SessionModel
 
@@ -41,9 +41,34 @@ class SessionRepository:
         self.db.refresh(session)
         return session
 
+    def create_many(self, rows: list[dict]) -> list[int]:
+        """Insertion groupée (un seul INSERT ... RETURNING) ; ids dans l'ordre de rows"""
+        if not rows:
+            return []
+        # INSERT Core sur la table : pas de résolution des relations du mapper
+        table = SessionModel.__table__
+        stmt = insert(table).returning(table.c.session_id, sort_by_parameter_order=True)
+        ids = self.db.execute(stmt, rows).scalars().all()
+        self.db.commit()
+        return list(ids)
+
+    def ids_by_notes(self, notes: list[str]) -> dict[str, int]:
+        """Sessions existantes par notes exactes (reprise d'un import interrompu)"""
+        if not notes:
+            return {}
+        stmt = select(SessionModel.notes, SessionModel.session_id).where(SessionModel.notes.in_(notes))
+        return {note: session_id for note, session_id in self.db.execute(stmt).all()}
+
     def get_by_id(self, session_id: int) -> SessionModel | None:
         return self.db.get(SessionModel, session_id)
 
+    def get_for_organisation(self, session_id: int, organisation_id: int) -> SessionModel | None:
+        """Session non supprimée appartenant à l'organisation, None sinon"""
+        session = self.db.get(SessionModel, session_id)
+        if session is None or session.organisation_id != organisation_id or session.deleted_at is not None:
+            return None
+        return session
+
     def list_by_patient(self, patient_id: int, limit: int = 50, offset: int = 0) -> list[SessionModel]:
         stmt = (
             select(SessionModel)
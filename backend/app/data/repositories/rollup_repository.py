@@ -0,0 +1,159 @@
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select, insert, delete, func, case
+from sqlalchemy.orm import Session
+
+from app.data.models.rollup_model import DailyRollupModel, RollupInvalidationModel
+from app.data.models.session_summary_model import SessionSummaryModel
+
+# Axes de regroupement des lectures (paramètre group_by)
+ROLLUP_GROUPS = {
+    "day": DailyRollupModel.day,
+    "service_id": DailyRollupModel.service_id,
+    "medecin_referent_id": DailyRollupModel.medecin_referent_id,
+    "mode": DailyRollupModel.mode,
+}
+
+
+class DailyRollupRepository:
+    """Accès DB pour les rollups journaliers (t_rollup_jour) et leur file d'invalidation"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def invalidate(self, days: set[tuple[int, date]]) -> None:
+        """Jours (organisation_id, jour) à recalculer, dans la transaction en cours (pas de commit)"""
+        if days:
+            self.db.execute(
+                insert(RollupInvalidationModel),
+                [{"organisation_id": org, "day": day} for org, day in sorted(days)],
+            )
+
+    def pending(self, organisation_id: int | None = None) -> int:
+        """Jours en attente de recalcul"""
+        stmt = select(func.count(func.distinct(RollupInvalidationModel.day)))
+        if organisation_id is not None:
+            stmt = stmt.where(RollupInvalidationModel.organisation_id == organisation_id)
+        return self.db.execute(stmt).scalar() or 0
+
+    def refresh(self, max_days: int = 200) -> int:
+        """
+        Recalculer au plus max_days jours invalidés depuis t_session_resume,
+        en une transaction. Retourne le nombre de jours recalculés.
+
+        Les invalidations arrivées pendant le calcul (id au-delà de la
+        photo prise au début) restent en file pour le passage suivant.
+        """
+        queue = RollupInvalidationModel
+        last_id = self.db.execute(select(func.max(queue.invalidation_id))).scalar()
+        if last_id is None:
+            return 0
+        days = self.db.execute(
+            select(queue.organisation_id, queue.day)
+            .where(queue.invalidation_id <= last_id)
+            .group_by(queue.organisation_id, queue.day)
+            .order_by(queue.day, queue.organisation_id)
+            .limit(max_days)
+        ).all()
+        try:
+            now = datetime.now()
+            for organisation_id, day in days:
+                self._rebuild_day(organisation_id, day, now)
+                self.db.execute(
+                    delete(queue).where(
+                        queue.invalidation_id <= last_id,
+                        queue.organisation_id == organisation_id,
+                        queue.day == day,
+                    )
+                )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return len(days)
+
+    def _rebuild_day(self, organisation_id: int, day: date, now: datetime) -> None:
+        s = SessionSummaryModel
+        start = datetime.combine(day, time.min)
+        stmt = (
+            select(
+                s.service_id,
+                s.medecin_referent_id,
+                s.mode,
+                func.count(),
+                func.sum(s.duration_s),
+                func.sum(case((s.fatigue_mean.is_not(None), s.fatigue_mean * s.duration_s), else_=0.0)),
+                func.sum(case((s.fatigue_mean.is_not(None), s.duration_s), else_=0.0)),
+                func.sum(case((s.quality_mean.is_not(None), s.quality_mean * s.duration_s), else_=0.0)),
+                func.sum(case((s.quality_mean.is_not(None), s.duration_s), else_=0.0)),
+            )
+            .where(
+                s.organisation_id == organisation_id,
+                s.deleted_at.is_(None),
+                s.started_at >= start,
+                s.started_at < start + timedelta(days=1),
+            )
+            .group_by(s.service_id, s.medecin_referent_id, s.mode)
+        )
+        rows = [
+            {
+                "organisation_id": organisation_id,
+                "day": day,
+                "service_id": service_id,
+                "medecin_referent_id": medecin_id,
+                "mode": mode,
+                "sessions": sessions,
+                "duration_s": duration or 0.0,
+                "fatigue_sum": fatigue_sum or 0.0,
+                "fatigue_seconds": fatigue_seconds or 0.0,
+                "quality_sum": quality_sum or 0.0,
+                "quality_seconds": quality_seconds or 0.0,
+                "updated_at": now,
+            }
+            for service_id, medecin_id, mode, sessions, duration, fatigue_sum, fatigue_seconds,
+                quality_sum, quality_seconds in self.db.execute(stmt).all()
+        ]
+        # Jour remplacé en entier : sessions supprimées ou déplacées comprises
+        self.db.execute(
+            delete(DailyRollupModel).where(
+                DailyRollupModel.organisation_id == organisation_id,
+                DailyRollupModel.day == day,
+            )
+        )
+        if rows:
+            self.db.execute(insert(DailyRollupModel), rows)
+
+    def aggregate(
+        self,
+        organisation_id: int,
+        group_by: list[str],
+        start: date | None = None,
+        end: date | None = None,
+        mode: str | None = None,
+        service_id: int | None = None,
+        medecin_referent_id: int | None = None,
+    ) -> list:
+        """Sommes des rollups de [start, end] (jours inclus), regroupées selon group_by"""
+        r = DailyRollupModel
+        columns = [ROLLUP_GROUPS[name].label(name) for name in group_by]
+        stmt = select(
+            *columns,
+            func.sum(r.sessions).label("sessions"),
+            func.sum(r.duration_s).label("duration_s"),
+            func.sum(r.fatigue_sum).label("fatigue_sum"),
+            func.sum(r.fatigue_seconds).label("fatigue_seconds"),
+            func.sum(r.quality_sum).label("quality_sum"),
+            func.sum(r.quality_seconds).label("quality_seconds"),
+        ).where(r.organisation_id == organisation_id)
+        if start is not None:
+            stmt = stmt.where(r.day >= start)
+        if end is not None:
+            stmt = stmt.where(r.day <= end)
+        if mode is not None:
+            stmt = stmt.where(r.mode == mode)
+        if service_id is not None:
+            stmt = stmt.where(r.service_id == service_id)
+        if medecin_referent_id is not None:
+            stmt = stmt.where(r.medecin_referent_id == medecin_referent_id)
+        if columns:
+            stmt = stmt.group_by(*columns).order_by(*columns)
+        return self.db.execute(stmt).all()
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+from app.application.ports.session_registry import SessionRegistry
+from app.domain.entities.acquisition_session import AcquisitionSession
+
+
+class SessionRegistryMemoryImpl(SessionRegistry):
+    """
+    Registre en mémoire (tests, serveur mono-processus).
+
+    Les sessions arrêtées sont rangées par date d'arrêt : l'éviction TTL
+    retire les plus anciennes en tête, sans parcourir tout le registre.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600.0):
+        self.ttl_seconds = ttl_seconds
+        self._sessions: dict[str, AcquisitionSession] = {}
+        self._stopped: OrderedDict[str, float] = OrderedDict()  # session_id -> arrêt (monotonic)
+        self._lock = threading.Lock()
+
+    def create(self, session: AcquisitionSession) -> AcquisitionSession:
+        with self._lock:
+            self._evict(time.monotonic())
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id: str) -> AcquisitionSession | None:
+        session = self._sessions.get(session_id)
+        stopped = self._stopped.get(session_id)
+        if stopped is not None and time.monotonic() - stopped > self.ttl_seconds:
+            return None
+        return session
+
+    def stop(self, session_id: str) -> AcquisitionSession | None:
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            session = self._sessions.get(session_id)
+            if session is None or session.status == "stopped":
+                return session
+            session = replace(session, status="stopped", stopped_at=datetime.now())
+            self._sessions[session_id] = session
+            self._stopped[session_id] = now
+            return session
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            return self._evict(time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, now: float) -> int:
+        evicted = 0
+        while self._stopped:
+            session_id, stopped = next(iter(self._stopped.items()))
+            if now - stopped <= self.ttl_seconds:
+                break
+            self._stopped.popitem(last=False)
+            self._sessions.pop(session_id, None)
+            evicted += 1
+        return evicted
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS acquisition_session (
+    session_id    TEXT PRIMARY KEY,
+    status        TEXT NOT NULL,
+    started_at    REAL NOT NULL,
+    stopped_at    REAL,
+    fatigue_score REAL NOT NULL,
+    quality       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_acquisition_session_stopped
+    ON acquisition_session (stopped_at) WHERE stopped_at IS NOT NULL;
+"""
+
+
+def _to_entity(row: tuple) -> AcquisitionSession:
+    session_id, status, started_at, stopped_at, fatigue_score, quality = row
+    return AcquisitionSession(
+        session_id=session_id,
+        status=status,
+        started_at=datetime.fromtimestamp(started_at),
+        stopped_at=datetime.fromtimestamp(stopped_at) if stopped_at is not None else None,
+        fatigue_score=fatigue_score,
+        quality=quality,
+    )
+
+
+class SessionRegistrySQLiteImpl(SessionRegistry):
+    """
+    Registre partagé entre workers (gunicorn / uvicorn --workers) via un
+    fichier SQLite local en mode WAL.
+
+    Lecture par clé primaire ; chaque écriture est une seule instruction
+    (atomique entre processus). Une connexion par thread. L'éviction TTL
+    passe par l'index partiel sur stopped_at et s'exécute au plus une fois
+    par evict_interval_seconds.
+    """
+
+    def __init__(self, path: str | Path, ttl_seconds: float = 3600.0, evict_interval_seconds: float = 60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.evict_interval_seconds = evict_interval_seconds
+        self._local = threading.local()
+        self._evicted_at = 0.0
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def create(self, session: AcquisitionSession) -> AcquisitionSession:
+        self._maybe_evict()
+        self._conn().execute(
+            "INSERT INTO acquisition_session VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                session.session_id,
+                session.status,
+                session.started_at.timestamp(),
+                session.stopped_at.timestamp() if session.stopped_at else None,
+                session.fatigue_score,
+                session.quality,
+            ),
+        )
+        return session
+
+    def get(self, session_id: str) -> AcquisitionSession | None:
+        row = self._conn().execute(
+            "SELECT * FROM acquisition_session WHERE session_id = ? "
+            "AND (stopped_at IS NULL OR stopped_at >= ?)",
+            (session_id, time.time() - self.ttl_seconds),
+        ).fetchone()
+        return _to_entity(row) if row else None
+
+    def stop(self, session_id: str) -> AcquisitionSession | None:
+        self._maybe_evict()
+        # Une seule instruction : deux workers qui arrêtent la même session
+        # ne peuvent pas écraser la date du premier arrêt
+        self._conn().execute(
+            "UPDATE acquisition_session SET status = 'stopped', stopped_at = ? "
+            "WHERE session_id = ? AND stopped_at IS NULL",
+            (time.time(), session_id),
+        )
+        return self.get(session_id)
+
+    def evict_expired(self) -> int:
+        cur = self._conn().execute(
+            "DELETE FROM acquisition_session WHERE stopped_at IS NOT NULL AND stopped_at < ?",
+            (time.time() - self.ttl_seconds,),
+        )
+        self._evicted_at = time.monotonic()
+        return cur.rowcount
+
+    def _maybe_evict(self) -> None:
+        if time.monotonic() - self._evicted_at >= self.evict_interval_seconds:
+            self.evict_expired()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit : chaque instruction est sa propre transaction
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def create_session_registry(backend: str, path: str | Path, ttl_seconds: float) -> SessionRegistry:
+    if backend == "memory":
+        return SessionRegistryMemoryImpl(ttl_seconds)
+    if backend == "sqlite":
+        return SessionRegistrySQLiteImpl(path, ttl_seconds)
+    raise ValueError(f"Unsupported acquisition registry backend: {backend}")
@@ -0,0 +1,137 @@
+from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app.data.models.alert_model import SessionAlertModel
+from app.data.models.patient_model import PatientModel
+from app.data.models.result_model import SessionModel
+from app.data.models.session_summary_model import SessionSummaryModel
+from app.data.repositories.rollup_repository import DailyRollupRepository
+
+# Champs de t_session_mesure recopiés dans le résumé
+_SESSION_FIELDS = ("organisation_id", "patient_id", "mode", "started_at", "deleted_at")
+# Colonnes d'une ligne de tendance (filtres et horodatage exclus)
+_TREND_COLUMNS = [
+    c for c in SessionSummaryModel.__table__.c
+    if c.name not in (
+        "organisation_id", "patient_id", "deleted_at", "service_id", "medecin_referent_id", "updated_at"
+    )
+]
+
+
+class SessionSummaryRepository:
+    """Accès DB pour les résumés de session (t_session_resume)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def upsert_many(self, summaries: dict[int, dict], source: str) -> int:
+        """
+        Créer ou remplacer les résumés {session_id: statistiques} en un seul
+        commit. Les sessions inexistantes sont ignorées. Service et médecin
+        du patient sont figés à cette date ; les jours touchés sont mis en
+        file pour les rollups.
+        """
+        if not summaries:
+            return 0
+        ids = list(summaries)
+        sessions = {
+            s.session_id: s
+            for s in self.db.execute(select(SessionModel).where(SessionModel.session_id.in_(ids))).scalars()
+        }
+        existing = {
+            s.session_id: s
+            for s in self.db.execute(
+                select(SessionSummaryModel).where(SessionSummaryModel.session_id.in_(ids))
+            ).scalars()
+        }
+        alerts = dict(self.db.execute(
+            select(SessionAlertModel.session_id, func.count())
+            .where(SessionAlertModel.session_id.in_(ids))
+            .group_by(SessionAlertModel.session_id)
+        ).all())
+        patients = self._patient_refs({s.patient_id for s in sessions.values()})
+
+        days = set()
+        for session_id, session in sessions.items():
+            row = existing.get(session_id)
+            if row is None:
+                row = SessionSummaryModel(session_id=session_id)
+                self.db.add(row)
+            else:
+                days.add((row.organisation_id, row.started_at.date()))
+            self._copy_session(row, session, patients)
+            for key, value in summaries[session_id].items():
+                setattr(row, key, value)
+            row.source = source
+            row.alert_count = alerts.get(session_id, 0)
+            days.add((row.organisation_id, row.started_at.date()))
+        DailyRollupRepository(self.db).invalidate(days)
+        self.db.commit()
+        return len(sessions)
+
+    def upsert(self, session_id: int, summary: dict, source: str) -> bool:
+        return self.upsert_many({session_id: summary}, source) > 0
+
+    def sync_session(self, session: SessionModel) -> None:
+        """Recopier les champs de la session après sa mise à jour (patient, mode, suppression)"""
+        row = self.db.get(SessionSummaryModel, session.session_id)
+        if row is None:
+            return
+        # Ancien et nouveau jour : une session déplacée quitte l'un et rejoint l'autre
+        days = {(row.organisation_id, row.started_at.date())}
+        self._copy_session(row, session, self._patient_refs({session.patient_id}))
+        days.add((row.organisation_id, row.started_at.date()))
+        DailyRollupRepository(self.db).invalidate(days)
+        self.db.commit()
+
+    def invalidate_rollups(self, session_ids: list[int]) -> None:
+        """Avant une suppression définitive : jours des sessions à recalculer (pas de commit)"""
+        rows = self.db.execute(
+            select(SessionSummaryModel.organisation_id, SessionSummaryModel.started_at)
+            .where(SessionSummaryModel.session_id.in_(session_ids))
+        ).all()
+        DailyRollupRepository(self.db).invalidate({(org, started_at.date()) for org, started_at in rows})
+
+    def _patient_refs(self, patient_ids: set[int | None]) -> dict[int, tuple[int | None, int | None]]:
+        """(service_id, medecin_referent_id) par patient"""
+        ids = [p for p in patient_ids if p is not None]
+        if not ids:
+            return {}
+        stmt = select(PatientModel.patient_id, PatientModel.service_id, PatientModel.medecin_referent_id).where(
+            PatientModel.patient_id.in_(ids)
+        )
+        return {patient_id: (service_id, medecin_id) for patient_id, service_id, medecin_id in self.db.execute(stmt).all()}
+
+    @staticmethod
+    def _copy_session(row: SessionSummaryModel, session: SessionModel, patients: dict) -> None:
+        for key in _SESSION_FIELDS:
+            setattr(row, key, getattr(session, key))
+        row.service_id, row.medecin_referent_id = patients.get(session.patient_id, (None, None))
+
+    def list_by_patient(
+        self,
+        patient_id: int,
+        organisation_id: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        mode: str | None = None,
+    ) -> list:
+        """
+        Résumés des sessions d'un patient sur [start, end), par date de début.
+        Lignes en lecture seule (colonnes, sans objets ORM : centaines de
+        sessions par requête).
+        """
+        stmt = select(*_TREND_COLUMNS).where(
+            SessionSummaryModel.patient_id == patient_id,
+            SessionSummaryModel.organisation_id == organisation_id,
+            SessionSummaryModel.deleted_at.is_(None),
+        )
+        if start is not None:
+            stmt = stmt.where(SessionSummaryModel.started_at >= start)
+        if end is not None:
+            stmt = stmt.where(SessionSummaryModel.started_at < end)
+        if mode is not None:
+            stmt = stmt.where(SessionSummaryModel.mode == mode)
+        stmt = stmt.order_by(SessionSummaryModel.started_at, SessionSummaryModel.session_id)
+        return self.db.execute(stmt).all()
@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+@dataclass(frozen=True)
+class AcquisitionSession:
+    session_id: str
+    status: str  # running / stopped
+    started_at: datetime
+    stopped_at: datetime | None = None
+    fatigue_score: float = 0.0
+    quality: float = 85.0
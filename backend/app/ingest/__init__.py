@@ -0,0 +1,5 @@
+"""Import en masse d'enregistrements Sleep-EDF (`python -m app.ingest`)"""
+
+from app.ingest.pipeline import IngestManifest, IngestReport, RecordingPair, run_ingest, scan_recordings
+
+__all__ = ["IngestManifest", "IngestReport", "RecordingPair", "run_ingest", "scan_recordings"]
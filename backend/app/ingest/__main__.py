@@ -0,0 +1,119 @@
+"""
+Import en masse d'enregistrements Sleep-EDF :
+
+    python -m app.ingest <dossier> --organisation-id 1 [--user-id 1] [--mode sleep]
+
+Relancer la commande reprend là où elle s'est arrêtée.
+"""
+import argparse
+from pathlib import Path
+
+from app.config import settings
+from app.core.eeg_processor import EEGProcessor
+from app.core.epoch_features import EpochFeatureBuilder
+from app.core.fatigue_series import FatigueSeriesBuilder
+from app.data.db import SessionLocal
+from app.ingest.pipeline import run_ingest
+
+
+def _processor() -> EEGProcessor:
+    """Mêmes paramètres de scoring que le flux (app.api.routes.eeg)"""
+    return EEGProcessor(
+        theta_min=settings.theta_min,
+        theta_max=settings.theta_max,
+        alpha_min=settings.alpha_min,
+        alpha_max=settings.alpha_max,
+        fatigue_ratio_min=settings.fatigue_ratio_min,
+        fatigue_ratio_max=settings.fatigue_ratio_max,
+        bands={
+            "delta": (settings.delta_min, settings.delta_max),
+            "theta": (settings.theta_min, settings.theta_max),
+            "alpha": (settings.alpha_min, settings.alpha_max),
+            "beta": (settings.beta_min, settings.beta_max),
+            "gamma": (settings.gamma_min, settings.gamma_max),
+        },
+    )
+
+
+def _epoch_builder() -> EpochFeatureBuilder | None:
+    if not settings.epoch_features_enabled:
+        return None
+    return EpochFeatureBuilder(
+        _processor(),
+        epoch_seconds=settings.epoch_seconds,
+        channel_weights=settings.fatigue_channel_weights,
+        quality_weighting=settings.fatigue_quality_weighting,
+        line_hz=settings.quality_line_hz,
+        outlier_z=settings.quality_outlier_z,
+    )
+
+
+def _series_builder() -> FatigueSeriesBuilder | None:
+    """Fenêtre, cadence, filtres et poids du flux (app.api.routes.eeg)"""
+    if not settings.fatigue_series_enabled:
+        return None
+    return FatigueSeriesBuilder(
+        _processor(),
+        window_seconds=settings.fatigue_window_seconds,
+        score_interval_seconds=settings.fatigue_score_interval_seconds,
+        channel_weights=settings.fatigue_channel_weights,
+        quality_weighting=settings.fatigue_quality_weighting,
+        filter_params={
+            "highpass_hz": settings.filter_highpass_hz,
+            "lowpass_hz": settings.filter_lowpass_hz,
+            "notch_hz": settings.filter_notch_hz,
+            "notch_q": settings.filter_notch_q,
+            "order": settings.filter_order,
+        } if settings.filter_enabled else None,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.ingest", description="Ingest Sleep-EDF PSG / Hypnogram pairs")
+    parser.add_argument("directory", type=Path, help="directory scanned recursively for *-PSG.edf files")
+    parser.add_argument("--organisation-id", type=int, required=True, help="organisation owning the sessions")
+    parser.add_argument("--user-id", type=int, default=settings.admin_user_id, help="created_by_user_id of the sessions")
+    parser.add_argument("--patient-id", type=int, default=None, help="patient of the sessions")
+    parser.add_argument("--device-id", type=int, default=None, help="device of the sessions")
+    parser.add_argument("--mode", default="sleep", help="session mode (max 20 chars)")
+    parser.add_argument("--picks", default=None, help=f"comma-separated channels (default: {','.join(settings.default_picks)})")
+    parser.add_argument("--workers", type=int, default=settings.ingest_workers, help="worker processes (0 = CPU count)")
+    parser.add_argument("--batch-size", type=int, default=settings.ingest_batch_size, help="sessions per INSERT")
+    args = parser.parse_args(argv)
+
+    if not args.directory.is_dir():
+        parser.error(f"not a directory: {args.directory}")
+    if not 0 < len(args.mode) <= 20:
+        parser.error("--mode must be 1 to 20 characters")
+
+    report = run_ingest(
+        args.directory,
+        session_factory=SessionLocal,
+        session_store_dir=settings.session_store_dir,
+        organisation_id=args.organisation_id,
+        created_by_user_id=args.user_id,
+        mode=args.mode,
+        patient_id=args.patient_id,
+        device_id=args.device_id,
+        app_version=settings.app_version,
+        picks=args.picks.split(",") if args.picks else None,
+        default_picks=settings.default_picks,
+        store_params={
+            "block_seconds": settings.sample_store_block_seconds,
+            "dtype": settings.sample_store_dtype,
+            "compression_level": settings.sample_store_compression_level,
+            "pyramid_factor": settings.sample_store_pyramid_factor,
+            "pyramid_levels": settings.sample_store_pyramid_levels,
+        },
+        epoch_builder=_epoch_builder(),
+        series_builder=_series_builder(),
+        fatigue_threshold=settings.fatigue_threshold,
+        workers=args.workers,
+        batch_size=max(1, args.batch_size),
+    )
+    print(report.summary())
+    raise SystemExit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.edf_reader import EDFFormatError, EDFReader
+from app.core.eeg_sleepedf import load_edf_mne
+from app.core.epoch_features import EpochFeatureBuilder, EpochTable, write_epoch_table
+from app.core.fatigue_series import FatigueSeriesBuilder
+from app.core.hypnogram import HypnogramIndex, load_hypnogram
+from app.core.recording_cache import CachedRecording
+from app.core.sample_store import SampleStoreReader, SampleStoreWriter
+from app.core.session_artifacts import SessionArtifacts
+from app.core.session_summary import summarize_epochs
+from app.data.repositories.result_repository import SessionRepository
+from app.data.repositories.session_summary_repository import SessionSummaryRepository
+
+_HASH_CHUNK = 1 << 20
+_READ_SECONDS = 300.0  # signal décodé par lecture : mémoire bornée par worker
+
+# Transmis une fois à chaque worker (initializer) : hashes déjà importés, calcul des epochs / de la série fatigue
+_known_hashes: frozenset[str] = frozenset()
+_epoch_builder: EpochFeatureBuilder | None = None
+_series_builder: FatigueSeriesBuilder | None = None
+
+
+@dataclass(frozen=True)
+class RecordingPair:
+    psg: Path
+    hypnogram: Path | None
+
+
+def scan_recordings(root: str | Path) -> list[RecordingPair]:
+    """
+    Paires PSG / hypnogramme d'un dossier (récursif).
+
+    Nommage Sleep-EDF : même préfixe de 7 caractères dans le même dossier
+    (SC4001E0-PSG.edf / SC4001EC-Hypnogram.edf).
+    """
+    root = Path(root)
+    hypnograms: dict[tuple[Path, str], Path] = {}
+    for path in sorted(root.rglob("*-Hypnogram.edf")):
+        hypnograms.setdefault((path.parent, path.name[:7]), path)
+    return [
+        RecordingPair(psg, hypnograms.get((psg.parent, psg.name[:7])))
+        for psg in sorted(root.rglob("*-PSG.edf"))
+    ]
+
+
+def content_hash(pair: RecordingPair) -> str:
+    """blake2b du PSG puis de l'hypnogramme : un fichier renommé ou déplacé garde son hash"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in (pair.psg, pair.hypnogram):
+        if path is None:
+            continue
+        with open(path, "rb") as f:
+            while block := f.read(_HASH_CHUNK):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_key(pair: RecordingPair) -> str:
+    """Chemin + taille + mtime : reprise sans relire les fichiers déjà importés"""
+    files = []
+    for path in (pair.psg, pair.hypnogram):
+        if path is not None:
+            stat = path.stat()
+            files.append([str(path.resolve()), stat.st_size, stat.st_mtime_ns])
+    return json.dumps(files)
+
+
+class IngestManifest:
+    """
+    Progression de l'import : une ligne JSON par enregistrement importé
+    (hash, fichiers, session_id), ajoutée après le commit en base.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.by_hash: dict[str, dict] = {}
+        self._by_file: dict[str, dict] = {}
+        if self.path.exists():
+            data = self.path.read_bytes()
+            if data and not data.endswith(b"\n"):
+                # Dernière ligne tronquée par un arrêt brutal : retirée, sinon
+                # la prochaine entrée ajoutée lui serait collée (et perdue)
+                data = data[:data.rfind(b"\n") + 1]
+                with open(self.path, "r+b") as f:
+                    f.truncate(len(data))
+            for line in data.decode("utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._index(entry)
+
+    def lookup(self, pair: RecordingPair) -> dict | None:
+        return self._by_file.get(_file_key(pair))
+
+    def add(self, entries: list[dict]) -> None:
+        if not entries:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for entry in entries:
+            self._index(entry)
+
+    def _index(self, entry: dict) -> None:
+        self.by_hash[entry["hash"]] = entry
+        self._by_file[entry["files"]] = entry
+
+
+@dataclass
+class IngestReport:
+    scanned: int = 0
+    ingested: int = 0
+    skipped: int = 0
+    failed: int = 0
+    edf_bytes: int = 0  # taille des EDF importés
+    stored_bytes: int = 0  # taille des sample stores produits
+    seconds: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def files_per_second(self) -> float:
+        return self.ingested / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        mb_per_second = self.edf_bytes / 1e6 / self.seconds if self.seconds > 0 else 0.0
+        return (
+            f"{self.scanned} recordings: {self.ingested} ingested, {self.skipped} skipped, "
+            f"{self.failed} failed in {self.seconds:.1f} s "
+            f"({self.files_per_second:.2f} files/s, {mb_per_second:.1f} MB/s of EDF, "
+            f"{self.stored_bytes / 1e6:.1f} MB stored)"
+        )
+
+
+def _init_worker(
+    known_hashes: frozenset[str],
+    epoch_builder: EpochFeatureBuilder | None,
+    series_builder: FatigueSeriesBuilder | None = None,
+) -> None:
+    global _known_hashes, _epoch_builder, _series_builder
+    _known_hashes = known_hashes
+    _epoch_builder = epoch_builder
+    _series_builder = series_builder
+
+
+def _open_recording(psg: Path, picks: list[str] | None, default_picks: Sequence[str]) -> EDFReader | CachedRecording:
+    """Lecteur memory-mappé, ou enregistrement chargé via MNE si EDFReader refuse le fichier"""
+    try:
+        return EDFReader(psg, picks, default_picks)
+    except EDFFormatError:
+        sfreq, channels, data = load_edf_mne(psg, picks, default_picks)
+        return CachedRecording(sfreq=sfreq, channels=tuple(channels), data=data)
+
+
+def ingest_recording(
+    pair: RecordingPair,
+    staging_root: str | Path,
+    picks: list[str] | None,
+    store_params: dict,
+    default_picks: Sequence[str] = (),
+) -> dict:
+    """
+    Worker : hash, décodage du PSG par tranches et écriture du sample store
+    (index de l'hypnogramme, table des epochs, série fatigue) dans un dossier
+    temporaire, déplacé sous le session_id après l'INSERT.
+    """
+    started = time.perf_counter()
+    digest = content_hash(pair)
+    result = {
+        "hash": digest,
+        "psg": str(pair.psg),
+        "hypnogram": str(pair.hypnogram) if pair.hypnogram is not None else None,
+        "files": _file_key(pair),
+        "skipped": digest in _known_hashes,
+    }
+    if result["skipped"]:
+        return result
+
+    reader = _open_recording(pair.psg, picks, default_picks)
+    staging = Path(tempfile.mkdtemp(prefix=f"{digest}.", dir=staging_root))
+    writer = SampleStoreWriter(staging / "samples", reader.sfreq, reader.channels, **store_params)
+    step = max(1, int(_READ_SECONDS * reader.sfreq))
+    hypnogram: HypnogramIndex | None = None
+    epochs = 0
+    fatigue = None
+    try:
+        for start in range(0, reader.n_samples, step):
+            writer.append(reader.read(start, start + step))
+        writer.close(sync=True)
+        if pair.hypnogram is not None:
+            hypnogram = load_hypnogram(pair.hypnogram)
+            hypnogram.save(staging / "hypnogram.npz")
+        if _epoch_builder is not None or _series_builder is not None:
+            store = SampleStoreReader(staging / "samples")
+        if _epoch_builder is not None:
+            columns = _epoch_builder.build(store, hypnogram, reader.physical_range)
+            write_epoch_table(staging / "epochs", columns, _epoch_builder.meta(store))
+            epochs = len(columns["t"])
+        if _series_builder is not None:
+            # Même série / mêmes agrégats que pour une session diffusée (/analytics/.../fatigue-*)
+            fatigue = _series_builder.build(store, staging / "fatigue").to_dict()
+    except Exception:
+        writer.close()
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    result.update(
+        staging=str(staging),
+        sfreq=reader.sfreq,
+        channels=reader.channels,
+        n_samples=reader.n_samples,
+        duration=reader.duration,
+        start_time=reader.start_time.isoformat() if reader.start_time is not None else None,
+        edf_bytes=sum(os.path.getsize(p) for p in (pair.psg, pair.hypnogram) if p is not None),
+        stored_bytes=writer.bytes_written,
+        stages=len(hypnogram) if hypnogram is not None else 0,
+        epochs=epochs,
+        fatigue=fatigue,
+        seconds=round(time.perf_counter() - started, 3),
+    )
+    return result
+
+
+def _session_notes(result: dict) -> str:
+    """Notes de la session : nom du PSG + hash (clé de reprise en base)"""
+    suffix = f" #{result['hash']}"
+    return f"Sleep-EDF {Path(result['psg']).name}"[: 255 - len(suffix)] + suffix
+
+
+class _BatchCommitter:
+    """Côté parent : INSERT groupé des sessions, déplacement des stores, résumés, manifeste"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        artifacts: SessionArtifacts,
+        manifest: IngestManifest,
+        session_fields: dict,
+        fatigue_threshold: float = 70.0,
+    ):
+        self.session_factory = session_factory
+        self.artifacts = artifacts
+        self.manifest = manifest
+        self.session_fields = session_fields
+        self.fatigue_threshold = fatigue_threshold
+
+    def commit(self, results: list[dict]) -> None:
+        if not results:
+            return
+        notes = [_session_notes(r) for r in results]
+        with self.session_factory() as db:
+            repo = SessionRepository(db)
+            # Lignes déjà insérées par un essai interrompu avant le manifeste
+            session_ids = repo.ids_by_notes(notes)
+            new = [(r, n) for r, n in zip(results, notes) if n not in session_ids]
+            ids = repo.create_many([self._row(r, n) for r, n in new])
+            session_ids.update(zip((n for _, n in new), ids))
+
+        entries = []
+        summaries = {}
+        for result, note in zip(results, notes):
+            session_id = session_ids[note]
+            self._move_store(Path(result["staging"]), session_id)
+            if result["fatigue"] is not None:
+                self.artifacts.write_json(session_id, "fatigue", result["fatigue"])
+            if result["epochs"]:
+                summaries[session_id] = self._summary(session_id)
+            entries.append({
+                "hash": result["hash"],
+                "files": result["files"],
+                "psg": result["psg"],
+                "hypnogram": result["hypnogram"],
+                "session_id": session_id,
+                "n_samples": result["n_samples"],
+                "stages": result["stages"],
+                "epochs": result["epochs"],
+                "windows": result["fatigue"]["windows"] if result["fatigue"] is not None else 0,
+                "ingested_at": datetime.now().isoformat(timespec="seconds"),
+            })
+        # Avant le manifeste : une reprise réécrit les mêmes résumés
+        with self.session_factory() as db:
+            SessionSummaryRepository(db).upsert_many(summaries, source="ingest")
+        self.manifest.add(entries)
+
+    def _summary(self, session_id: int) -> dict:
+        """Résumé de la session depuis sa table des epochs (colonnes memory-mappées)"""
+        table = EpochTable(self.artifacts.epochs_dir(session_id))
+        return summarize_epochs(table.read(["fatigue", "quality"]), table.epoch_seconds, self.fatigue_threshold)
+
+    def _row(self, result: dict, notes: str) -> dict:
+        started_at = (
+            datetime.fromisoformat(result["start_time"]) if result["start_time"] else datetime.now()
+        )
+        return {
+            **self.session_fields,
+            "started_at": started_at,
+            "ended_at": started_at + timedelta(seconds=result["duration"]),
+            "notes": notes,
+        }
+
+    def _move_store(self, staging: Path, session_id: int) -> None:
+        target = self.artifacts.samples_dir(session_id)
+        if target.exists():
+            # Déjà déplacé par un essai précédent
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if (staging / "hypnogram.npz").exists():
+            os.replace(staging / "hypnogram.npz", self.artifacts.hypnogram_path(session_id))
+        if (staging / "epochs").exists():
+            # Reprise après un arrêt entre les deux déplacements : remplacer l'ancienne table
+            shutil.rmtree(self.artifacts.epochs_dir(session_id), ignore_errors=True)
+            os.replace(staging / "epochs", self.artifacts.epochs_dir(session_id))
+        if (staging / "fatigue").exists():
+            shutil.rmtree(self.artifacts.fatigue_dir(session_id), ignore_errors=True)
+            os.replace(staging / "fatigue", self.artifacts.fatigue_dir(session_id))
+        # Samples en dernier : leur présence marque un déplacement complet
+        os.replace(staging / "samples", target)
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def run_ingest(
+    root: str | Path,
+    session_factory: Callable[[], Session],
+    session_store_dir: str | Path,
+    organisation_id: int,
+    created_by_user_id: int,
+    mode: str = "sleep",
+    patient_id: int | None = None,
+    device_id: int | None = None,
+    app_version: str | None = None,
+    picks: list[str] | None = None,
+    default_picks: Sequence[str] = (),
+    store_params: dict | None = None,
+    epoch_builder: EpochFeatureBuilder | None = None,
+    series_builder: FatigueSeriesBuilder | None = None,
+    fatigue_threshold: float = 70.0,
+    workers: int = 0,
+    batch_size: int = 32,
+    log: Callable[[str], None] = print,
+) -> IngestReport:
+    """
+    Importer les enregistrements de root : parsing, écriture des samples et
+    table des epochs (si epoch_builder) et série fatigue avec ses agrégats
+    (si series_builder) dans un pool de processus, INSERT
+    des sessions par lots de batch_size, puis résumé de chaque session
+    (t_session_resume) depuis sa table des epochs.
+    Reprise : les fichiers déjà au manifeste (même chemin / taille / mtime,
+    ou même contenu) sont ignorés.
+    """
+    started = time.perf_counter()
+    report = IngestReport()
+    artifacts = SessionArtifacts(session_store_dir)
+    manifest = IngestManifest(Path(session_store_dir) / "ingest_manifest.jsonl")
+    staging_root = Path(session_store_dir) / ".ingest"
+    staging_root.mkdir(parents=True, exist_ok=True)
+    committer = _BatchCommitter(session_factory, artifacts, manifest, {
+        "mode": mode,
+        "organisation_id": organisation_id,
+        "created_by_user_id": created_by_user_id,
+        "patient_id": patient_id,
+        "device_id": device_id,
+        "consent_id": None,
+        "app_version": app_version,
+    }, fatigue_threshold)
+
+    pairs = scan_recordings(root)
+    report.scanned = len(pairs)
+    pending = []
+    for pair in pairs:
+        if manifest.lookup(pair) is not None:
+            report.skipped += 1
+        else:
+            pending.append(pair)
+    if report.skipped:
+        log(f"{report.skipped} recordings already ingested (manifest)")
+
+    batch: list[dict] = []
+    aliases: list[dict] = []
+    seen = set(manifest.by_hash)
+    done = report.skipped
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        # spawn : pas de fork d'un process qui contient déjà des threads
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(frozenset(manifest.by_hash), epoch_builder, series_builder),
+    ) as pool:
+        futures = {
+            pool.submit(ingest_recording, pair, staging_root, picks, store_params or {}, list(default_picks)): pair
+            for pair in pending
+        }
+        for future in as_completed(futures):
+            pair = futures[future]
+            done += 1
+            try:
+                result = future.result()
+            except Exception as e:
+                report.failed += 1
+                report.errors.append(f"{pair.psg}: {type(e).__name__}: {e}")
+                log(f"[{done}/{report.scanned}] {pair.psg.name} failed: {type(e).__name__}: {e}")
+                continue
+
+            if result["skipped"] or result["hash"] in seen:
+                # Contenu déjà importé (fichier touché ou renommé, doublon dans ce lot)
+                report.skipped += 1
+                if "staging" in result:
+                    shutil.rmtree(result["staging"], ignore_errors=True)
+                known = manifest.by_hash.get(result["hash"])
+                if known is not None:
+                    # Nouveau chemin / mtime : plus besoin de rehasher au prochain passage
+                    aliases.append({**known, "files": result["files"], "psg": result["psg"]})
+                continue
+            seen.add(result["hash"])
+            batch.append(result)
+            report.ingested += 1
+            report.edf_bytes += result["edf_bytes"]
+            report.stored_bytes += result["stored_bytes"]
+            elapsed = time.perf_counter() - started
+            log(
+                f"[{done}/{report.scanned}] {pair.psg.name} {result['duration']:.0f} s "
+                f"in {result['seconds']:.2f} s ({report.ingested / elapsed:.2f} files/s)"
+            )
+            if len(batch) >= batch_size:
+                committer.commit(batch)
+                batch = []
+        committer.commit(batch)
+    manifest.add(aliases)
+
+    report.seconds = time.perf_counter() - started
+    return report
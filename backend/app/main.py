@@ -4,6 +4,8 @@ from fastapi.responses import HTMLResponse
 
 from app.config import settings
 from app.api import auth_router, organisations_router, eeg_router, health_router, acquisition_router, patients_router, results_router, devices_router, analytics_router
+from app.api.routes.eeg import dsp_executor
+from app.api.routes.analytics import rollup_job
 
 # Créer l'app FastAPI
 app = FastAPI(
@@ -22,6 +24,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def start_rollup_job():
+    """Recalcul périodique des rollups journaliers d'organisation"""
+    if settings.rollup_job_enabled:
+        rollup_job.start()
+
+
+@app.on_event("shutdown")
+async def stop_rollup_job():
+    await rollup_job.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_dsp_executor():
+    """Arrêter les pools DSP à l'arrêt du worker"""
+    dsp_executor.shutdown()
+
+
 # Page d'accueil
 @app.get("/", response_class=HTMLResponse)
 async def home():
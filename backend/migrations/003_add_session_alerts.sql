@@ -0,0 +1,22 @@
+-- Migration: Add per-session alert storage
+-- Date: 2026-10-18
+-- Purpose: Persist alert episodes raised by the EEG stream rule engine
+--          (fatigue threshold, quality drop, signal loss) against t_session_mesure
+--
+
+CREATE TABLE IF NOT EXISTS public.t_session_alerte (
+    alert_id SERIAL PRIMARY KEY,
+    session_id INTEGER NOT NULL,
+    rule VARCHAR(50) NOT NULL,
+    severity VARCHAR(20) NOT NULL,
+    message VARCHAR(255) NULL,
+    raised_at_s DOUBLE PRECISION NOT NULL,   -- offset from session start (s)
+    cleared_at_s DOUBLE PRECISION NULL,      -- NULL if still active when the stream ended
+    peak_value DOUBLE PRECISION NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    FOREIGN KEY (session_id) REFERENCES public.t_session_mesure(session_id) ON DELETE CASCADE
+);
+
+-- Index for per-session lookups and counts
+CREATE INDEX IF NOT EXISTS idx_session_alerte_session
+    ON public.t_session_alerte(session_id, rule);
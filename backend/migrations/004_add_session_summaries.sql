@@ -0,0 +1,31 @@
+-- Migration: Add per-session summary statistics
+-- Date: 2026-10-18
+-- Purpose: One row per ended session (stream stop or Sleep-EDF ingest) with
+--          fatigue / quality aggregates, read by /analytics/patients/{id}/trend
+--          without scanning samples. Session fields used for filtering are
+--          copied so trend queries hit a single index.
+--
+
+CREATE TABLE IF NOT EXISTS public.t_session_resume (
+    session_id INTEGER PRIMARY KEY,
+    organisation_id INTEGER NOT NULL,
+    patient_id INTEGER NULL,
+    mode VARCHAR(20) NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    deleted_at TIMESTAMP NULL,
+    source VARCHAR(10) NOT NULL,              -- stream / ingest
+    duration_s DOUBLE PRECISION NOT NULL DEFAULT 0,
+    fatigue_mean DOUBLE PRECISION NULL,
+    fatigue_max INTEGER NULL,
+    fatigue_p95 INTEGER NULL,
+    fatigue_above_s DOUBLE PRECISION NOT NULL DEFAULT 0,  -- seconds above FATIGUE_THRESHOLD
+    quality_mean DOUBLE PRECISION NULL,
+    quality_min INTEGER NULL,
+    alert_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now(),
+    FOREIGN KEY (session_id) REFERENCES public.t_session_mesure(session_id) ON DELETE CASCADE
+);
+
+-- Index for per-patient trend queries (date range scan)
+CREATE INDEX IF NOT EXISTS idx_session_resume_patient
+    ON public.t_session_resume(patient_id, started_at);
@@ -0,0 +1,68 @@
+-- Migration: Add organisation daily rollups
+-- Date: 2026-10-18
+-- Purpose: Daily aggregates per (organisation, service, medecin, mode) read by
+--          /analytics/organisation/rollups, refreshed incrementally by a
+--          background job from t_session_resume (no join with t_patient).
+--   1. Copy the patient's service / medecin into t_session_resume
+--   2. Create t_rollup_jour (sums, re-aggregated exactly over any range)
+--   3. Create t_rollup_jour_invalide (days to recompute) and queue existing days
+--
+
+-- =====================================================
+-- PART 1: Service / medecin on session summaries
+-- =====================================================
+
+ALTER TABLE public.t_session_resume ADD COLUMN IF NOT EXISTS service_id INTEGER NULL;
+ALTER TABLE public.t_session_resume ADD COLUMN IF NOT EXISTS medecin_referent_id INTEGER NULL;
+
+UPDATE public.t_session_resume r
+SET service_id = p.service_id, medecin_referent_id = p.medecin_referent_id
+FROM public.t_patient p
+WHERE p.patient_id = r.patient_id;
+
+-- Index for per-organisation day rebuilds
+CREATE INDEX IF NOT EXISTS idx_session_resume_org
+    ON public.t_session_resume(organisation_id, started_at);
+
+-- =====================================================
+-- PART 2: Daily rollups
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS public.t_rollup_jour (
+    rollup_id SERIAL PRIMARY KEY,
+    organisation_id INTEGER NOT NULL,
+    day DATE NOT NULL,                         -- day of started_at
+    service_id INTEGER NULL,
+    medecin_referent_id INTEGER NULL,
+    mode VARCHAR(20) NOT NULL,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    duration_s DOUBLE PRECISION NOT NULL DEFAULT 0,
+    fatigue_sum DOUBLE PRECISION NOT NULL DEFAULT 0,      -- sum of fatigue_mean * duration_s
+    fatigue_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,  -- duration of scored sessions
+    quality_sum DOUBLE PRECISION NOT NULL DEFAULT 0,      -- sum of quality_mean * duration_s
+    quality_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+-- One row per group : a concurrent refresh of the same day fails instead of duplicating
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rollup_jour_group
+    ON public.t_rollup_jour(organisation_id, day, COALESCE(service_id, 0), COALESCE(medecin_referent_id, 0), mode);
+
+-- Index for per-organisation date range reads
+CREATE INDEX IF NOT EXISTS idx_rollup_jour_org_day
+    ON public.t_rollup_jour(organisation_id, day);
+
+-- =====================================================
+-- PART 3: Invalidation queue
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS public.t_rollup_jour_invalide (
+    invalidation_id SERIAL PRIMARY KEY,
+    organisation_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+-- Existing sessions : first refresh builds every day
+INSERT INTO public.t_rollup_jour_invalide (organisation_id, day)
+SELECT DISTINCT organisation_id, started_at::date FROM public.t_session_resume;
@@ -0,0 +1,131 @@
+"""
+Fixtures communes des tests.
+
+La configuration passe par les variables d'environnement, posées avant le
+premier import de app (settings, moteur SQLAlchemy) : base SQLite et
+répertoires temporaires, registre en mémoire, pas de job de fond.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+_TMP = Path(tempfile.mkdtemp(prefix="neurales-tests-"))
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TMP / 'test.sqlite3'}",
+    "SESSION_STORE_DIR": str(_TMP / "sessions"),
+    "STREAM_PSG_PATH": str(_TMP / "SC-test-PSG.edf"),
+    "ACQUISITION_REGISTRY_BACKEND": "memory",
+    "ROLLUP_JOB_ENABLED": "false",
+})
+
+
+def write_edf(path: Path, signals: dict[str, np.ndarray], sfreq: float, physical: float = 200.0) -> Path:
+    """EDF minimal : signaux en µV, records d'une seconde, plage physique ±physical"""
+    n = len(signals)
+    spr = int(sfreq)
+    n_records = min(len(x) for x in signals.values()) // spr
+
+    def field(value, width: int) -> bytes:
+        return str(value).ljust(width)[:width].encode("ascii")
+
+    header = b"".join([
+        field(0, 8), field("X", 80), field("test", 80), field("01.01.89", 8), field("00.00.00", 8),
+        field(256 * (n + 1), 8), field("", 44), field(n_records, 8), field(1, 8), field(n, 4),
+    ])
+    for width, values in [
+        (16, list(signals)), (80, [""] * n), (8, ["uV"] * n),
+        (8, [-physical] * n), (8, [physical] * n), (8, [-32768] * n), (8, [32767] * n),
+        (80, [""] * n), (8, [spr] * n), (32, [""] * n),
+    ]:
+        header += b"".join(field(v, width) for v in values)
+
+    digital = [
+        np.clip(np.round(np.asarray(x) / physical * 32767), -32768, 32767).astype("<i2")
+        for x in signals.values()
+    ]
+    with open(path, "wb") as f:
+        f.write(header)
+        for r in range(n_records):
+            for d in digital:
+                f.write(d[r * spr:(r + 1) * spr].tobytes())
+    return path
+
+
+def synthetic_eeg(seconds: float, sfreq: float = 100.0, seed: int = 0) -> dict[str, np.ndarray]:
+    """Deux canaux : alpha (10 Hz) dominant puis theta (6 Hz), plus du bruit"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sfreq)) / sfreq
+    late = t >= seconds / 2
+    base = np.where(late, 40 * np.sin(2 * np.pi * 6 * t), 40 * np.sin(2 * np.pi * 10 * t))
+    return {
+        "Fpz-Cz": base + 10 * rng.standard_normal(t.size),
+        "Pz-Oz": 0.8 * base + 10 * rng.standard_normal(t.size),
+    }
+
+
+@pytest.fixture(scope="session")
+def stream_psg() -> Path:
+    """Enregistrement relu par /eeg/stream (STREAM_PSG_PATH)"""
+    return write_edf(Path(os.environ["STREAM_PSG_PATH"]), synthetic_eeg(120.0), 100.0)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Schéma créé depuis les modèles, deux organisations et un utilisateur dans chacune"""
+    import importlib
+    import pkgutil
+
+    from sqlalchemy import Column, Integer, Table, event
+
+    import app.data.models as models
+    from app.data.db import SessionLocal, engine
+    from app.data.models.base import Base
+
+    for module in pkgutil.iter_modules(models.__path__):
+        importlib.import_module(f"app.data.models.{module.name}")
+    if "t_consentement" not in Base.metadata.tables:
+        # Table référencée par t_session_mesure mais sans modèle
+        Table("t_consentement", Base.metadata, Column("consent_id", Integer, primary_key=True))
+    # Clés étrangères appliquées comme sous PostgreSQL (ON DELETE CASCADE)
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+
+    from app.data.models.organisation_model import OrganisationModel
+    from app.data.models.user_model import UserModel
+
+    with SessionLocal() as db:
+        for org_id in (1, 2):
+            db.add(OrganisationModel(organisation_id=org_id, nom=f"Org {org_id}", org_type="hospital"))
+            db.add(UserModel(
+                user_id=org_id, nom="Test", prenom="User", email=f"user{org_id}@example.org",
+                etat_compte="actif", organisation_id=org_id,
+            ))
+        db.commit()
+    return SessionLocal
+
+
+@pytest.fixture(scope="session")
+def client(database, stream_psg):
+    """Un seul TestClient : l'arrêt de l'app arrête aussi les pools DSP"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def token():
+    """Jeton d'accès d'un utilisateur de test (user_id 1 : organisation 1, 2 : organisation 2)"""
+    from app.api.routes.auth import create_access_token
+
+    return lambda user_id=1: create_access_token({"user_id": user_id})
+
+
+@pytest.fixture(scope="session")
+def headers(token):
+    return lambda user_id=1: {"Authorization": f"Bearer {token(user_id)}"}
@@ -0,0 +1,87 @@
+import json
+
+
+def _stream_url(token: str, session_id: int) -> str:
+    return f"/eeg/stream?speed=max&token={token}&session_id={session_id}"
+
+
+def test_live_follows_the_stream_of_a_started_session(client, token, headers):
+    session_id = client.post("/acquisition/start", headers=headers()).json()["session_id"]
+    assert isinstance(session_id, int)
+    try:
+        before = client.get(f"/acquisition/{session_id}/live", headers=headers()).json()
+        assert before["streaming"] is False
+        assert before["samples"] == 0
+
+        with client.websocket_connect(_stream_url(token(), session_id)) as ws:
+            # Plus d'une fenêtre de scoring (10 s de signal, chunks de 50 ms)
+            first = json.loads(ws.receive_text())
+            for _ in range(300):
+                ws.receive_text()
+            live = client.get(f"/acquisition/{session_id}/live", headers=headers()).json()
+    finally:
+        client.post("/acquisition/stop", json={"session_id": session_id}, headers=headers())
+
+    assert "error" not in first
+    assert live["streaming"] is True
+    assert live["fatigue_ready"] is True
+    assert live["frames"] >= 300
+    assert live["signal_time"] >= 15.0
+    assert (live["fatigue_score"], live["quality"]) != (before["fatigue_score"], before["quality"])
+
+
+def test_live_and_stop_are_restricted_to_the_session_organisation(client, headers):
+    session_id = client.post("/acquisition/start", headers=headers(1)).json()["session_id"]
+
+    assert client.get(f"/acquisition/{session_id}/live").status_code == 401
+    assert client.post("/acquisition/stop", json={"session_id": session_id}).status_code == 401
+    # Autre organisation : même réponse qu'une session inexistante
+    assert client.get(f"/acquisition/{session_id}/live", headers=headers(2)).status_code == 404
+    assert client.post("/acquisition/stop", json={"session_id": session_id}, headers=headers(2)).status_code == 404
+    assert client.get("/acquisition/999999/live", headers=headers(1)).status_code == 404
+
+    assert client.get(f"/acquisition/{session_id}/live", headers=headers(1)).status_code == 200
+    assert client.post("/acquisition/stop", json={"session_id": session_id}, headers=headers(1)).status_code == 200
+
+
+def test_stop_drains_a_stream_owned_by_another_worker(client, token, headers, monkeypatch):
+    from app.api.routes import acquisition
+
+    async def not_here(session_id):
+        # Worker qui ne porte pas le flux : aucun producteur local
+        return []
+
+    session_id = client.post("/acquisition/start", headers=headers()).json()["session_id"]
+    url = f"/eeg/stream?speed=10&token={token()}&session_id={session_id}"
+    with client.websocket_connect(url) as ws:
+        for _ in range(20):
+            ws.receive_text()
+        with monkeypatch.context() as patch:
+            patch.setattr(acquisition.hub, "stop_session", not_here)
+            response = client.post("/acquisition/stop", json={"session_id": session_id}, headers=headers())
+        live = client.get(f"/acquisition/{session_id}/live", headers=headers()).json()
+
+    assert response.status_code == 200
+    assert response.json()["recorders"] == []
+    # Flux arrêté avant la fin de l'enregistrement (120 s), session finalisée
+    assert live["streaming"] is False
+    assert live["signal_time"] < 60.0
+    assert acquisition.session_artifacts.read_json(session_id, "quality") is not None
+    assert acquisition.session_artifacts.read_json(session_id, "fatigue") is not None
+
+
+def test_stop_request_older_than_the_stream_is_ignored(client, token, headers):
+    from app.api.routes import acquisition
+
+    session_id = client.post("/acquisition/start", headers=headers()).json()["session_id"]
+    acquisition.session_artifacts.request_stop(session_id)
+    try:
+        url = f"/eeg/stream?speed=10&token={token()}&session_id={session_id}"
+        with client.websocket_connect(url) as ws:
+            for _ in range(40):
+                ws.receive_text()
+            live = client.get(f"/acquisition/{session_id}/live", headers=headers()).json()
+    finally:
+        client.post("/acquisition/stop", json={"session_id": session_id}, headers=headers())
+
+    assert live["streaming"] is True
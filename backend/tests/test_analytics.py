@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+RECORDING_SECONDS = 120.0  # enregistrement de test (conftest.stream_psg)
+
+
+@pytest.fixture(scope="module")
+def recorded_session(client, token, headers):
+    """Session dont tout l'enregistrement de test a été diffusé puis finalisé"""
+    session_id = client.post("/acquisition/start", headers=headers()).json()["session_id"]
+    try:
+        with client.websocket_connect(f"/eeg/stream?speed=max&token={token()}&session_id={session_id}") as ws:
+            # Jusqu'au dernier chunk (la politique drop garde toujours le plus récent)
+            while json.loads(ws.receive_text())["t0"] < RECORDING_SECONDS - 0.1:
+                pass
+    finally:
+        client.post("/acquisition/stop", json={"session_id": session_id}, headers=headers())
+    return session_id
+
+
+def test_heavy_analytics_reads_run_in_the_dsp_pool(client, headers, recorded_session):
+    base = f"/analytics/sessions/{recorded_session}"
+    before = client.get("/eeg/dsp/stats").json()["threads"]["completed"]
+
+    eeg = client.get(f"{base}/eeg", params={"max_points": 100}, headers=headers())
+    series = client.get(f"{base}/fatigue-series", params={"max_points": 10}, headers=headers())
+    epochs = client.get(f"{base}/epochs", headers=headers())
+
+    assert eeg.status_code == 200
+    assert eeg.json()["decimated"] is True
+    assert series.status_code == 200
+    assert series.json()["windows"] > 0
+    assert epochs.status_code == 200
+    assert epochs.json()["epochs"] == 4
+    # Ouverture + lecture de chaque route dans le pool de threads DSP
+    assert client.get("/eeg/dsp/stats").json()["threads"]["completed"] - before == 6
+
+
+def test_analytics_reads_report_missing_artifacts(client, headers):
+    session_id = client.post("/acquisition/start", headers=headers()).json()["session_id"]
+    base = f"/analytics/sessions/{session_id}"
+
+    assert client.get(f"{base}/eeg", headers=headers()).status_code == 404
+    assert client.get(f"{base}/fatigue-series", headers=headers()).status_code == 404
+    assert client.get(f"{base}/epochs", headers=headers()).status_code == 404
+    assert client.get(f"{base}/eeg", headers=headers(2)).status_code == 404
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from app.core.eeg_filters import StreamingFilterBank, design_sos
+from conftest import synthetic_eeg
+
+FILTERS = {"highpass_hz": 0.5, "lowpass_hz": 40.0, "notch_hz": 50.0, "notch_q": 30.0, "order": 4}
+
+
+def _recording(sfreq: float) -> np.ndarray:
+    data = np.stack(list(synthetic_eeg(60.0, sfreq).values()))
+    # Offset DC et bruit secteur : ce que les filtres retirent
+    t = np.arange(data.shape[1]) / sfreq
+    return (data + 150.0 + 20 * np.sin(2 * np.pi * 50 * t)) * 1e-6
+
+
+@pytest.mark.parametrize("sfreq", [100.0, 256.0])
+def test_filter_state_across_chunks_equals_a_single_pass(sfreq):
+    sos = design_sos(sfreq, **FILTERS)
+    data = _recording(sfreq)
+
+    whole = StreamingFilterBank(sos).process(data.copy())
+    chunked = data.copy()
+    bank = StreamingFilterBank(sos)
+    # Chunks irréguliers, dont des chunks d'un seul sample
+    bounds = np.cumsum(np.random.default_rng(0).integers(1, 40, size=data.shape[1]))
+    bounds = np.concatenate([[0], bounds[bounds < data.shape[1]], [data.shape[1]]])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        out = bank.process(chunked[:, start:end])
+        assert np.shares_memory(out, chunked)  # en place
+
+    np.testing.assert_allclose(chunked, whole, rtol=0, atol=1e-12)
+    # Même sortie que scipy sur tout l'enregistrement, état initial au premier sample
+    sos = np.array(sos)  # design_sos : tableau partagé en lecture seule
+    zi = signal.sosfilt_zi(sos)[:, np.newaxis, :] * data[np.newaxis, :, 0, np.newaxis]
+    np.testing.assert_allclose(whole, signal.sosfilt(sos, data, axis=-1, zi=zi)[0], rtol=0, atol=1e-12)
+
+
+def test_notch_above_nyquist_is_skipped():
+    # 50 Hz = Nyquist à 100 Hz : passe-haut et passe-bas seulement (2 x order/2 sections)
+    assert design_sos(100.0, **FILTERS).shape == (4, 6)
+    assert design_sos(256.0, **FILTERS).shape == (5, 6)
+    assert not StreamingFilterBank(design_sos(100.0, 0, 0, 0)).enabled
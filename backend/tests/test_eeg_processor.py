@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from app.core.eeg_processor import EEGProcessor
+from conftest import synthetic_eeg
+
+SFREQ = 100.0
+
+
+def _recording(seed: int = 0) -> np.ndarray:
+    """(n_channels, n_samples) en V, avec un artefact sur le second canal"""
+    data = np.stack(list(synthetic_eeg(120.0, SFREQ, seed).values())) * 1e-6
+    data[1, 3000:3400] += 200e-6 * np.random.default_rng(seed).standard_normal(400)
+    return data.astype(np.float32)
+
+
+@pytest.mark.parametrize("weights", [None, np.array([1.0, 0.5])])
+@pytest.mark.parametrize("quality_weighting", [True, False])
+def test_fatigue_series_matches_the_stream_fusion(weights, quality_weighting):
+    processor = EEGProcessor()
+    data = _recording()
+
+    series = processor.compute_fatigue_series(
+        data, SFREQ, 10.0, 1.0, weights, quality_weighting, batch_windows=7
+    )
+    expected = [
+        processor.compute_channel_fatigue(data[:, i * 100:i * 100 + 1000], SFREQ, weights, quality_weighting)[0]
+        for i in range(len(series))
+    ]
+
+    assert len(series) == 111
+    assert series.tolist() == expected
+    assert processor.compute_fatigue_score(data[:, 6000:7000], SFREQ, weights, quality_weighting) == expected[60]
@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.edf_reader import EDFReader
+from app.core.eeg_filters import StreamingFilterBank, design_sos
+from app.core.eeg_processor import EEGProcessor
+from app.core.fatigue_series import FatigueSeriesBuilder, FatigueSeriesReader
+from app.core.sample_store import SampleStoreReader, SampleStoreWriter
+from app.core.session_artifacts import SessionArtifacts
+from app.data.models.result_model import SessionModel
+from app.ingest.pipeline import IngestManifest, run_ingest
+from conftest import synthetic_eeg, write_edf
+
+SFREQ = 100.0
+FILTERS = {"highpass_hz": 0.5, "lowpass_hz": 40.0, "notch_hz": 50.0, "notch_q": 30.0, "order": 4}
+
+
+def _ingest(root, store_dir, database, **kwargs):
+    return run_ingest(
+        root,
+        session_factory=database,
+        session_store_dir=store_dir,
+        organisation_id=1,
+        created_by_user_id=1,
+        workers=1,
+        log=lambda message: None,
+        **kwargs,
+    )
+
+
+def _sessions(database, digest: str) -> list[int]:
+    """Lignes t_session_mesure d'un enregistrement (hash en fin de notes)"""
+    with database() as db:
+        return list(db.execute(select(SessionModel.session_id).where(SessionModel.notes.endswith(f"#{digest}"))).scalars())
+
+
+def _recordings(root, seeds=(2, 3)):
+    root.mkdir()
+    for seed in seeds:
+        write_edf(root / f"SC4{seed}01E0-PSG.edf", synthetic_eeg(30.0, SFREQ, seed), SFREQ)
+
+
+def _sample_store(psg, path) -> SampleStoreReader:
+    reader = EDFReader(psg)
+    writer = SampleStoreWriter(path, reader.sfreq, reader.channels)
+    writer.append(reader.read(0, reader.n_samples))
+    writer.close(sync=True)
+    return SampleStoreReader(path)
+
+
+def test_fatigue_series_builder_matches_a_single_batch(tmp_path):
+    psg = write_edf(tmp_path / "SC4001E0-PSG.edf", synthetic_eeg(120.0, SFREQ), SFREQ)
+    store = _sample_store(psg, tmp_path / "samples")
+    processor = EEGProcessor()
+
+    summaries = {}
+    for block_seconds in (7.0, 3600.0):
+        builder = FatigueSeriesBuilder(processor, 10.0, 0.25, filter_params=FILTERS, block_seconds=block_seconds)
+        summaries[block_seconds] = builder.build(store, tmp_path / f"series-{block_seconds}").to_dict()
+    blocks, single = (FatigueSeriesReader(tmp_path / f"series-{b}") for b in (7.0, 3600.0))
+
+    data = store.read(0, store.n_samples)
+    StreamingFilterBank(design_sos(SFREQ, **FILTERS)).process(data)
+    expected = processor.compute_fatigue_series(data, SFREQ, 10.0, 0.25)
+
+    # (12000 - 1000) / 25 + 1 fenêtres, horodatées à leur fin
+    assert len(single) == len(expected) == 441
+    assert single.arrays()[0][0] == 10.0
+    assert single.arrays()[1].tolist() == expected.tolist()
+    # Blocs : filtrage identique à l'arrondi flottant près
+    assert np.abs(blocks.arrays()[1].astype(int) - single.arrays()[1]).max() <= 1
+    assert summaries[7.0]["windows"] == summaries[3600.0]["windows"] == 441
+    assert summaries[3600.0]["duration_seconds"] == 110.25
+
+
+def test_ingest_writes_the_fatigue_series_of_each_session(tmp_path, database):
+    (tmp_path / "edf").mkdir()
+    write_edf(tmp_path / "edf" / "SC4101E0-PSG.edf", synthetic_eeg(120.0, SFREQ, seed=1), SFREQ)
+    builder = FatigueSeriesBuilder(EEGProcessor(), 10.0, 1.0, filter_params=FILTERS)
+
+    report = _ingest(tmp_path / "edf", tmp_path / "store", database, series_builder=builder)
+
+    assert (report.ingested, report.failed) == (1, 0), report.errors
+    (entry,) = IngestManifest(tmp_path / "store" / "ingest_manifest.jsonl").by_hash.values()
+    artifacts = SessionArtifacts(tmp_path / "store")
+    summary = artifacts.read_json(entry["session_id"], "fatigue")
+    series = FatigueSeriesReader(artifacts.fatigue_dir(entry["session_id"]))
+
+    assert entry["windows"] == len(series) == summary["windows"] == 111
+    assert summary["duration_seconds"] == 111.0
+    assert [ch["name"] for ch in summary["channels"]] == ["Fpz-Cz", "Pz-Oz"]
+
+
+def test_ingest_resumes_from_the_manifest(tmp_path, database):
+    _recordings(tmp_path / "edf")
+    store = tmp_path / "store"
+
+    first = _ingest(tmp_path / "edf", store, database)
+    second = _ingest(tmp_path / "edf", store, database)
+
+    assert (first.ingested, first.skipped) == (2, 0)
+    # Même chemin / taille / mtime : ignoré sans relire les fichiers
+    assert (second.ingested, second.skipped) == (0, 2)
+    for entry in IngestManifest(store / "ingest_manifest.jsonl").by_hash.values():
+        assert _sessions(database, entry["hash"]) == [entry["session_id"]]
+        assert SessionArtifacts(store).samples_dir(entry["session_id"]).exists()
+
+
+def test_moved_recording_is_recognised_by_its_content(tmp_path, database):
+    _recordings(tmp_path / "edf", seeds=(4,))
+    store = tmp_path / "store"
+    _ingest(tmp_path / "edf", store, database)
+    (tmp_path / "edf" / "moved").mkdir()
+    os.replace(tmp_path / "edf" / "SC4401E0-PSG.edf", tmp_path / "edf" / "moved" / "SC4401E0-PSG.edf")
+
+    moved = _ingest(tmp_path / "edf", store, database)
+    manifest = IngestManifest(store / "ingest_manifest.jsonl")
+
+    assert (moved.ingested, moved.skipped) == (0, 1)
+    (entry,) = manifest.by_hash.values()
+    assert entry["psg"].endswith("moved/SC4401E0-PSG.edf")
+    assert len(_sessions(database, entry["hash"])) == 1
+
+
+def test_interrupted_ingest_reuses_the_inserted_sessions(tmp_path, database):
+    _recordings(tmp_path / "edf", seeds=(5, 6))
+    store = tmp_path / "store"
+    _ingest(tmp_path / "edf", store, database)
+    manifest_path = store / "ingest_manifest.jsonl"
+    lines = manifest_path.read_text().splitlines()
+    # Arrêt brutal après l'INSERT : dernière ligne du manifeste tronquée
+    manifest_path.write_text(lines[0] + "\n" + lines[1][:20])
+    lost = IngestManifest(manifest_path)
+    assert len(lost.by_hash) == 1
+
+    resumed = _ingest(tmp_path / "edf", store, database)
+    manifest = IngestManifest(manifest_path)
+
+    assert (resumed.ingested, resumed.skipped, resumed.failed) == (1, 1, 0)
+    assert len(manifest.by_hash) == 2
+    for entry in manifest.by_hash.values():
+        # Ligne retrouvée par ses notes : pas de session en double
+        assert _sessions(database, entry["hash"]) == [entry["session_id"]]
+    assert not any((store / ".ingest").iterdir())
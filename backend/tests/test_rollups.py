@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from app.api.routes.analytics import refresh_rollups
+from app.data.repositories.result_repository import SessionRepository
+from app.data.repositories.session_summary_repository import SessionSummaryRepository
+
+DAY_1 = datetime(2026, 3, 2, 22, 0)
+DAY_2 = datetime(2026, 3, 5, 23, 30)
+
+
+def _summary(duration_s: float, fatigue_mean: float, quality_mean: float) -> dict:
+    return {
+        "duration_s": duration_s,
+        "fatigue_mean": fatigue_mean,
+        "fatigue_max": int(fatigue_mean) + 10,
+        "fatigue_p95": int(fatigue_mean) + 5,
+        "fatigue_above_s": 0.0,
+        "quality_mean": quality_mean,
+        "quality_min": int(quality_mean) - 10,
+    }
+
+
+def _rollups(client, headers) -> dict:
+    response = client.get(
+        "/analytics/organisation/rollups",
+        params={"start": "2026-03-01", "end": "2026-03-31", "group_by": "day,mode"},
+        headers=headers(),
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _groups(body: dict) -> dict:
+    return {(g["day"], g["mode"]): (g["sessions"], g["duration_s"], g["fatigue_mean"]) for g in body["groups"]}
+
+
+def test_rollups_are_rebuilt_after_an_update_or_a_delete(client, headers, database):
+    with database() as db:
+        repo = SessionRepository(db)
+        first = repo.create("sleep", created_by_user_id=1, organisation_id=1, started_at=DAY_1).session_id
+        second = repo.create("sleep", created_by_user_id=1, organisation_id=1, started_at=DAY_1).session_id
+        SessionSummaryRepository(db).upsert_many({
+            first: _summary(3600.0, 40.0, 90.0),
+            second: _summary(1800.0, 70.0, 80.0),
+        }, source="stream")
+    refresh_rollups()
+
+    body = _rollups(client, headers)
+    assert body["pending_days"] == 0
+    # Moyenne pondérée par la durée : (40·3600 + 70·1800) / 5400
+    assert _groups(body) == {("2026-03-02", "sleep"): (2, 5400.0, 50.0)}
+
+    # Session déplacée d'un jour à l'autre et changée de mode
+    moved = client.put(
+        f"/results/{second}", json={"started_at": DAY_2.isoformat(), "mode": "repos"}, headers=headers()
+    )
+    assert moved.status_code == 200
+    assert _rollups(client, headers)["pending_days"] == 2
+    refresh_rollups()
+    assert _groups(_rollups(client, headers)) == {
+        ("2026-03-02", "sleep"): (1, 3600.0, 40.0),
+        ("2026-03-05", "repos"): (1, 1800.0, 70.0),
+    }
+
+    # Suppression définitive : le résumé part en cascade, son jour est recalculé
+    assert client.delete(f"/results/{first}", headers=headers()).status_code == 204
+    refresh_rollups()
+    body = _rollups(client, headers)
+    assert _groups(body) == {("2026-03-05", "repos"): (1, 1800.0, 70.0)}
+    assert body["totals"] == {"sessions": 1, "duration_s": 1800.0, "fatigue_mean": 70.0, "quality_mean": 80.0}
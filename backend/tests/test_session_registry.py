@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import pytest
+
+from app.data.repositories import session_registry
+from app.data.repositories.session_registry import SessionRegistryMemoryImpl, SessionRegistrySQLiteImpl
+from app.domain.entities.acquisition_session import AcquisitionSession
+
+TTL = 3600.0
+
+
+class FakeClock:
+    """Remplace le module time du registre : monotonic() et time() avancent ensemble"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(session_registry, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def registry(request, clock, tmp_path):
+    if request.param == "memory":
+        return SessionRegistryMemoryImpl(TTL)
+    return SessionRegistrySQLiteImpl(tmp_path / "registry.sqlite3", TTL, evict_interval_seconds=0.0)
+
+
+def _session(session_id: str) -> AcquisitionSession:
+    return AcquisitionSession(session_id=session_id, status="running", started_at=datetime(2026, 1, 1))
+
+
+def _count(registry) -> int:
+    if isinstance(registry, SessionRegistryMemoryImpl):
+        return len(registry)
+    return registry._conn().execute("SELECT COUNT(*) FROM acquisition_session").fetchone()[0]
+
+
+def test_stopped_sessions_are_evicted_after_the_ttl(registry, clock):
+    for session_id in ("a", "b", "running"):
+        registry.create(_session(session_id))
+    registry.stop("a")
+    clock.now += 100
+    registry.stop("b")
+
+    clock.now += TTL - 50  # a : TTL + 50 s après l'arrêt, b : TTL - 50 s
+    # Expirée mais pas encore évincée : déjà invisible
+    assert registry.get("a") is None
+    assert registry.get("b").status == "stopped"
+    assert registry.evict_expired() == 1
+    assert _count(registry) == 2
+
+    clock.now += 10 * TTL
+    assert registry.evict_expired() == 1
+    assert registry.get("b") is None
+    # Une session en cours n'expire jamais
+    assert registry.get("running").status == "running"
+    assert _count(registry) == 1
+
+
+def test_writes_evict_expired_sessions(registry, clock):
+    registry.create(_session("old"))
+    registry.stop("old")
+    clock.now += TTL + 1
+
+    registry.create(_session("new"))
+
+    assert _count(registry) == 1
+    assert registry.get("new") is not None
+
+
+def test_second_stop_keeps_the_first_stop_time(registry, clock):
+    registry.create(_session("a"))
+    first = registry.stop("a").stopped_at
+    clock.now += TTL - 1
+    registry.stop("a")
+
+    clock.now += 2  # TTL + 1 s après le premier arrêt
+    assert registry.get("a") is None
+    if isinstance(registry, SessionRegistrySQLiteImpl):
+        assert first == datetime.fromtimestamp(clock.now - TTL - 1)
+
+
+def test_sqlite_registry_is_shared_between_workers(clock, tmp_path):
+    path = tmp_path / "registry.sqlite3"
+    worker_a = SessionRegistrySQLiteImpl(path, TTL)
+    worker_b = SessionRegistrySQLiteImpl(path, TTL)
+
+    worker_a.create(_session("s1"))
+    assert worker_b.stop("s1").status == "stopped"
+    assert worker_a.get("s1").status == "stopped"
+
+    clock.now += TTL + 1
+    assert worker_b.evict_expired() == 1
+    assert worker_a.get("s1") is None
@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+
+from app.core.signal_quality import QualitySummary, SignalQualityEstimator
+from conftest import synthetic_eeg
+
+SFREQ = 100.0
+
+
+def _reports(seed: int = 0):
+    """Un rapport qualité par chunk de 50 ms, avec un passage plat et un artefact"""
+    data = np.stack(list(synthetic_eeg(60.0, SFREQ, seed).values())) * 1e-6
+    data[0, 1000:1500] = 0.0
+    data[1, 3000:3300] += 300e-6
+    estimator = SignalQualityEstimator(SFREQ)
+    for start in range(0, data.shape[1], 5):
+        yield estimator.push(data[:, start:start + 5].astype(np.float32)), 0.05
+
+
+def test_quality_summary_resumes_from_the_raw_sums():
+    channels = ["Fpz-Cz", "Pz-Oz"]
+    reports = list(_reports())
+    whole = QualitySummary(channels)
+    for report, seconds in reports:
+        whole.update(report, seconds)
+
+    first = QualitySummary(channels)
+    for report, seconds in reports[:487]:
+        first.update(report, seconds)
+    # Relance du flux : reprise depuis quality.json
+    resumed = QualitySummary.from_dict(channels, json.loads(json.dumps(first.to_dict())))
+    for report, seconds in reports[487:]:
+        resumed.update(report, seconds)
+
+    assert resumed.to_dict() == whole.to_dict()
+    assert resumed._score_sum == whole._score_sum
+    np.testing.assert_array_equal(resumed._metric_sums, whole._metric_sums)
+
+
+def test_quality_summary_still_resumes_a_summary_without_state():
+    channels = ["Fpz-Cz", "Pz-Oz"]
+    summary = QualitySummary(channels)
+    for report, seconds in _reports():
+        summary.update(report, seconds)
+    data = summary.to_dict()
+    del data["state"]
+
+    resumed = QualitySummary.from_dict(channels, data)
+
+    assert resumed.seconds == data["duration_seconds"]
+    assert resumed.score == summary.score
+    assert QualitySummary.from_dict(["Fpz-Cz"], summary.to_dict()).seconds == 0.0
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from app.core.eeg_processor import EEGProcessor
+from app.core.streaming_fatigue import StreamingFatigueScorer
+from conftest import synthetic_eeg
+
+SFREQ = 100.0
+CHUNK = 5  # 50 ms
+
+
+def _recording(seed: int) -> np.ndarray:
+    data = np.stack(list(synthetic_eeg(90.0, SFREQ, seed).values())) * 1e-6
+    data[1, 4000:4300] += 300e-6 * np.random.default_rng(seed).standard_normal(300)  # artefact
+    return data.astype(np.float32)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("weights", [None, np.array([1.0, 0.5])])
+@pytest.mark.parametrize("resync_seconds", [60.0, 1e9])
+def test_sliding_dft_matches_channel_fatigue(seed, weights, resync_seconds):
+    processor = EEGProcessor()
+    data = _recording(seed)
+    scorer = StreamingFatigueScorer(
+        processor, SFREQ, 10.0, score_interval_seconds=0.25,
+        resync_seconds=resync_seconds, channel_weights=weights,
+    )
+    n = scorer.n
+
+    compared = 0
+    for end in range(CHUNK, data.shape[1] + 1, CHUNK):
+        scored = scorer.scored
+        scorer.push(data[:, end - CHUNK:end])
+        if scorer.scored == scored or not scorer.ready:
+            continue
+        score, channel_scores = processor.compute_channel_fatigue(data[:, end - n:end], SFREQ, weights)
+        assert abs(scorer.score - score) <= 1, end
+        assert np.abs(np.subtract(scorer.channel_scores, channel_scores)).max() <= 1, end
+        compared += 1
+
+    # (9000 - 1000) / 25 fenêtres complètes scorées après le remplissage
+    assert compared == 320
@@ -0,0 +1,86 @@
+# desktop/app/api_client.py
+
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+API_URL = "http://127.0.0.1:8000"
+WS_URL = "ws://127.0.0.1:8000"
+
+
+class ApiError(Exception):
+    """Erreur renvoyée par le backend (detail) ou backend injoignable"""
+
+
+class ApiClient:
+    """
+    Appels REST au backend.
+    L'access token reste en mémoire (jamais écrit sur disque).
+    """
+
+    def __init__(self, base_url: str = API_URL, ws_url: str = WS_URL, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.ws_url = ws_url.rstrip("/")
+        self.timeout = timeout
+        self.token = None
+        self.user = None
+
+    # ---------------- Auth ----------------
+
+    def login(self, email: str, password: str) -> dict:
+        data = self._request("POST", "/auth/login", {"email": email, "password": password})
+        self.token = data["access_token"]
+        self.user = self._request("GET", "/auth/me")
+        return self.user
+
+    # ---------------- Séances ----------------
+
+    def create_session(self, mode: str = "repos") -> int:
+        """Nouvelle ligne t_session_mesure : son id rattache le flux EEG à la séance"""
+        data = self._request("POST", "/results", {
+            "mode": mode,
+            "created_by_user_id": self.user["user_id"],
+            "organisation_id": self.user["organisation_id"],
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        return int(data["session_id"])
+
+    def stop_acquisition(self, session_id: int) -> dict:
+        """Termine le flux de la séance côté serveur (résumés et alertes écrits avant la réponse)"""
+        return self._request("POST", "/acquisition/stop", {"session_id": session_id})
+
+    def session_alerts(self, session_id: int) -> dict:
+        return self._request("GET", f"/analytics/sessions/{session_id}/alerts")
+
+    def session_fatigue(self, session_id: int) -> dict:
+        return self._request("GET", f"/analytics/sessions/{session_id}/fatigue-score")
+
+    def stream_url(self, session_id: int, fmt: str = "binary") -> str:
+        query = urllib.parse.urlencode({"format": fmt, "session_id": session_id, "token": self.token})
+        return f"{self.ws_url}/eeg/stream?{query}"
+
+    # ---------------- HTTP ----------------
+
+    def _request(self, method: str, path: str, body: dict | None = None) -> dict:
+        headers = {"Accept": "application/json"}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                raw = resp.read()
+        except urllib.error.HTTPError as e:
+            try:
+                detail = json.loads(e.read()).get("detail", e.reason)
+            except ValueError:
+                detail = e.reason
+            raise ApiError(f"{e.code} : {detail}") from e
+        except OSError as e:
+            raise ApiError(f"Backend injoignable ({e})") from e
+        return json.loads(raw) if raw else {}
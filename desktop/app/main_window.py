@@ -1,4 +1,5 @@
-from PySide6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QStackedWidget
+from PySide6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QStackedWidget, QMessageBox
+from app.api_client import ApiClient, ApiError
 from app.ui.sidebar import Sidebar
 from app.ui.topbar import TopBar
 
@@ -28,8 +29,9 @@ class MainWindow(QMainWindow):
     """
     Shell principal : Sidebar + TopBar + Stack pages
     """
-    def __init__(self, user_display: str = "Utilisateur : Dr Dupont"):
+    def __init__(self, api: ApiClient, user_display: str = "Utilisateur : Dr Dupont"):
         super().__init__()
+        self.api = api
         self.setWindowTitle("Neural ES")
         self.resize(1440, 850)
 
@@ -69,12 +71,14 @@ class MainWindow(QMainWindow):
         self._add_page("patient_detail", PatientDetailPage(on_new_session=lambda: self.navigate("new_session")))
 
         self._add_page("sessions_list", SessionsListPage(on_new_session=lambda: self.navigate("new_session")))
-        self._add_page("new_session", NewSessionPage(on_cancel=lambda: self.navigate("sessions_list"), on_start=lambda: self.navigate("acquisition")))
+        self._add_page("new_session", NewSessionPage(on_cancel=lambda: self.navigate("sessions_list"), on_start=self._start_acquisition))
 
-        self._add_page("acquisition", AcquisitionPage(on_stop=lambda: self.navigate("results_detail")))
+        self.acquisition = AcquisitionPage(api, on_stop=self._on_acquisition_stop)
+        self._add_page("acquisition", self.acquisition)
 
         self._add_page("results_list", ResultsListPage(on_open_result=lambda: self.navigate("results_detail")))
-        self._add_page("results_detail", ResultsDetailPage())
+        self.results_detail = ResultsDetailPage()
+        self._add_page("results_detail", self.results_detail)
 
         self._add_page("admin_hub", AdminHubPage(on_users=lambda: self.navigate("admin_users_list"), on_devices=lambda: self.navigate("admin_devices_list")))
         self._add_page("admin_users_list", AdminUsersListPage(on_new=lambda: self.navigate("admin_user_create")))
@@ -96,6 +100,29 @@ class MainWindow(QMainWindow):
         self.stack.setCurrentIndex(self.pages[route])
         self.sidebar.set_active(route)
 
+    def _start_acquisition(self):
+        # Une séance = une ligne t_session_mesure ; le flux EEG y est rattaché
+        try:
+            session_id = self.api.create_session()
+        except ApiError as e:
+            QMessageBox.warning(self, "Nouvelle séance", f"Impossible de créer la séance : {e}")
+            return
+        self.acquisition.start(session_id)
+        self.navigate("acquisition")
+
+    def _on_acquisition_stop(self, session_id: int):
+        # Fin du flux côté serveur (alertes et agrégats enregistrés), puis relus depuis l'API
+        try:
+            self.api.stop_acquisition(session_id)
+            alerts = self.api.session_alerts(session_id)
+            fatigue = self.api.session_fatigue(session_id)
+        except ApiError as e:
+            QMessageBox.warning(self, "Résultats", f"Résultats indisponibles : {e}")
+            return
+        self.results_detail.set_alert_counts(alerts["counts"])
+        self.results_detail.set_fatigue_summary(fatigue)
+        self.navigate("results_detail")
+
     def _open_patient(self):
         # démo : ouvre la fiche patient
         self.navigate("patient_detail")
@@ -1,6 +1,7 @@
 # desktop/app/pages/acquisition.py
 
 import json
+import struct
 import numpy as np
 
 from PySide6.QtCore import QUrl, QTimer
@@ -11,25 +12,33 @@ from PySide6.QtWidgets import (
 
 import pyqtgraph as pg
 
-WS_URL = "ws://127.0.0.1:8000/eeg/stream"
+# En-tête des frames binaires (cf. backend app/core/eeg_frames.py)
+FRAME_HEADER = struct.Struct("<4sBBHIdffh2x")
+FRAME_DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<i2")}
 
 # Perf global
 pg.setConfigOptions(useOpenGL=True, antialias=False)
 
 
 class AcquisitionPage(QWidget):
-    def __init__(self, on_stop=None):
+    def __init__(self, api, on_stop=None):
         super().__init__()
+        self.api = api
         self.on_stop = on_stop
 
         # --- état ---
         self.paused = False
+        self.session_id = None     # t_session_mesure de la séance en cours
 
         # --- ring buffer ---
         self.sfreq = None
         self.channels = []
+        self.stream_channels = []  # annoncés par le message "meta" (mode binaire)
         self.window_seconds = 10.0
 
+        # --- alertes (règles évaluées et enregistrées côté backend) ---
+        self.active_alerts = {}    # règle -> libellé
+
         self.max_samples = 0
         self.x = None              # (max_samples,)
         self.y = None              # (n_channels, max_samples)
@@ -136,8 +145,8 @@ class AcquisitionPage(QWidget):
         self.ws.connected.connect(self._on_ws_connected)
         self.ws.disconnected.connect(self._on_ws_disconnected)
         self.ws.textMessageReceived.connect(self._on_ws_msg)
+        self.ws.binaryMessageReceived.connect(self._on_ws_binary)
         self.ws.errorOccurred.connect(self._on_ws_error)
-        self.ws.open(QUrl(WS_URL))
 
         # --- Timer rendu (60 FPS) ---
         self.render_timer = QTimer(self)
@@ -147,8 +156,19 @@ class AcquisitionPage(QWidget):
 
     # ---------------- WS ----------------
 
+    def start(self, session_id: int):
+        """Ouvrir le flux de la séance (jeton et session_id : persistance côté serveur)"""
+        self.session_id = session_id
+        self.paused = False
+        self.btn_pause.setText("Pause")
+        self.active_alerts = {}
+        self.lbl_alerts.setText("Aucune alerte pour le moment")
+        self.x = None
+        self.lbl_info.setText("Connexion EEG : en attente…")
+        self.ws.open(QUrl(self.api.stream_url(session_id)))
+
     def _on_ws_connected(self):
-        self.lbl_info.setText(f"Connexion EEG : OK ({WS_URL})")
+        self.lbl_info.setText(f"Connexion EEG : OK (séance #{self.session_id})")
 
     def _on_ws_disconnected(self):
         self.lbl_info.setText("Connexion EEG : fermée")
@@ -166,23 +186,68 @@ class AcquisitionPage(QWidget):
             self.lbl_info.setText(f"Connexion EEG : ERREUR ({data['error']})")
             return
 
-        fatigue = int(data.get("fatigue", 0))
+        if data.get("type") == "meta":
+            # Mode binaire : les noms de canaux sont annoncés une seule fois
+            self.stream_channels = list(data.get("channels", []))
+            return
+
+        if data.get("type") == "alert":
+            # Mode binaire : alertes envoyées en messages texte séparés
+            self._on_alert_event(data)
+            return
+
+        samples = np.asarray(data.get("samples", []), dtype=np.float32)
+        self._on_chunk(
+            t0=float(data.get("t0", 0.0)),
+            sfreq=float(data.get("sfreq", 0.0)),
+            channels=data.get("channels", []),
+            samples=samples,
+            fatigue=int(data.get("fatigue", 0)),
+        )
+
+        for event in data.get("alert_events", []):
+            self._on_alert_event(event)
+
+    def _on_alert_event(self, event: dict):
+        rule = event.get("rule", "")
+        if event.get("state") == "raised":
+            self.active_alerts[rule] = event.get("message") or rule
+        else:
+            self.active_alerts.pop(rule, None)
+
+        alerts = list(self.active_alerts.values())
+        self.lbl_alerts.setText("\n".join(alerts) if alerts else "Aucune alerte pour le moment")
+
+    def _on_ws_binary(self, msg):
+        if self.paused:
+            return
+
+        buf = msg.data()
+        if len(buf) < FRAME_HEADER.size:
+            return
+        magic, _version, code, n_ch, n_samp, t0, sfreq, scale, fatigue = FRAME_HEADER.unpack_from(buf)
+        if magic != b"NEEG" or code not in FRAME_DTYPES:
+            return
+
+        samples = np.frombuffer(
+            buf, dtype=FRAME_DTYPES[code], count=n_ch * n_samp, offset=FRAME_HEADER.size
+        ).reshape(n_ch, n_samp)
+        if code == 1:
+            samples = samples.astype(np.float32) * np.float32(scale)
+
+        self._on_chunk(t0, float(sfreq), self.stream_channels, samples, fatigue)
+
+    def _on_chunk(self, t0: float, sfreq: float, channels: list, samples: np.ndarray, fatigue: int):
         self.lbl_fatigue.setText(f"Score actuel : {fatigue} / 100")
         self.bar.setValue(fatigue)
 
-        sfreq = float(data.get("sfreq", 0.0))
-        channels = data.get("channels", [])
-        samples = data.get("samples", [])
-        t0 = float(data.get("t0", 0.0))
-        alerts = data.get("alerts", [])
-
-        n_ch = len(samples)
-        n_samp = len(samples[0]) if n_ch else 0
+        n_ch, n_samp = samples.shape if samples.ndim == 2 else (0, 0)
         self.lbl_chunk.setText(f"t0={t0:.2f}s | {n_ch} canaux x {n_samp} samples")
-        self.lbl_alerts.setText("\n".join(map(str, alerts)) if alerts else "Aucune alerte pour le moment")
 
-        if self.sfreq != sfreq or self.channels != channels or self.x is None:
+        if self.channels != channels or self.x is None:
             self._init_buffers(sfreq, channels)
+        # sfreq peut baisser temporairement (backpressure "decimate" côté serveur)
+        self.sfreq = sfreq
 
         self._push_chunk(samples)
 
@@ -208,12 +273,12 @@ class AcquisitionPage(QWidget):
         for ch in self.channels:
             self.curves.append(self.plot.plot([], [], name=ch))
 
-    def _push_chunk(self, samples_2d):
-        if not samples_2d or self.y is None:
+    def _push_chunk(self, samples_2d: np.ndarray):
+        if self.y is None or samples_2d.ndim != 2:
             return
 
-        n_ch = min(len(samples_2d), self.y.shape[0])
-        n_samp = len(samples_2d[0]) if n_ch else 0
+        n_ch = min(samples_2d.shape[0], self.y.shape[0])
+        n_samp = samples_2d.shape[1] if n_ch else 0
         if n_samp == 0:
             return
 
@@ -227,8 +292,7 @@ class AcquisitionPage(QWidget):
 
         if end <= self.max_samples:
             self.x[w:end] = t_chunk
-            for c in range(n_ch):
-                self.y[c, w:end] = np.asarray(samples_2d[c], dtype=np.float32)
+            self.y[:n_ch, w:end] = samples_2d[:n_ch]
         else:
             first = self.max_samples - w
             second = n_samp - first
@@ -236,10 +300,8 @@ class AcquisitionPage(QWidget):
             self.x[w:self.max_samples] = t_chunk[:first]
             self.x[0:second] = t_chunk[first:]
 
-            for c in range(n_ch):
-                arr = np.asarray(samples_2d[c], dtype=np.float32)
-                self.y[c, w:self.max_samples] = arr[:first]
-                self.y[c, 0:second] = arr[first:]
+            self.y[:n_ch, w:self.max_samples] = samples_2d[:n_ch, :first]
+            self.y[:n_ch, 0:second] = samples_2d[:n_ch, first:]
 
         self.write_idx = (w + n_samp) % self.max_samples
         self.count = min(self.max_samples, self.count + n_samp)
@@ -298,5 +360,5 @@ class AcquisitionPage(QWidget):
             self.ws.close()
         except Exception:
             pass
-        if self.on_stop:
-            self.on_stop()
+        if self.on_stop and self.session_id is not None:
+            self.on_stop(self.session_id)
@@ -1,5 +1,6 @@
 from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QFrame
 from PySide6.QtCore import Qt
+from app.api_client import ApiClient, ApiError
 from app.main_window import MainWindow
 
 class LoginWindow(QMainWindow):
@@ -48,6 +49,11 @@ class LoginWindow(QMainWindow):
 
         card_l.addSpacing(8)
 
+        self.lbl_error = QLabel("")
+        self.lbl_error.setStyleSheet("color:#DC2626;")
+        self.lbl_error.setWordWrap(True)
+        card_l.addWidget(self.lbl_error)
+
         btn = QPushButton("Se connecter")
         btn.setObjectName("PrimaryButton")
         btn.clicked.connect(self._login)
@@ -60,7 +66,13 @@ class LoginWindow(QMainWindow):
         layout.addWidget(card, alignment=Qt.AlignCenter)
 
     def _login(self):
-        # Démo : ouvre directement l’app
-        self.main = MainWindow(user_display="Utilisateur : Dr Dupont")
+        # Jeton d'accès gardé par le client : flux EEG et analytics en ont besoin
+        api = ApiClient()
+        try:
+            user = api.login(self.user.text().strip(), self.pw.text())
+        except ApiError as e:
+            self.lbl_error.setText(f"Connexion impossible : {e}")
+            return
+        self.main = MainWindow(api, user_display=f"Utilisateur : {user['prenom']} {user['nom']}")
         self.main.show()
         self.close()
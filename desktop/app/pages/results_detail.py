@@ -24,7 +24,13 @@ class ResultsDetailPage(QWidget):
         row.setSpacing(14)
 
         indic = Card("Indicateurs de fatigue")
-        indic.layout.addWidget(QLabel("Score moyen : 55 / 100\nScore maximum : 78 / 100\nSeuil critique : 70\nDépassement du seuil : Oui (3 fois)"))
+        self.lbl_scores = QLabel("Score moyen : — / 100\nScore maximum : — / 100\nSeuil critique : 70")
+        indic.layout.addWidget(self.lbl_scores)
+        self.lbl_threshold = QLabel("Dépassement du seuil : —")
+        indic.layout.addWidget(self.lbl_threshold)
+        self.lbl_alerts = QLabel("")
+        self.lbl_alerts.setStyleSheet("color: #777;")
+        indic.layout.addWidget(self.lbl_alerts)
 
         graphs = Card("Graphiques")
         graphs.layout.addWidget(QLabel("Score de fatigue / temps (placeholder)"))
@@ -46,3 +52,27 @@ class ResultsDetailPage(QWidget):
         actions.addWidget(secondary_button("Export CSV"))
         actions.addStretch(1)
         root.addLayout(actions)
+
+    def set_fatigue_summary(self, summary: dict):
+        """Agrégats fatigue de la séance (mean / max / threshold, cf. /analytics/sessions/{id}/fatigue-score)"""
+        def fmt(value):
+            return "—" if value is None else f"{value:g}"
+        threshold = summary.get("threshold", 70)
+        self.lbl_scores.setText(
+            f"Score moyen : {fmt(summary.get('mean'))} / 100\n"
+            f"Score maximum : {fmt(summary.get('max'))} / 100\n"
+            f"Seuil critique : {fmt(threshold)}"
+        )
+
+    def set_alert_counts(self, counts: dict):
+        """Comptes d'alertes de la séance (règle -> nombre de levées, cf. /analytics/sessions/{id}/alerts)"""
+        exceeded = counts.get("fatigue_high", 0)
+        self.lbl_threshold.setText(
+            f"Dépassement du seuil : Oui ({exceeded} fois)" if exceeded else "Dépassement du seuil : Non"
+        )
+        others = {
+            "quality_low": "Qualité dégradée",
+            "signal_lost": "Perte du signal",
+        }
+        lines = [f"{label} : {counts[rule]} fois" for rule, label in others.items() if counts.get(rule)]
+        self.lbl_alerts.setText("\n".join(lines))